@@ -1,8 +1,9 @@
 from opendbc.can.packer import CANPacker
-from opendbc.can.parser import CANParser, CANDefine
+from opendbc.can.parser import CANParser, CANParserGroup, CANDefine
 
 __all__ = [
   "CANDefine",
   "CANParser",
+  "CANParserGroup",
   "CANPacker",
 ]
@@ -1,22 +1,22 @@
 import re
 import os
 from collections.abc import Callable
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from functools import cache
 
 from opendbc import DBC_PATH, get_generated_dbcs
 
 # TODO: these should just be passed in along with the DBC file
-from opendbc.car.honda.hondacan import honda_checksum
-from opendbc.car.toyota.toyotacan import toyota_checksum
-from opendbc.car.subaru.subarucan import subaru_checksum
-from opendbc.car.chrysler.chryslercan import chrysler_checksum, fca_giorgio_checksum
-from opendbc.car.hyundai.hyundaicanfd import hkg_can_fd_checksum
-from opendbc.car.volkswagen.mlbcan import volkswagen_mlb_checksum
-from opendbc.car.volkswagen.mqbcan import volkswagen_mqb_meb_checksum, xor_checksum
-from opendbc.car.tesla.teslacan import tesla_checksum
-from opendbc.car.body.bodycan import body_checksum
-from opendbc.car.psa.psacan import psa_checksum
+from opendbc.car.honda.hondacan import HONDA_CHECKSUM
+from opendbc.car.toyota.toyotacan import TOYOTA_CHECKSUM
+from opendbc.car.subaru.subarucan import SUBARU_CHECKSUM
+from opendbc.car.chrysler.chryslercan import CHRYSLER_CHECKSUM, FCA_GIORGIO_CHECKSUM
+from opendbc.car.hyundai.hyundaicanfd import HKG_CAN_FD_CHECKSUM
+from opendbc.car.volkswagen.mlbcan import VOLKSWAGEN_MLB_CHECKSUM
+from opendbc.car.volkswagen.mqbcan import VOLKSWAGEN_MQB_MEB_CHECKSUM, XOR_CHECKSUM
+from opendbc.car.tesla.teslacan import TESLA_CHECKSUM
+from opendbc.car.body.bodycan import BODY_CHECKSUM
+from opendbc.car.psa.psacan import PSA_CHECKSUM
 
 
 class SignalType:
@@ -48,7 +48,10 @@ class Signal:
   offset: float
   is_little_endian: bool
   type: int = SignalType.DEFAULT
-  calc_checksum: 'Callable[[int, Signal, bytearray], int] | None' = None
+  # computes the checksum from a read-only payload: bytes, bytearray or memoryview, which it must not modify
+  calc_checksum: 'Callable[[int, Signal, bytes | bytearray | memoryview], int] | None' = None
+  is_multiplexor: bool = False
+  multiplex_value: int | None = None  # only valid while the message's multiplexor has this value
 
 
 @dataclass
@@ -65,6 +68,7 @@ class Val:
   address: int
   def_val: str
   sigs: dict[str, Signal] | None = None
+  values: dict[int, str] = field(default_factory=dict)  # raw value to name
 
 
 BO_RE = re.compile(r"^BO_ (\w+) (\w+) *: (\w+) (\w+)")
@@ -126,11 +130,13 @@ class DBC:
       elif line.startswith("SG_ "):
         m = SG_RE.search(line)
         offset = 0
+        mux_indicator = ""
         if not m:
           m = SGM_RE.search(line)
           if not m:
             continue
           offset = 1
+          mux_indicator = m.group(2)
         sig_name = m.group(1)
         start_bit = int(m.group(2 + offset))
         size = int(m.group(3 + offset))
@@ -148,6 +154,10 @@ class DBC:
           msb = start_bit
 
         sig = Signal(sig_name, start_bit, msb, lsb, size, is_signed, factor, offset_val, is_little_endian)
+        if mux_indicator == "M":
+          sig.is_multiplexor = True
+        elif mux_indicator.startswith("m") and mux_indicator[1:].isdigit():
+          sig.multiplex_value = int(mux_indicator[1:])
         set_signal_type(sig, checksum_state, self.name, line_num)
         signals_temp[address][sig_name] = sig
       elif line.startswith("VAL_ "):
@@ -160,7 +170,8 @@ class DBC:
         words = [w.strip() for w in VAL_SPLIT_RE.split(defs) if w.strip()]
         words = [w.upper().replace(" ", "_") for w in words]
         val_def = " ".join(words).strip()
-        self.vals.append(Val(sgname, val_addr, val_def))
+        values = {int(v): d for v, d in zip(words[::2], words[1::2], strict=True)}
+        self.vals.append(Val(sgname, val_addr, val_def, values=values))
     for addr, sigs in signals_temp.items():
       self.msgs[addr].sigs = sigs
 
@@ -172,7 +183,7 @@ def tesla_setup_signal(sig: Signal, dbc_name: str, line_num: int) -> None:
     sig.type = SignalType.COUNTER
   elif sig.name.endswith("Checksum"):
     sig.type = SignalType.TESLA_CHECKSUM
-    sig.calc_checksum = tesla_checksum
+    sig.calc_checksum = TESLA_CHECKSUM
 
 
 @dataclass
@@ -183,35 +194,35 @@ class ChecksumState:
   counter_start_bit: int
   little_endian: bool
   checksum_type: int
-  calc_checksum: Callable[[int, Signal, bytearray], int] | None
+  calc_checksum: Callable[[int, Signal, bytes | bytearray | memoryview], int] | None
   setup_signal: Callable[[Signal, str, int], None] | None = None
 
 
 def get_checksum_state(dbc_name: str) -> ChecksumState | None:
   if dbc_name.startswith(("honda_", "acura_")):
-    return ChecksumState(4, 2, 3, 5, False, SignalType.HONDA_CHECKSUM, honda_checksum)
+    return ChecksumState(4, 2, 3, 5, False, SignalType.HONDA_CHECKSUM, HONDA_CHECKSUM)
   elif dbc_name.startswith(("toyota_", "lexus_")):
-    return ChecksumState(8, -1, 7, -1, False, SignalType.TOYOTA_CHECKSUM, toyota_checksum)
+    return ChecksumState(8, -1, 7, -1, False, SignalType.TOYOTA_CHECKSUM, TOYOTA_CHECKSUM)
   elif dbc_name.startswith("hyundai_canfd_generated"):
-    return ChecksumState(16, -1, 0, -1, True, SignalType.HKG_CAN_FD_CHECKSUM, hkg_can_fd_checksum)
+    return ChecksumState(16, -1, 0, -1, True, SignalType.HKG_CAN_FD_CHECKSUM, HKG_CAN_FD_CHECKSUM)
   elif dbc_name.startswith(("vw_mqb", "vw_mqbevo", "vw_meb")):
-    return ChecksumState(8, 4, 0, 0, True, SignalType.VOLKSWAGEN_MQB_MEB_CHECKSUM, volkswagen_mqb_meb_checksum)
+    return ChecksumState(8, 4, 0, 0, True, SignalType.VOLKSWAGEN_MQB_MEB_CHECKSUM, VOLKSWAGEN_MQB_MEB_CHECKSUM)
   elif dbc_name.startswith("vw_mlb"):
-    return ChecksumState(8, 4, 0, 0, True, SignalType.VOLKSWAGEN_MLB_CHECKSUM, volkswagen_mlb_checksum)
+    return ChecksumState(8, 4, 0, 0, True, SignalType.VOLKSWAGEN_MLB_CHECKSUM, VOLKSWAGEN_MLB_CHECKSUM)
   elif dbc_name.startswith("vw_pq"):
-    return ChecksumState(8, 4, 0, -1, True, SignalType.XOR_CHECKSUM, xor_checksum)
+    return ChecksumState(8, 4, 0, -1, True, SignalType.XOR_CHECKSUM, XOR_CHECKSUM)
   elif dbc_name.startswith("subaru_global_"):
-    return ChecksumState(8, -1, 0, -1, True, SignalType.SUBARU_CHECKSUM, subaru_checksum)
+    return ChecksumState(8, -1, 0, -1, True, SignalType.SUBARU_CHECKSUM, SUBARU_CHECKSUM)
   elif dbc_name.startswith("chrysler_"):
-    return ChecksumState(8, 4, 7, -1, False, SignalType.CHRYSLER_CHECKSUM, chrysler_checksum)
+    return ChecksumState(8, 4, 7, -1, False, SignalType.CHRYSLER_CHECKSUM, CHRYSLER_CHECKSUM)
   elif dbc_name.startswith("fca_giorgio"):
-    return ChecksumState(8, -1, 7, -1, False, SignalType.FCA_GIORGIO_CHECKSUM, fca_giorgio_checksum)
+    return ChecksumState(8, -1, 7, -1, False, SignalType.FCA_GIORGIO_CHECKSUM, FCA_GIORGIO_CHECKSUM)
   elif dbc_name.startswith("comma_body"):
-    return ChecksumState(8, 4, 7, 3, False, SignalType.BODY_CHECKSUM, body_checksum)
+    return ChecksumState(8, 4, 7, 3, False, SignalType.BODY_CHECKSUM, BODY_CHECKSUM)
   elif dbc_name.startswith("tesla_model3_party"):
-    return ChecksumState(8, -1, 0, -1, True, SignalType.TESLA_CHECKSUM, tesla_checksum, tesla_setup_signal)
+    return ChecksumState(8, -1, 0, -1, True, SignalType.TESLA_CHECKSUM, TESLA_CHECKSUM, tesla_setup_signal)
   elif dbc_name.startswith("psa_"):
-    return ChecksumState(4, 4, 7, 3, False, SignalType.PSA_CHECKSUM, psa_checksum)
+    return ChecksumState(4, 4, 7, 3, False, SignalType.PSA_CHECKSUM, PSA_CHECKSUM)
   return None
 
 
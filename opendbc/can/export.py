@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Decode the CAN frames of rlogs/qlogs into a columnar layout, one directory per segment:
+
+  <output>/<segment>/<message>/t.npy                 logMonoTime of each frame
+  <output>/<segment>/<message>/checksum_ok.npy       whether each frame passed its checksum, for messages with one
+  <output>/<segment>/<message>/signals/<signal>.npy  one value per frame
+
+Signals get their own directory, so a signal named like one of the per-frame columns can't overwrite it.
+
+Arrays are plain .npy files, open them with np.load(path, mmap_mode='r').
+"""
+import argparse
+import os
+from functools import partial
+
+import numpy as np
+from tqdm.contrib.concurrent import process_map
+
+from opendbc.can.parser import CANParser
+from opendbc.car.can_definitions import CAN_FRAME_DTYPE, CanFrameBatch
+from opendbc.car.logreader import LogReader
+
+
+def segment_name(fn: str) -> str:
+  """Name of a segment's output directory: the segment directory for rlog/qlog files, the file name otherwise"""
+  base = os.path.basename(fn).split(".")[0]
+  if base in ("rlog", "qlog"):
+    return os.path.basename(os.path.dirname(os.path.abspath(fn)))
+  return base
+
+
+def load_frames(fn: str) -> CanFrameBatch:
+  """Every CAN frame in a log, payloads past 64 bytes are truncated"""
+  events = [msg for msg in LogReader(fn, only_union_types=True, sort_by_time=True) if msg.which() == 'can']
+  frames = np.zeros(sum(len(msg.can) for msg in events), dtype=CAN_FRAME_DTYPE)
+  nanos, addresses, buses, lengths, payloads = (frames[k] for k in ("nanos", "address", "src", "length", "dat"))
+  i = 0
+  for msg in events:
+    for can in msg.can:
+      dat = can.dat[:64]
+      nanos[i] = msg.logMonoTime
+      addresses[i] = can.address
+      buses[i] = can.src
+      lengths[i] = len(dat)
+      payloads[i, :len(dat)] = np.frombuffer(dat, dtype=np.uint8)
+      i += 1
+  return CanFrameBatch(frames)
+
+
+def export_segment(fn: str, dbc_name: str, bus: int, output: str) -> str:
+  """Decodes every message of the DBC found on the bus, returns the segment's output directory"""
+  parser = CANParser(dbc_name, [], bus)
+  for address in parser.dbc.msgs:
+    parser.vl[address]  # adds the message
+
+  out_dir = os.path.join(output, segment_name(fn))
+  frames = load_frames(fn).frames
+  for name, cols in parser.decode_batch(frames["nanos"], frames["address"], frames["src"], frames["dat"], frames["length"]).items():
+    if not isinstance(name, str) or len(cols.timestamps) == 0:
+      continue
+    msg_dir = os.path.join(out_dir, name)
+    os.makedirs(os.path.join(msg_dir, "signals"), exist_ok=True)
+    np.save(os.path.join(msg_dir, "t.npy"), cols.timestamps)
+    if cols.checksum_ok is not None:
+      np.save(os.path.join(msg_dir, "checksum_ok.npy"), cols.checksum_ok)
+    for sig_name, vals in cols.vals.items():
+      np.save(os.path.join(msg_dir, "signals", f"{sig_name}.npy"), vals)
+  return out_dir
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Export the CAN signals of rlogs/qlogs to .npy columns",
+                                   formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+  parser.add_argument("dbc", help="DBC name or path")
+  parser.add_argument("logs", nargs="+", help="rlog/qlog files, one per segment")
+  parser.add_argument("--bus", type=int, default=0)
+  parser.add_argument("--output", default="can_export")
+  parser.add_argument("-j", "--workers", type=int, default=os.cpu_count())
+  args = parser.parse_args()
+
+  process_map(partial(export_segment, dbc_name=args.dbc, bus=args.bus, output=args.output), args.logs,
+              max_workers=args.workers, chunksize=1, desc="Exporting segments")
+
+
+if __name__ == "__main__":
+  main()
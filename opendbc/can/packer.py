@@ -1,58 +1,236 @@
 import math
+from collections import OrderedDict
+from dataclasses import dataclass
 
+import numpy as np
+
+from opendbc.car.can_definitions import CanData
 from opendbc.car.carlog import carlog
-from opendbc.can.dbc import DBC, Signal, SignalType
+from opendbc.can.dbc import DBC, Msg, Signal, SignalType
+from opendbc.car.crc import Checksum
+
+
+def compile_encoder_fields(sigs: list[Signal], size: int) -> dict[str, tuple[bool, int, int, int, int, float, float, bool]]:
+  """
+  Precompute how set_value writes each signal, as bits of one integer per byte order: the little endian signals
+  in the little endian payload, the big endian signals in the big endian payload. Per signal name this gives
+  (big endian, shift, mask, keep mask, keep mask in the other byte order, factor, offset, is counter). The keep
+  masks clear a signal's bits before it is written, so later signals overwrite earlier ones like set_value does.
+  """
+  full = (1 << (size * 8)) - 1
+  fields = {}
+  for sig in sigs:
+    mask = (1 << sig.size) - 1
+    if sig.is_little_endian:
+      shift = sig.lsb
+    else:
+      shift = (size - 1 - sig.lsb // 8) * 8 + sig.lsb % 8
+      if sig.lsb // 8 >= size:
+        # set_value starts from the lsb byte, so nothing is written
+        shift, mask = 0, 0
+    bits = (mask << shift) & full
+    other_bits = int.from_bytes(bits.to_bytes(size, "little"), "big")
+    is_counter = sig.type == SignalType.COUNTER or sig.name == "COUNTER"
+    fields[sig.name] = (not sig.is_little_endian, shift, mask, ~bits, ~other_bits, sig.factor, sig.offset, is_counter)
+  return fields
+
+
+@dataclass(slots=True)
+class MessageEncoder:
+  address: int
+  name: str
+  size: int
+  fields: dict[str, tuple[bool, int, int, int, int, float, float, bool]]
+  counter: str | None  # signal filled from CANPacker.counters when not given
+  counter_size: int
+  checksum: Signal | None
+  payload_mask: int  # bits past the end of the message are dropped, like set_value
+
+  @classmethod
+  def from_msg(cls, msg: Msg) -> 'MessageEncoder':
+    sigs = list(msg.sigs.values())
+    counter = next((s for s in sigs if s.type == SignalType.COUNTER or s.name == "COUNTER"), None)
+    checksum = next((s for s in sigs if s.type > SignalType.COUNTER), None)
+    return cls(msg.address, msg.name, msg.size, compile_encoder_fields(sigs, msg.size), counter.name if counter else None,
+               counter.size if counter else 0, checksum if checksum and checksum.calc_checksum else None, (1 << (msg.size * 8)) - 1)
 
 
 class CANPacker:
-  def __init__(self, dbc_name: str):
+  def __init__(self, dbc_name: str, cache_size: int = 0):
     self.dbc = DBC(dbc_name)
     self.counters: dict[int, int] = {}
+    self.encoders: dict[int | str, MessageEncoder] = {}  # compiled on first use, by address and name
+
+    # opt-in LRU cache of encoded payloads without the rolling counter and checksum, keyed on the address and values
+    self.cache_size = cache_size
+    self.cache: OrderedDict[tuple[int, tuple[tuple[str, float], ...]], tuple[int, int, int | None]] = OrderedDict()
+    self.cache_hits = 0
+    self.cache_misses = 0
+
+  @property
+  def cache_hit_rate(self) -> float:
+    lookups = self.cache_hits + self.cache_misses
+    return self.cache_hits / lookups if lookups else 0.0
+
+  def _encode(self, enc: MessageEncoder, values: dict[str, float]) -> tuple[tuple[int, int, int | None], bool]:
+    """The values as (little endian payload, big endian payload, counter value if given), and whether all signals are known"""
+    le = be = 0
+    counter = None
+    valid = True
+    fields = enc.fields
+    for name, value in values.items():
+      field = fields.get(name)
+      if field is None:
+        carlog.error(f"unknown signal {name=} in {enc.name}")
+        valid = False
+        continue
+      big_endian, shift, mask, keep, other_keep, factor, offset, is_counter = field
+      ival = (int(math.floor((value - offset) / factor + 0.5)) & mask) << shift
+      if big_endian:
+        be = (be & keep) | ival
+        le &= other_keep
+      else:
+        le = (le & keep) | ival
+        be &= other_keep
+      if is_counter:
+        counter = int(value)
+    return (le, be, counter), valid
+
+  def _encoder(self, name_or_addr: str | int) -> MessageEncoder | None:
+    enc = self.encoders.get(name_or_addr)
+    if enc is None:
+      msg = self.dbc.addr_to_msg.get(name_or_addr) if isinstance(name_or_addr, (int, np.integer)) else self.dbc.name_to_msg.get(name_or_addr)
+      if msg is None:
+        return None
+      enc = self.encoders[msg.address] = self.encoders[msg.name] = MessageEncoder.from_msg(msg)
+    return enc
+
+  def _payload(self, enc: MessageEncoder, values: dict[str, float]) -> bytes:
+    """The encoded payload with the rolling counter, before the checksum"""
+    if self.cache_size:
+      key = (enc.address, tuple(values.items()))
+      body = self.cache.get(key)
+      if body is not None:
+        self.cache.move_to_end(key)
+        self.cache_hits += 1
+      else:
+        self.cache_misses += 1
+        body, valid = self._encode(enc, values)
+        if valid:
+          self.cache[key] = body
+          if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+    else:
+      body, _ = self._encode(enc, values)
+
+    le, be, counter = body
+    if counter is not None:
+      self.counters[enc.address] = counter
+    elif enc.counter is not None:
+      counter = self.counters.get(enc.address, 0)
+      big_endian, shift, mask, keep, other_keep = enc.fields[enc.counter][:5]
+      if big_endian:
+        be = (be & keep) | ((counter & mask) << shift)
+        le &= other_keep
+      else:
+        le = (le & keep) | ((counter & mask) << shift)
+        be &= other_keep
+      self.counters[enc.address] = (counter + 1) % (1 << enc.counter_size)
+
+    full = enc.payload_mask
+    if be == 0:
+      return (le & full).to_bytes(enc.size, "little")
+    elif le == 0:
+      return (be & full).to_bytes(enc.size, "big")
+    return ((le & full) | int.from_bytes((be & full).to_bytes(enc.size, "big"), "little")).to_bytes(enc.size, "little")
+
+  def _pack_bytes(self, enc: MessageEncoder, values: dict[str, float]) -> bytes:
+    dat = self._payload(enc, values)
+    sig = enc.checksum
+    if sig is None:
+      return dat
+    checksum = sig.calc_checksum(enc.address, sig, dat)
+    big_endian, shift, mask, keep = enc.fields[sig.name][:4]
+    order = "big" if big_endian else "little"
+    return ((int.from_bytes(dat, order) & keep) | (((checksum & mask) << shift) & enc.payload_mask)).to_bytes(enc.size, order)
 
   def pack(self, address: int, values: dict[str, float]) -> bytearray:
-    msg = self.dbc.addr_to_msg.get(address)
-    if msg is None:
+    enc = self._encoder(address)
+    if enc is None:
       carlog.error(f"msg not found for {address=}")
       return bytearray()
-    dat = bytearray(msg.size)
+    return bytearray(self._pack_bytes(enc, values))
+
+  def message(self, name_or_addr: str | int) -> MessageEncoder:
+    """Handle to pack a message with pack_many() without the name lookup. Raises KeyError for unknown messages."""
+    enc = self._encoder(name_or_addr)
+    if enc is None:
+      raise KeyError(name_or_addr)
+    return enc
+
+  def pack_many(self, msgs: list[tuple[str | int | MessageEncoder, int, dict[str, float]]]) -> list[CanData]:
+    """
+    Pack (message, bus, values) entries, where the message is a name, an address or a handle from message(), into the
+    CanData list to send. Payloads are identical to make_can_msg(), unknown messages are logged and left out.
+    """
+    ret = []
+    encoders, pack_bytes = self.encoders, self._pack_bytes
+    for msg, bus, values in msgs:
+      enc = msg if type(msg) is MessageEncoder else (encoders.get(msg) or self._encoder(msg))
+      if enc is None:
+        carlog.error(f"msg not found for name_or_addr={msg!r}")
+        continue
+      ret.append(CanData(enc.address, pack_bytes(enc, values), bus))
+    return ret
+
+  def pack_batch(self, name_or_addr, values: dict[str, np.ndarray | float], n: int | None = None) -> np.ndarray:
+    """
+    Pack n frames of one message at once, from an array of values per signal. Scalars are broadcast to every row.
+    Returns an (n, size) uint8 payload matrix, with rows identical to n calls to pack() with the same values:
+    the rolling counter increments per row and the checksum is computed per row, vectorized where the algorithm allows.
+    """
+    msg = self.dbc.addr_to_msg.get(name_or_addr) if isinstance(name_or_addr, (int, np.integer)) else self.dbc.name_to_msg.get(name_or_addr)
+    if msg is None:
+      carlog.error(f"msg not found for {name_or_addr=}")
+      return np.zeros((0, 0), dtype=np.uint8)
+    if n is None:
+      n = max((len(v) for v in values.values() if np.ndim(v) > 0), default=1)
+
+    payloads = np.zeros((n, msg.size), dtype=np.uint8)
     counter_set = False
     for name, value in values.items():
       sig = msg.sigs.get(name)
       if sig is None:
         carlog.error(f"unknown signal {name=} in {msg.name}")
         continue
-      ival = int(math.floor((value - sig.offset) / sig.factor + 0.5))
-      if ival < 0:
-        ival = (1 << sig.size) + ival
-      set_value(dat, sig, ival)
-      if sig.type == SignalType.COUNTER or sig.name == "COUNTER":
-        self.counters[address] = int(value)
+      value = np.broadcast_to(np.asarray(value, dtype=np.float64), (n,))
+      set_values(payloads, sig, np.floor((value - sig.offset) / sig.factor + 0.5).astype(np.int64))
+      if (sig.type == SignalType.COUNTER or sig.name == "COUNTER") and n > 0:
+        self.counters[msg.address] = int(value[-1])
         counter_set = True
-    sig_counter = next((s for s in msg.sigs.values() if s.type == SignalType.COUNTER or s.name == "COUNTER"), None)
+
+    sigs = list(msg.sigs.values())
+    sig_counter = next((s for s in sigs if s.type == SignalType.COUNTER or s.name == "COUNTER"), None)
     if sig_counter and not counter_set:
-      if address not in self.counters:
-        self.counters[address] = 0
-      set_value(dat, sig_counter, self.counters[address])
-      self.counters[address] = (self.counters[address] + 1) % (1 << sig_counter.size)
-    sig_checksum = next((s for s in msg.sigs.values() if s.type > SignalType.COUNTER), None)
+      counters = self.counters.get(msg.address, 0) + np.arange(n, dtype=np.int64)
+      set_values(payloads, sig_counter, counters % (1 << sig_counter.size))
+      self.counters[msg.address] = (self.counters.get(msg.address, 0) + n) % (1 << sig_counter.size)
+
+    sig_checksum = next((s for s in sigs if s.type > SignalType.COUNTER), None)
     if sig_checksum and sig_checksum.calc_checksum:
-      checksum = sig_checksum.calc_checksum(address, sig_checksum, dat)
-      set_value(dat, sig_checksum, checksum)
-    return dat
+      if isinstance(sig_checksum.calc_checksum, Checksum):
+        checksums = sig_checksum.calc_checksum.batch(msg.address, sig_checksum, payloads)
+      else:
+        checksums = np.array([sig_checksum.calc_checksum(msg.address, sig_checksum, bytearray(row.tobytes())) for row in payloads], dtype=np.int64)
+      set_values(payloads, sig_checksum, checksums)
+    return payloads
 
   def make_can_msg(self, name_or_addr, bus: int, values: dict[str, float]):
-    if isinstance(name_or_addr, int):
-      addr = name_or_addr
-    else:
-      msg = self.dbc.name_to_msg.get(name_or_addr)
-      if msg is None:
-        carlog.error(f"msg not found for {name_or_addr=}")
-        return 0, b'', bus
-      addr = msg.address
-    dat = self.pack(addr, values)
-    if len(dat) == 0:
+    enc = self._encoder(name_or_addr)
+    if enc is None:
+      carlog.error(f"msg not found for {name_or_addr=}")
       return 0, b'', bus
-    return addr, bytes(dat), bus
+    return enc.address, self._pack_bytes(enc, values), bus
 
 
 def set_value(msg: bytearray, sig: Signal, ival: int) -> None:
@@ -69,3 +247,19 @@ def set_value(msg: bytearray, sig: Signal, ival: int) -> None:
     bits -= size
     ival >>= size
     i = i + 1 if sig.is_little_endian else i - 1
+
+
+def set_values(payloads: np.ndarray, sig: Signal, ivals: np.ndarray) -> None:
+  """Vectorized set_value over every row of a uint8 payload matrix"""
+  ivals = ivals.astype(np.int64).view(np.uint64)
+  i = sig.lsb // 8
+  bits = sig.size
+  while 0 <= i < payloads.shape[1] and bits > 0:
+    shift = sig.lsb % 8 if (sig.lsb // 8) == i else 0
+    size = min(bits, 8 - shift)
+    mask = ((1 << size) - 1) << shift
+    payloads[:, i] &= np.uint8(~mask & 0xFF)
+    payloads[:, i] |= ((ivals & np.uint64((1 << size) - 1)) << np.uint64(shift)).astype(np.uint8)
+    bits -= size
+    ivals = ivals >> np.uint64(size)
+    i = i + 1 if sig.is_little_endian else i - 1
@@ -1,14 +1,27 @@
+import copy
+import heapq
 import math
 import numbers
-from collections import defaultdict, deque
-from dataclasses import dataclass, field
+import time
+import numpy as np
+from collections import defaultdict
+from collections.abc import Callable, Mapping
+from dataclasses import InitVar, dataclass, field
+from functools import cache
+from typing import Any
 
+from opendbc.car.can_definitions import CanFrameBatch
 from opendbc.car.carlog import carlog
-from opendbc.can.dbc import DBC, Signal
+from opendbc.can.dbc import DBC, Signal, SignalType
+from opendbc.car.crc import Checksum
 
 
 MAX_BAD_COUNTER = 5
 CAN_INVALID_CNT = 5
+LAZY_WARMUP_UPDATES = 100
+DENSE_TABLE_SIZE = 256  # value tables with names for raw values below this are also kept as a list
+DEFAULT_HISTORY_DEPTH = 16
+FREQUENCY_WINDOW = 500  # max timestamps used to learn a message's frequency
 
 
 def get_raw_value(dat: bytes | bytearray, sig: Signal) -> int:
@@ -26,7 +39,143 @@ def get_raw_value(dat: bytes | bytearray, sig: Signal) -> int:
   return ret
 
 
-@dataclass
+def get_raw_values(payloads: np.ndarray, sig: Signal) -> np.ndarray:
+  """Vectorized get_raw_value over every row of a uint8 payload matrix, returns sign extended values"""
+  ret = np.zeros(len(payloads), dtype=np.uint64)
+  i = sig.msb // 8
+  bits = sig.size
+  while 0 <= i < payloads.shape[1] and bits > 0:
+    lsb = sig.lsb if (sig.lsb // 8) == i else i * 8
+    msb = sig.msb if (sig.msb // 8) == i else (i + 1) * 8 - 1
+    size = msb - lsb + 1
+    d = (payloads[:, i].astype(np.uint64) >> np.uint64(lsb - (i * 8))) & np.uint64((1 << size) - 1)
+    ret |= d << np.uint64(bits - size)
+    bits -= size
+    i = i - 1 if sig.is_little_endian else i + 1
+
+  if not sig.is_signed:
+    return ret
+  if sig.size == 64:
+    return ret.view(np.int64)
+  return ret.astype(np.int64) - ((ret >> np.uint64(sig.size - 1)) & np.uint64(1)).astype(np.int64) * (1 << sig.size)
+
+
+def compile_decoders(signals: list[Signal], size: int) -> tuple[int, list[tuple[int, int, int]]]:
+  """
+  Precompute a (shift, mask, sign bit) triple per signal, which extracts the signal from a single integer built
+  out of a size byte payload: the little endian payload in the low bits, and the big endian payload above it.
+  The big endian payload is zero padded to cover signals that extend past the message size, like get_raw_value.
+  """
+  width = max([size] + [max(sig.msb, sig.lsb) // 8 + 1 for sig in signals])
+
+  decoders = []
+  for sig in signals:
+    mask = (1 << sig.size) - 1
+    if sig.is_little_endian:
+      shift = sig.lsb
+      if sig.msb // 8 >= size:
+        # get_raw_value starts from the msb byte, so nothing is read
+        mask = 0
+    else:
+      shift = size * 8 + (width - 1 - sig.lsb // 8) * 8 + sig.lsb % 8
+    sign_bit = (1 << (sig.size - 1)) if sig.is_signed else 0
+    decoders.append((shift, mask, sign_bit))
+  return width * 8, decoders
+
+
+def can_frame_bits(address: int, length: int) -> int:
+  """Bits on the wire for a data frame, without bit stuffing. CAN FD frames are counted as if sent at a single bitrate."""
+  return (67 if address > 0x7FF else 47) + length * 8
+
+
+@dataclass(slots=True)
+class MessageStats:
+  frame_cnt: int = 0  # frames received, including the ones dropped on a bad checksum or counter
+  checksum_fail_cnt: int = 0
+  counter_fail_cnt: int = 0
+  max_gap_nanos: int = 0  # worst time between two received frames
+  decode_nanos: int = 0
+  last_frame_nanos: int = 0
+  unchanged_cnt: int = 0  # frames accepted without decoding, as they repeat the last accepted payload
+
+
+@dataclass(slots=True)
+class HistoryBuffer:
+  """
+  Recent values and timestamps of a message, written sequentially and compacted once full, so the last depth rows are always
+  contiguous. The buffers grow when an update brings more than depth samples, every sample of the current update is kept.
+  """
+  width: int  # signals per row
+  depth: int = DEFAULT_HISTORY_DEPTH
+  keep_dats: bool = False  # lazy only: keep the payloads of the current update, to decode signals activated mid-update
+  values: np.ndarray = field(init=False)
+  timestamps: np.ndarray = field(init=False)
+  head: int = 0  # next row
+  update_start: int = 0  # first row of the current update
+  dats: list[bytes] = field(default_factory=list)  # payloads accepted in the current update, with keep_dats
+  last_dat: bytes | None = None  # last accepted payload
+
+  def __post_init__(self) -> None:
+    self.values = np.zeros((2 * self.depth, self.width))
+    self.timestamps = np.zeros(2 * self.depth, dtype=np.int64)
+
+  def append(self, vals: np.ndarray, nanos: int, dat: bytes) -> None:
+    if self.head == len(self.values):
+      self.compact()
+    self.values[self.head] = vals
+    self.timestamps[self.head] = nanos
+    self.head += 1
+    if self.keep_dats:
+      self.dats.append(dat)
+    self.last_dat = dat
+
+  def compact(self) -> None:
+    """Move the last depth rows and the current update's rows to the front, growing the buffers if they fill half of them"""
+    keep = max(self.depth, self.head - self.update_start)
+    start = self.head - keep
+    if 2 * keep > len(self.values):
+      values = np.zeros((2 * keep, self.width))
+      timestamps = np.zeros(2 * keep, dtype=np.int64)
+      values[:keep] = self.values[start:self.head]
+      timestamps[:keep] = self.timestamps[start:self.head]
+      self.values, self.timestamps = values, timestamps
+    else:
+      self.values[:keep] = self.values[start:self.head]
+      self.timestamps[:keep] = self.timestamps[start:self.head]
+    self.update_start -= start
+    self.head = keep
+
+  def rows(self, n: int | None = None) -> slice:
+    """Rows of the samples received in the current update, or of the last n samples up to the depth"""
+    if n is None:
+      return slice(self.update_start, self.head)
+    return slice(max(self.head - n, self.head - self.depth, 0), self.head)
+
+  def start_update(self) -> None:
+    self.update_start = self.head
+    self.dats.clear()
+
+  def restore(self, values: np.ndarray, timestamps: np.ndarray, last_dat: bytes | None) -> None:
+    """Replace the history with the last depth samples of values and timestamps"""
+    n = min(len(timestamps), self.depth)
+    self.values[:n] = values[len(values) - n:]
+    self.timestamps[:n] = timestamps[len(timestamps) - n:]
+    self.head = self.update_start = n
+    self.dats.clear()
+    self.last_dat = last_dat
+
+
+@dataclass(slots=True)
+class MuxBranches:
+  """The branches of a multiplexed message, keyed by multiplexor value"""
+  idx: int  # multiplexor signal
+  # active signals, decoders, watch positions and check positions of each branch seen so far
+  branches: dict[int, tuple[list[int], list[tuple[int, int, int]], list[tuple[int, int]], tuple[int | None, int | None]]] = \
+    field(default_factory=dict)
+  nanos: dict[int, int] = field(default_factory=dict)  # last accepted frame of each branch
+
+
+@dataclass(slots=True)
 class MessageState:
   address: int
   name: str
@@ -35,85 +184,438 @@ class MessageState:
   ignore_alive: bool = False
   ignore_checksum: bool = False
   ignore_counter: bool = False
+  lazy: bool = False
   frequency: float = 0.0
   timeout_threshold: float = 1e5  # default to 1Hz threshold
-  vals: list[float] = field(default_factory=list)
-  all_vals: list[list[float]] = field(default_factory=list)
-  timestamps: deque[int] = field(default_factory=lambda: deque(maxlen=500))
+  depth: InitVar[int] = DEFAULT_HISTORY_DEPTH
+  vals: np.ndarray = field(init=False)  # view into the parser's value store, see CANParser.values
+  # running frequency estimate, the first timestamp stays put as long as timestamps are monotonic
+  first_nanos: int = 0
+  last_nanos: int = 0
+  timestamps_cnt: int = 0
   counter: int = 0
   counter_fail: int = 0
   first_seen_nanos: int = 0
   last_warning_log_nanos: int = 0
+  be_shift: int = field(init=False)
+  decoders: list[tuple[int, int, int]] = field(init=False)
+  signal_idxs: dict[str, int] = field(init=False)
+  active: list[int] = field(init=False)  # signals decoded on every frame
+  active_decoders: list[tuple[int, int, int]] = field(init=False)
+  published: set[int] = field(init=False)  # signals readable through vl, vl_all and ts_nanos
+  mux: MuxBranches | None = field(init=False)  # multiplexed messages only
+  history: HistoryBuffer = field(init=False)
+  has_counter: bool = field(init=False)  # frames repeating the last payload are only decoded again if a counter has to be checked
+  counter_invalid: set[int] = field(default_factory=set)  # addresses with too many bad counters, shared by the parser
+  on_timeout_change: 'Callable[[MessageState], None] | None' = None
+  collect_stats: bool = False
+  stats: MessageStats = field(default_factory=MessageStats)
+  # subscribed signals, changes are detected on the raw values
+  watched: list[int] = field(default_factory=list)
+  watch_pos: list[tuple[int, int]] = field(default_factory=list)  # (watched index, position in active) pairs
+  check_pos: tuple[int | None, int | None] = (None, None)  # positions of the checksum and counter signals in active
+  watched_raw: list[int | None] = field(default_factory=list)
+  changed: set[int] = field(default_factory=set)  # watched signals that changed in the current update
+
+  def __post_init__(self, depth: int) -> None:
+    self.be_shift, self.decoders = compile_decoders(self.signals, self.size)
+    self.signal_idxs = {sig.name: i for i, sig in enumerate(self.signals)}
+    mux_idx = next((i for i, sig in enumerate(self.signals) if sig.is_multiplexor), None)
+    self.mux = None if mux_idx is None else MuxBranches(mux_idx)
+    self.has_counter = any(sig.type == SignalType.COUNTER for sig in self.signals)
+    self.set_active(list(range(len(self.signals))))
+    self.published = set() if self.lazy else set(range(len(self.signals)))
+    self.vals = np.zeros(len(self.signals))
+    self.history = HistoryBuffer(len(self.signals), depth, self.lazy)
+
+  @property
+  def validation_idxs(self) -> list[int]:
+    return [i for i, sig in enumerate(self.signals) if sig.type == SignalType.COUNTER or sig.calc_checksum is not None]
+
+  def set_active(self, idxs: list[int]) -> None:
+    self.active = idxs
+    self.active_decoders = [self.decoders[i] for i in idxs]
+    self.watch_pos = [(j, idxs.index(i)) for j, i in enumerate(self.watched)]
+    self.check_pos = self.checks_in(idxs)
+    if self.mux is not None:
+      self.mux.branches.clear()
+
+  def checks_in(self, idxs: list[int]) -> tuple[int | None, int | None]:
+    """Positions of the checksum and counter signals in idxs"""
+    checksum = next((j for j, i in enumerate(idxs) if self.signals[i].calc_checksum is not None), None)
+    counter = next((j for j, i in enumerate(idxs) if self.signals[i].type == SignalType.COUNTER), None)
+    return checksum, counter
+
+  def in_branch(self, idx: int, mux: int) -> bool:
+    value = self.signals[idx].multiplex_value
+    return value is None or value == mux
+
+  def branch(self, mux: int) -> tuple[list[int], list[tuple[int, int, int]], list[tuple[int, int]], tuple[int | None, int | None]]:
+    """Active signals, decoders, watch positions and check positions for frames with the multiplexor set to mux"""
+    branch = self.mux.branches.get(mux)
+    if branch is None:
+      idxs = [i for i in self.active if self.in_branch(i, mux)]
+      watch_pos = [(j, idxs.index(i)) for j, i in enumerate(self.watched) if i in idxs]
+      branch = self.mux.branches[mux] = (idxs, [self.decoders[i] for i in idxs], watch_pos, self.checks_in(idxs))
+    return branch
+
+  def mux_of(self, dat: bytes | bytearray) -> int | None:
+    return None if self.mux is None else self.decode(dat, [self.mux.idx])[0]
+
+  def signal_nanos(self, idx: int) -> int:
+    """Timestamp of the last accepted frame that carried a signal"""
+    value = self.signals[idx].multiplex_value
+    if self.mux is None or value is None:
+      return self.last_nanos
+    return self.mux.nanos.get(value, 0)
+
+  def activate(self, idx: int) -> None:
+    """Start decoding a signal on every frame, catching up on its value and history from the stored payloads"""
+    if idx in self.active:
+      return
+    sig = self.signals[idx]
+    history = self.history
+    if history.last_dat is not None and self.in_branch(idx, self.mux_of(history.last_dat)):
+      self.vals[idx] = self.decode(history.last_dat, [idx])[0] * sig.factor + sig.offset
+    rows = history.rows()
+    if rows.stop > rows.start:
+      for row, dat in zip(range(rows.start, rows.stop), history.dats[rows.start - rows.stop:], strict=True):
+        if self.in_branch(idx, self.mux_of(dat)):
+          history.values[row, idx] = self.decode(dat, [idx])[0] * sig.factor + sig.offset
+    self.set_active(sorted(self.active + [idx]))
+
+  def watch(self, idx: int) -> None:
+    """Track changes of a signal, the first frame after this always counts as a change"""
+    if idx in self.watched:
+      return
+    self.activate(idx)
+    self.watched.append(idx)
+    self.watched_raw.append(None)
+    self.set_active(self.active)
 
   def rate_limited_log(self, last_update_nanos: int, msg: str) -> None:
     if (last_update_nanos - self.last_warning_log_nanos) >= 1_000_000_000:
       carlog.warning(f"CANParser: {hex(self.address)} {self.name} {msg}")
       self.last_warning_log_nanos = last_update_nanos
 
+  def decode(self, dat: bytes | bytearray, idxs: list[int] | None = None, decoders: list[tuple[int, int, int]] | None = None) -> list[int]:
+    """Sign extended raw values of the active signals, or of the signals at idxs"""
+    if idxs is None:
+      idxs, decoders = self.active, self.active_decoders
+    elif decoders is None:
+      decoders = [self.decoders[i] for i in idxs]
+
+    if len(dat) != self.size:
+      ret = []
+      for i in idxs:
+        sig = self.signals[i]
+        tmp = get_raw_value(dat, sig)
+        if sig.is_signed:
+          tmp -= ((tmp >> (sig.size - 1)) & 0x1) * (1 << sig.size)
+        ret.append(tmp)
+      return ret
+
+    v = int.from_bytes(dat, "little") | (int.from_bytes(dat, "big") << self.be_shift)
+    return [(tmp := (v >> shift) & mask) - ((tmp & sign_bit) << 1) for shift, mask, sign_bit in decoders]
+
   def parse(self, nanos: int, dat: bytes) -> bool:
-    tmp_vals: list[float] = [0.0] * len(self.signals)
     checksum_failed = False
     counter_failed = False
 
     if self.first_seen_nanos == 0:
       self.first_seen_nanos = nanos
 
-    for i, sig in enumerate(self.signals):
-      tmp = get_raw_value(dat, sig)
-      if sig.is_signed:
-        tmp -= ((tmp >> (sig.size - 1)) & 0x1) * (1 << sig.size)
+    if self.collect_stats:
+      stats = self.stats
+      if stats.frame_cnt > 0:
+        stats.max_gap_nanos = max(stats.max_gap_nanos, nanos - stats.last_frame_nanos)
+      stats.frame_cnt += 1
+      stats.last_frame_nanos = nanos
+
+    # the same bytes as the last accepted frame decode to the same values and pass the checksum again,
+    # unless a subscription is waiting for its first frame
+    if not self.has_counter and dat == self.history.last_dat and None not in self.watched_raw:
+      if self.collect_stats:
+        self.stats.unchanged_cnt += 1
+      self.accept(nanos, dat, self.mux_of(dat))
+      return True
+
+    idxs, decoders, watch_pos, (checksum_pos, counter_pos) = self.active, self.active_decoders, self.watch_pos, self.check_pos
+    mux = None
+    if self.mux is not None:
+      # only the branch selected by the multiplexor is decoded, the others keep their last values
+      mux = self.mux_of(dat)
+      idxs, decoders, watch_pos, (checksum_pos, counter_pos) = self.branch(mux)
 
-      if not self.ignore_checksum and sig.calc_checksum is not None:
-        expected_checksum = sig.calc_checksum(self.address, sig, bytearray(dat))
-        if tmp != expected_checksum:
-          checksum_failed = True
-          self.rate_limited_log(nanos, f"checksum failed: received {hex(tmp)}, calculated {hex(expected_checksum)}")
+    if self.collect_stats:
+      start = time.perf_counter_ns()
+      raw = self.decode(dat, idxs, decoders)
+      stats.decode_nanos += time.perf_counter_ns() - start
+    else:
+      raw = self.decode(dat, idxs, decoders)
 
-      if not self.ignore_counter and sig.type == 1:  # COUNTER
-        if not self.update_counter(tmp, sig.size):
-          counter_failed = True
+    # checksums only read the payload, so they get the received bytes without a copy
+    if checksum_pos is not None and not self.ignore_checksum:
+      sig = self.signals[idxs[checksum_pos]]
+      expected_checksum = sig.calc_checksum(self.address, sig, dat)
+      if raw[checksum_pos] != expected_checksum:
+        checksum_failed = True
+        if self.collect_stats:
+          self.stats.checksum_fail_cnt += 1
+        self.rate_limited_log(nanos, f"checksum failed: received {hex(raw[checksum_pos])}, calculated {hex(expected_checksum)}")
 
-      tmp_vals[i] = tmp * sig.factor + sig.offset
+    if counter_pos is not None and not self.ignore_counter:
+      counter_failed = not self.update_counter(raw[counter_pos], self.signals[idxs[counter_pos]].size)
 
     # must have good counter and checksum to update data
     if checksum_failed or counter_failed:
       return False
 
-    if not self.vals:
-      self.vals = [0.0] * len(self.signals)
-      self.all_vals = [[] for _ in self.signals]
+    signals = self.signals
+    tmp_vals = [tmp * signals[i].factor + signals[i].offset for i, tmp in zip(idxs, raw, strict=True)]
 
-    for i, v in enumerate(tmp_vals):
-      self.vals[i] = v
-      self.all_vals[i].append(v)
+    vals = self.vals
+    if len(idxs) == len(vals):
+      vals[:] = tmp_vals
+    else:
+      for i, v in zip(idxs, tmp_vals, strict=True):
+        vals[i] = v
 
-    self.timestamps.append(nanos)
+    if watch_pos:
+      for j, pos in watch_pos:
+        if raw[pos] != self.watched_raw[j]:
+          self.watched_raw[j] = raw[pos]
+          self.changed.add(self.watched[j])
 
-    if self.frequency < 1e-5 and len(self.timestamps) >= 3:
-      dt = (self.timestamps[-1] - self.timestamps[0]) * 1e-9
-      if (dt > 1.0 or (self.timestamps.maxlen is not None and len(self.timestamps) >= self.timestamps.maxlen)) and dt != 0:
-        self.frequency = min(len(self.timestamps) / dt, 100.0)
-        self.timeout_threshold = (1_000_000_000 / self.frequency) * 10
+    self.accept(nanos, dat, mux)
     return True
 
+  def accept(self, nanos: int, dat: bytes, mux: int | None) -> None:
+    """Bookkeeping of an accepted frame, once its values are in vals"""
+    self.history.append(self.vals, nanos, dat)
+    if mux is not None:
+      self.mux.nanos[mux] = nanos
+
+    if self.timestamps_cnt == 0:
+      self.first_nanos = nanos
+    self.timestamps_cnt = min(self.timestamps_cnt + 1, FREQUENCY_WINDOW)
+    self.last_nanos = nanos
+
+    if self.frequency < 1e-5 and self.timestamps_cnt >= 3:
+      dt = (self.last_nanos - self.first_nanos) * 1e-9
+      if (dt > 1.0 or self.timestamps_cnt >= FREQUENCY_WINDOW) and dt != 0:
+        self.frequency = min(self.timestamps_cnt / dt, 100.0)
+        self.timeout_threshold = (1_000_000_000 / self.frequency) * 10
+        if self.on_timeout_change is not None:
+          self.on_timeout_change(self)
+
   def update_counter(self, cur_count: int, cnt_size: int) -> bool:
     if ((self.counter + 1) & ((1 << cnt_size) - 1)) != cur_count:
+      if self.collect_stats:
+        self.stats.counter_fail_cnt += 1
+      if self.counter_fail == MAX_BAD_COUNTER - 1:
+        self.counter_invalid.add(self.address)
       self.counter_fail = min(self.counter_fail + 1, MAX_BAD_COUNTER)
     elif self.counter_fail > 0:
+      if self.counter_fail == MAX_BAD_COUNTER:
+        self.counter_invalid.discard(self.address)
       self.counter_fail -= 1
     self.counter = cur_count
     return self.counter_fail < MAX_BAD_COUNTER
 
+  @property
+  def deadline(self) -> float:
+    """Time after which the message is timed out, or -inf if never seen"""
+    if self.timestamps_cnt == 0:
+      return -math.inf
+    return self.last_nanos + self.timeout_threshold
+
   def valid(self, current_nanos: int, bus_timeout: bool) -> bool:
     if self.ignore_alive:
       return True
-    if not self.timestamps:
+    if self.timestamps_cnt == 0:
       return False
-    if (current_nanos - self.timestamps[-1]) > self.timeout_threshold:
+    if (current_nanos - self.last_nanos) > self.timeout_threshold:
       return False
     return True
 
 
+@dataclass
+class MessageGroup:
+  name: str
+  members: set[int]
+  trigger: int
+  callbacks: list[Callable[[str, list[int]], None]] = field(default_factory=list)
+  updated: set[int] = field(default_factory=set)  # members updated since the group last completed
+
+
+@dataclass
+class MessageColumns:
+  timestamps: np.ndarray
+  vals: dict[str, np.ndarray]
+  checksum_ok: np.ndarray | None = None  # per row, for messages with a checksum
+
+
+class MessageHistory(Mapping):
+  """
+  Values of every signal of a message received in the current update, as read-only views into the history that are
+  only valid until the next update, so copy them (or call tolist()) to keep them. Unknown signals read as an empty
+  array. recent() reaches back further, up to the history depth.
+  """
+  def __init__(self, parser, state: MessageState):
+    self.parser = parser
+    self.state = state
+
+  def _signal_idx(self, key: str) -> int:
+    idx = self.state.signal_idxs[key]
+    if idx not in self.state.published:
+      self.parser._publish(self.state, idx)
+    return idx
+
+  def __getitem__(self, key: str) -> np.ndarray:
+    if key not in self.state.signal_idxs:
+      return np.empty(0)
+    history = self.state.history
+    values = history.values[history.rows(), self._signal_idx(key)]
+    values.flags.writeable = False
+    return values
+
+  def __contains__(self, key) -> bool:
+    return key in self.state.signal_idxs
+
+  def __iter__(self):
+    return iter(self.state.signal_idxs)
+
+  def __len__(self):
+    return len(self.state.signal_idxs)
+
+  @property
+  def timestamps(self) -> np.ndarray:
+    history = self.state.history
+    return history.timestamps[history.rows()]
+
+  def recent(self, key: str, n: int) -> np.ndarray:
+    """Last n values of a signal, across updates"""
+    history = self.state.history
+    return history.values[history.rows(n), self._signal_idx(key)]
+
+  def recent_timestamps(self, n: int) -> np.ndarray:
+    history = self.state.history
+    return history.timestamps[history.rows(n)]
+
+
+class SignalHandle:
+  """
+  A signal bound to its slot in the parser's value storage, for hot-path reads without any lookups.
+  Handles stay valid for the lifetime of the parser.
+  """
+  __slots__ = ("state", "idx")
+
+  def __init__(self, state: MessageState, idx: int):
+    self.state = state
+    self.idx = idx
+
+  @property
+  def value(self) -> float:
+    return self.state.vals.item(self.idx)
+
+  @property
+  def nanos(self) -> int:
+    """Timestamp of the last frame carrying the signal, like ts_nanos"""
+    return self.state.signal_nanos(self.idx)
+
+  @property
+  def updated(self) -> bool:
+    """Whether the signal was received in the last update"""
+    history = self.state.history
+    return history.head > history.update_start and self.state.signal_nanos(self.idx) >= history.timestamps[history.update_start]
+
+
+class SignalView(Mapping):
+  """
+  Read-only view of a message's signals in the parser's storage. On a lazy parser, signals are published
+  once they're read, iterating over the values or items publishes every signal.
+  """
+  __slots__ = ("parser", "state", "idxs", "published")
+
+  def __init__(self, parser, state: MessageState):
+    self.parser = parser
+    self.state = state
+    # vl is read on every update, skip the attribute lookups on the state
+    self.idxs = state.signal_idxs
+    self.published = state.published
+
+  def __contains__(self, key):
+    return key in self.idxs
+
+  def __iter__(self):
+    return iter(self.idxs)
+
+  def __len__(self):
+    return len(self.idxs)
+
+  def __repr__(self):
+    return repr(self.copy())
+
+  def copy(self) -> dict:
+    return dict(self.items())
+
+  def __copy__(self):
+    return self.copy()
+
+  def __deepcopy__(self, memo):
+    return self.copy()
+
+  def __reduce__(self):
+    return dict, (self.copy(),)
+
+
+class SignalValues(SignalView):
+  __slots__ = ()
+
+  def __getitem__(self, key: str) -> float:
+    idx = self.idxs[key]
+    if idx not in self.published:
+      self.parser._publish(self.state, idx)
+    return self.state.vals.item(idx)
+
+
+class SignalTimestamps(SignalView):
+  __slots__ = ()
+
+  def __getitem__(self, key: str) -> int:
+    idx = self.idxs[key]
+    if idx not in self.published:
+      self.parser._publish(self.state, idx)
+    return self.state.signal_nanos(idx)
+
+
+class EnumSignalValues(SignalValues):
+  """vl of a parser with enums set, signals with a value table read as ints, or as names where the table has one"""
+  __slots__ = ("tables", "names")
+
+  def __init__(self, parser, state: MessageState, tables: 'list[ValueTable | None]', names: bool):
+    super().__init__(parser, state)
+    self.tables = tables
+    self.names = names
+
+  def __getitem__(self, key: str) -> float | int | str:
+    idx = self.idxs[key]
+    if idx not in self.published:
+      self.parser._publish(self.state, idx)
+    table = self.tables[idx]
+    if table is None:
+      return self.state.vals.item(idx)
+    value = int(self.state.vals[idx])
+    if not self.names:
+      return value
+    names = table.names
+    if names is not None:
+      name = names[value] if 0 <= value < len(names) else None
+      return value if name is None else name
+    return table.get(value, value)
+
+
 class VLDict(dict):
   def __init__(self, parser):
     super().__init__()
@@ -126,17 +628,62 @@ class VLDict(dict):
 
 
 class CANParser:
-  def __init__(self, dbc_name: str, messages: list[tuple[str | int, int]], bus: int):
+  def __init__(self, dbc_name: str, messages: list[tuple[str | int, int]], bus: int, lazy: bool = False,
+               history_depth: dict[str | int, int] | None = None, enums: str | None = None):
+    """
+    history_depth sets how many samples recent() reaches back per message, by name or address (DEFAULT_HISTORY_DEPTH
+    otherwise). vl_all always returns every sample of the last update, the history grows to hold them.
+
+    Every decoded value is held in a single float64 array, values, with the signals of each message in DBC order
+    starting at offsets[address]. The array is reallocated when a message is added. vl and ts_nanos are read-only
+    views into it and into the per-message timestamps.
+
+    With lazy set, the parser records which signals are read through vl, vl_all and ts_nanos.
+    After LAZY_WARMUP_UPDATES calls to update(), only those plus the counter and checksum signals are
+    decoded, any other signal is decoded on demand once it's read.
+
+    enums changes how vl reads signals with a VAL_ table: "int" returns their raw value as an int, "name" returns
+    the name from the table, or the int for values without one.
+    """
+    if enums not in (None, "int", "name"):
+      raise ValueError(f"invalid enums mode {enums!r}")
     self.dbc_name: str = dbc_name
     self.bus: int = bus
     self.dbc: DBC = DBC(dbc_name)
+    self.lazy: bool = lazy
+    self.enums: str | None = enums
+    self.history_depth: dict[str | int, int] = history_depth or {}
+    self.update_cnt: int = 0
+    self.changed: list[tuple[str, str]] = []  # subscribed (message, signal) pairs that changed in the last update
+    self._callbacks: dict[tuple[int, int], list[Callable[[str, str, float], None]]] = {}
+    self._watched_states: dict[int, MessageState] = {}
+    self._touched: list[MessageState] = []  # states updated by the last update(), the others have nothing to reset
+    self._address_array: np.ndarray = np.zeros(0, dtype=np.uint32)  # addresses of a CanFrameBatch that are parsed
+    self._addresses_cnt: int = 0
+    self.completed: dict[str, list[int]] = {}  # groups completed in the last update, with the members updated in that scan
+    self._groups: dict[str, MessageGroup] = {}
+    self._member_groups: dict[int, list[MessageGroup]] = {}
 
-    self.vl: dict[int | str, dict[str, float]] = VLDict(self)
-    self.vl_all: dict[int | str, dict[str, list[float]]] = {}
-    self.ts_nanos: dict[int | str, dict[str, int]] = {}
+    self.values: np.ndarray = np.zeros(0)
+    self.offsets: dict[int, int] = {}
+    self.vl: dict[int | str, SignalValues] = VLDict(self)
+    self.vl_all: dict[int | str, MessageHistory] = {}
+    self.ts_nanos: dict[int | str, SignalTimestamps] = {}
     self.addresses: set[int] = set()
     self.message_states: dict[int, MessageState] = {}
 
+    # validity is tracked incrementally, so reading it doesn't scale with the number of messages
+    self._counter_invalid: set[int] = set()
+    self._deadlines: list[tuple[float, int]] = []  # heap of (deadline, address), refreshed lazily when read
+    self._bus_timeout_threshold: float = 500 * 1_000_000
+    self._ignore_alive: bool = True
+
+    self._collect_stats: bool = False
+    self._bus_frames: int = 0
+    self._bus_bits: int = 0
+    self._stats_start_nanos: int | None = None
+    self._stats_end_nanos: int = 0
+
     for name_or_addr, freq in messages:
       if isinstance(name_or_addr, numbers.Number):
         msg = self.dbc.addr_to_msg.get(int(name_or_addr))
@@ -162,22 +709,38 @@ class CANParser:
     assert msg.address not in self.addresses
 
     self.addresses.add(msg.address)
-    signal_names = list(msg.sigs.keys())
-    signals_dict = {s: 0.0 for s in signal_names}
-    dict.__setitem__(self.vl, msg.address, signals_dict)
-    dict.__setitem__(self.vl, msg.name, signals_dict)
-    self.vl_all[msg.address] = defaultdict(list)
-    self.vl_all[msg.name] = self.vl_all[msg.address]
-    self.ts_nanos[msg.address] = {s: 0 for s in signal_names}
-    self.ts_nanos[msg.name] = self.ts_nanos[msg.address]
-
     state = MessageState(
       address=msg.address,
       name=msg.name,
       size=msg.size,
       signals=list(msg.sigs.values()),
       ignore_alive=freq is not None and math.isnan(freq),
+      lazy=self.lazy,
+      depth=self.history_depth.get(msg.name, self.history_depth.get(msg.address, DEFAULT_HISTORY_DEPTH)),
+      counter_invalid=self._counter_invalid,
+      on_timeout_change=self._timeout_changed,
+      collect_stats=self._collect_stats,
     )
+    if self.lazy and self.update_cnt >= LAZY_WARMUP_UPDATES:
+      state.set_active(state.validation_idxs)
+    self.offsets[msg.address] = len(self.values)
+    self.values = np.concatenate((self.values, state.vals))
+    for address, st in self.message_states.items():
+      st.vals = self.values[self.offsets[address]:self.offsets[address] + len(st.signals)]
+    state.vals = self.values[self.offsets[msg.address]:]
+
+    self.vl_all[msg.address] = MessageHistory(self, state)
+    if self.enums is None:
+      signal_values = SignalValues(self, state)
+    else:
+      tables = value_tables(self.dbc).get(msg.address, {})
+      signal_values = EnumSignalValues(self, state, [tables.get(sig.name) for sig in state.signals], self.enums == "name")
+    dict.__setitem__(self.vl, msg.address, signal_values)
+    dict.__setitem__(self.vl, msg.name, self.vl[msg.address])
+    self.vl_all[msg.name] = self.vl_all[msg.address]
+    self.ts_nanos[msg.address] = SignalTimestamps(self, state)
+    self.ts_nanos[msg.name] = self.ts_nanos[msg.address]
+
     if freq is not None and freq > 0:
       state.frequency = freq
     else:
@@ -187,40 +750,367 @@ class CANParser:
 
     self.message_states[msg.address] = state
 
+    if state.timeout_threshold > 0:
+      self._bus_timeout_threshold = min(self._bus_timeout_threshold, state.timeout_threshold)
+    self._ignore_alive = self._ignore_alive and state.ignore_alive
+    if not state.ignore_alive:
+      heapq.heappush(self._deadlines, (state.deadline, state.address))
+
+  def _update_bus_timeout_threshold(self) -> None:
+    self._bus_timeout_threshold = min([500 * 1_000_000] + [st.timeout_threshold for st in self.message_states.values() if st.timeout_threshold > 0])
+
+  def _timeout_changed(self, state: MessageState) -> None:
+    self._update_bus_timeout_threshold()
+    if not state.ignore_alive:
+      # a shorter timeout can expire before the state's current heap entry
+      heapq.heappush(self._deadlines, (state.deadline, state.address))
+
+  def _timed_out_states(self) -> list[MessageState]:
+    """Every timed out or missing message"""
+    now = self._last_update_nanos
+    deadlines = self._deadlines
+    expired: dict[int, MessageState] = {}
+    while deadlines and deadlines[0][0] <= now:
+      deadline, address = heapq.heappop(deadlines)
+      state = self.message_states[address]
+      if state.deadline != deadline:
+        # received since the entry was pushed
+        heapq.heappush(deadlines, (state.deadline, address))
+      else:
+        expired[address] = state
+    # their entries go back, they stay at the top of the heap until the message is received again
+    for address, state in expired.items():
+      heapq.heappush(deadlines, (state.deadline, address))
+    return [state for state in expired.values() if not state.valid(now, False)]
+
+  def _publish(self, state: MessageState, idx: int) -> None:
+    state.activate(idx)
+    state.published.add(idx)
+
+  def _message_state(self, name_or_addr: str | int) -> MessageState:
+    """Message state by name or address, adding the message like vl does"""
+    self.vl[name_or_addr]
+    if isinstance(name_or_addr, numbers.Number):
+      return self.message_states[int(name_or_addr)]
+    return self.message_states[self.dbc.name_to_msg[name_or_addr].address]
+
+  def _signal_state(self, name_or_addr: str | int, sig_name: str) -> tuple[MessageState, int]:
+    """Message state and index of a signal which is read"""
+    state = self._message_state(name_or_addr)
+    idx = state.signal_idxs[sig_name]
+    if idx not in state.published:
+      self._publish(state, idx)
+    return state, idx
+
+  def signal(self, name_or_addr: str | int, sig_name: str) -> SignalHandle:
+    """Handle to read a signal's value, timestamp and updated flag without the vl lookups"""
+    return SignalHandle(*self._signal_state(name_or_addr, sig_name))
+
+  def subscribe(self, name_or_addr: str | int, sig_name: str, callback: Callable[[str, str, float], None] | None = None) -> None:
+    """
+    Track changes of a signal. Subscribed signals that changed in the last update() are listed in changed,
+    and callback is called with the message name, signal name and new value after update() parsed every frame.
+    """
+    state, idx = self._signal_state(name_or_addr, sig_name)
+    state.watch(idx)
+    self._watched_states[state.address] = state
+    if callback is not None:
+      self._callbacks.setdefault((state.address, idx), []).append(callback)
+
+  def add_group(self, name: str, members: list[str | int], trigger: str | int,
+                callback: Callable[[str, list[int]], None] | None = None) -> None:
+    """
+    Declare messages sent together as one scan, like radar tracks, which is complete once trigger is received.
+    Groups completed in the last update() are listed in completed with the addresses of the members updated in
+    that scan, and callback is called with the group name and those addresses. Messages are added like vl does.
+    """
+    if name in self._groups:
+      raise RuntimeError(f"duplicate message group {name!r}")
+    group = MessageGroup(name, {self._message_state(m).address for m in [*members, trigger]}, self._message_state(trigger).address)
+    if callback is not None:
+      group.callbacks.append(callback)
+    self._groups[name] = group
+    for address in group.members:
+      self._member_groups.setdefault(address, []).append(group)
+
+  def _finish_update(self) -> None:
+    self.changed = []
+    for state in self._watched_states.values():
+      for idx in sorted(state.changed):
+        name = state.signals[idx].name
+        self.changed.append((state.name, name))
+        for callback in self._callbacks.get((state.address, idx), ()):
+          callback(state.name, name, state.vals.item(idx))
+
+    self.completed = {}
+    if not self._member_groups:
+      return
+    for state in self._touched:
+      for group in self._member_groups.get(state.address, ()):
+        group.updated.add(state.address)
+    for group in self._groups.values():
+      if group.trigger in group.updated:
+        self.completed[group.name] = sorted(group.updated)
+        group.updated.clear()
+        for callback in group.callbacks:
+          callback(group.name, self.completed[group.name])
+
+  @property
+  def collect_stats(self) -> bool:
+    """Per message and bus statistics are only collected while set, see stats()"""
+    return self._collect_stats
+
+  @collect_stats.setter
+  def collect_stats(self, enabled: bool) -> None:
+    self._collect_stats = enabled
+    for state in self.message_states.values():
+      state.collect_stats = enabled
+
+  def _record_bus_stats(self, nanos: int, frames) -> None:
+    for address, dat, src in frames:
+      if src == self.bus:
+        self._bus_frames += 1
+        self._bus_bits += can_frame_bits(address, len(dat))
+    if self._stats_start_nanos is None:
+      self._stats_start_nanos = nanos
+    self._stats_end_nanos = nanos
+
+  def _record_batch_stats(self, batch: CanFrameBatch, on_bus: np.ndarray) -> None:
+    frames = batch.frames[on_bus]
+    self._bus_frames += len(frames)
+    self._bus_bits += int(np.sum(np.where(frames["address"] > 0x7FF, 67, 47) + frames["length"].astype(np.int64) * 8))
+    if self._stats_start_nanos is None:
+      self._stats_start_nanos = int(batch.frames["nanos"][0]) if len(batch) else batch.nanos
+    self._stats_end_nanos = batch.nanos
+
+  def reset_stats(self) -> None:
+    self._bus_frames = 0
+    self._bus_bits = 0
+    self._stats_start_nanos = None
+    self._stats_end_nanos = 0
+    for state in self.message_states.values():
+      state.stats = MessageStats()
+
+  def stats(self, bitrate: int = 500_000) -> dict[str, Any]:
+    """
+    Statistics collected while collect_stats is set. The bus frame rate and load cover every frame on the
+    parser's bus, the load is estimated from the frame lengths at the given bitrate.
+    """
+    elapsed = 0.0 if self._stats_start_nanos is None else (self._stats_end_nanos - self._stats_start_nanos) * 1e-9
+    messages = {}
+    for state in self.message_states.values():
+      stats = state.stats
+      messages[state.name] = {
+        "frame_cnt": stats.frame_cnt,
+        "checksum_fail_cnt": stats.checksum_fail_cnt,
+        "counter_fail_cnt": stats.counter_fail_cnt,
+        "frequency": state.frequency,
+        "timeout_threshold_nanos": state.timeout_threshold,
+        "max_gap_nanos": stats.max_gap_nanos,
+        "decode_nanos": stats.decode_nanos,
+        "unchanged_cnt": stats.unchanged_cnt,
+      }
+    return {
+      "bus_frame_rate": self._bus_frames / elapsed if elapsed > 0 else 0.0,
+      "bus_load": self._bus_bits / elapsed / bitrate if elapsed > 0 else 0.0,
+      "messages": messages,
+    }
+
+  def snapshot(self) -> dict[str, Any]:
+    """
+    Picklable copy of the parser state: counters, learned frequencies and timeouts, and the last values and history
+    of every message. restore() puts it back in a parser for the same DBC and bus, to resume replay mid-log.
+    """
+    messages = {}
+    for address, state in self.message_states.items():
+      vals = state.vals.tolist()
+      history = state.history
+      if state.lazy and history.last_dat is not None:
+        # inactive signals aren't kept up to date
+        raw = state.decode(history.last_dat, list(range(len(state.signals))))
+        mux = state.mux_of(history.last_dat)
+        vals = [v * sig.factor + sig.offset if state.in_branch(i, mux) else vals[i]
+                for i, (v, sig) in enumerate(zip(raw, state.signals, strict=True))]
+      rows = history.rows(history.depth)
+      messages[address] = {
+        "ignore_alive": state.ignore_alive,
+        "frequency": state.frequency,
+        "timeout_threshold": state.timeout_threshold,
+        "first_nanos": state.first_nanos,
+        "last_nanos": state.last_nanos,
+        "timestamps_cnt": state.timestamps_cnt,
+        "first_seen_nanos": state.first_seen_nanos,
+        "counter": state.counter,
+        "counter_fail": state.counter_fail,
+        "mux_nanos": {} if state.mux is None else dict(state.mux.nanos),
+        "vals": vals,
+        "last_dat": history.last_dat,
+        "history": history.values[rows].copy(),
+        "history_ts": history.timestamps[rows].copy(),
+      }
+    return {
+      "dbc_name": self.dbc_name,
+      "bus": self.bus,
+      "can_invalid_cnt": self.can_invalid_cnt,
+      "last_nonempty_nanos": self.last_nonempty_nanos,
+      "last_update_nanos": self._last_update_nanos,
+      "messages": messages,
+    }
+
+  def restore(self, snapshot: dict[str, Any]) -> None:
+    """
+    Restore a snapshot() of a parser, adding any message it has that this parser doesn't. Subscriptions report the
+    changes against the restored values, group scans start over and the statistics are reset.
+    """
+    if snapshot["dbc_name"] != self.dbc_name or snapshot["bus"] != self.bus:
+      raise RuntimeError(f"snapshot of {snapshot['dbc_name']} bus {snapshot['bus']} doesn't match {self.dbc_name} bus {self.bus}")
+
+    for address, msg in snapshot["messages"].items():
+      if address not in self.message_states:
+        self._add_message(address, math.nan if msg["ignore_alive"] else None)
+      state = self.message_states[address]
+      state.frequency = msg["frequency"]
+      state.timeout_threshold = msg["timeout_threshold"]
+      state.first_nanos = msg["first_nanos"]
+      state.last_nanos = msg["last_nanos"]
+      state.timestamps_cnt = msg["timestamps_cnt"]
+      state.first_seen_nanos = msg["first_seen_nanos"]
+      state.counter = msg["counter"]
+      state.counter_fail = msg["counter_fail"]
+      if state.mux is not None:
+        state.mux.nanos = dict(msg["mux_nanos"])
+      state.vals[:] = msg["vals"]
+      state.history.restore(msg["history"], msg["history_ts"], msg["last_dat"])
+
+      # subscribed signals compare against the restored values, or count their first frame as a change if never received
+      state.changed.clear()
+      for j, idx in enumerate(state.watched):
+        sig = state.signals[idx]
+        state.watched_raw[j] = None if state.timestamps_cnt == 0 else round((state.vals.item(idx) - sig.offset) / sig.factor)
+
+    self.can_invalid_cnt = snapshot["can_invalid_cnt"]
+    self.last_nonempty_nanos = snapshot["last_nonempty_nanos"]
+    self._last_update_nanos = snapshot["last_update_nanos"]
+
+    self.changed = []
+    self.completed = {}
+    for group in self._groups.values():
+      group.updated.clear()
+    self._touched = []
+    self.reset_stats()
+
+    self._counter_invalid.clear()
+    self._counter_invalid.update(addr for addr, st in self.message_states.items() if st.counter_fail >= MAX_BAD_COUNTER)
+    self._deadlines = [(st.deadline, addr) for addr, st in self.message_states.items() if not st.ignore_alive]
+    heapq.heapify(self._deadlines)
+    self._update_bus_timeout_threshold()
+
   @property
   def bus_timeout(self) -> bool:
-    ignore_alive = all(s.ignore_alive for s in self.message_states.values())
-    bus_timeout_threshold = 500 * 1_000_000
-    for st in self.message_states.values():
-      if st.timeout_threshold > 0:
-        bus_timeout_threshold = min(bus_timeout_threshold, st.timeout_threshold)
-    return ((self._last_update_nanos - self.last_nonempty_nanos) > bus_timeout_threshold) and not ignore_alive
+    return ((self._last_update_nanos - self.last_nonempty_nanos) > self._bus_timeout_threshold) and not self._ignore_alive
 
   @property
   def can_valid(self) -> bool:
-    valid = True
-    counters_valid = True
-    bus_timeout = self.bus_timeout
-    for state in self.message_states.values():
-      if state.counter_fail >= MAX_BAD_COUNTER:
-        counters_valid = False
-        state.rate_limited_log(self._last_update_nanos, f"counter invalid, {state.counter_fail=} {MAX_BAD_COUNTER=}")
-      if not state.valid(self._last_update_nanos, bus_timeout):
-        valid = False
-        state.rate_limited_log(self._last_update_nanos, "not valid (timeout or missing)")
+    for address in self._counter_invalid:
+      state = self.message_states[address]
+      state.rate_limited_log(self._last_update_nanos, f"counter invalid, {state.counter_fail=} {MAX_BAD_COUNTER=}")
+
+    timed_out = self._timed_out_states()
+    for state in timed_out:
+      state.rate_limited_log(self._last_update_nanos, "not valid (timeout or missing)")
 
     # TODO: probably only want to increment this once per update() call
-    self.can_invalid_cnt = 0 if valid else min(self.can_invalid_cnt + 1, CAN_INVALID_CNT)
-    return self.can_invalid_cnt < CAN_INVALID_CNT and counters_valid
+    self.can_invalid_cnt = 0 if not timed_out else min(self.can_invalid_cnt + 1, CAN_INVALID_CNT)
+    return self.can_invalid_cnt < CAN_INVALID_CNT and not self._counter_invalid
+
+  def decode_batch(self, timestamps: np.ndarray, addresses: np.ndarray, buses: np.ndarray,
+                   payloads: np.ndarray, lengths: np.ndarray | None = None) -> dict[int | str, MessageColumns]:
+    """
+    Decode a whole log at once, without touching the parser state. payloads is a uint8 matrix with one zero padded
+    frame per row, lengths the received length of each frame. Returns the timestamps and a column per signal for every
+    message, keyed like vl. Unlike update(), frames are not dropped on bad counters or checksums, checksum_ok flags the
+    frames that pass theirs. Frames whose length is not the message size are NaN and fail their checksum, rather than
+    decoding the padding. Multiplexed signals are NaN in rows of other branches.
+    """
+    timestamps = np.asarray(timestamps)
+    addresses = np.asarray(addresses)
+    payloads = np.asarray(payloads, dtype=np.uint8)
+
+    rows = np.flatnonzero(np.asarray(buses) == self.bus)
+    rows = rows[np.argsort(addresses[rows], kind="stable")]
+    addrs, starts = np.unique(addresses[rows], return_index=True)
+    ends = np.append(starts[1:], len(rows))
+    msg_rows = {int(addr): rows[start:end] for addr, start, end in zip(addrs, starts, ends, strict=True)}
+
+    ret: dict[int | str, MessageColumns] = {}
+    for address, state in self.message_states.items():
+      r = msg_rows.get(address, rows[:0])
+      dat = payloads[r]
+      bad_length = None
+      if lengths is not None:
+        bad_length = np.asarray(lengths)[r] != state.size
+        if not bad_length.any():
+          bad_length = None
+      cols = MessageColumns(timestamps[r], {})
+      mux = None if state.mux is None else get_raw_values(dat, state.signals[state.mux.idx])
+      for sig in state.signals:
+        vals = get_raw_values(dat, sig) * sig.factor + sig.offset
+        if mux is not None and sig.multiplex_value is not None:
+          vals = np.where(mux == sig.multiplex_value, vals, np.nan)
+        if bad_length is not None:
+          vals = np.where(bad_length, np.nan, vals)
+        cols.vals[sig.name] = vals
+        if isinstance(sig.calc_checksum, Checksum):
+          cols.checksum_ok = get_raw_values(dat, sig) == sig.calc_checksum.batch(address, sig, dat[:, :state.size])
+          if bad_length is not None:
+            cols.checksum_ok &= ~bad_length
+      ret[address] = cols
+      ret[state.name] = cols
+    return ret
+
+  def _start_update(self) -> None:
+    if self.lazy and self.update_cnt < LAZY_WARMUP_UPDATES:
+      self.update_cnt += 1
+      if self.update_cnt == LAZY_WARMUP_UPDATES:
+        for state in self.message_states.values():
+          state.set_active(sorted(set(state.published) | set(state.validation_idxs)))
+
+    for state in self._touched:
+      state.history.start_update()
+      state.changed.clear()
+
+  def _update_batch(self, batch: CanFrameBatch) -> set[int]:
+    """update() for a CanFrameBatch, frames of other buses and messages are dropped before they reach Python"""
+    frames = batch.frames
+    on_bus = frames["src"] == self.bus
+    if self._addresses_cnt != len(self.message_states):
+      self._address_array = np.fromiter(self.message_states, dtype=np.uint32)
+      self._addresses_cnt = len(self.message_states)
+
+    updated_addrs: set[int] = set()
+    for nanos, address, _, dat in batch.select(on_bus & np.isin(frames["address"], self._address_array)):
+      if self.message_states[address].parse(nanos, dat):
+        updated_addrs.add(address)
+
+    if on_bus.any():
+      self.last_nonempty_nanos = int(frames["nanos"][on_bus][-1])
+    if self._collect_stats:
+      self._record_batch_stats(batch, on_bus)
+    self._last_update_nanos = batch.nanos
+    return updated_addrs
 
   def update(self, strings, sendcan: bool = False):
+    """Parse a list of (nanos, frames) entries, or a CanFrameBatch. Returns the addresses of the updated messages."""
+    self._start_update()
+    if isinstance(strings, CanFrameBatch):
+      updated_addrs = self._update_batch(strings)
+      self._touched = [self.message_states[address] for address in updated_addrs]
+      self._finish_update()
+      return updated_addrs
+
     if strings and not isinstance(strings[0], list | tuple):
       strings = [strings]
 
-    for addr in self.addresses:
-      for k in self.vl_all[addr]:
-        self.vl_all[addr][k].clear()
-
     updated_addrs: set[int] = set()
     for entry in strings:
       t = entry[0]
@@ -236,39 +1126,113 @@ class CANParser:
         if state.parse(t, dat):
           updated_addrs.add(address)
 
-          vl_addr = self.vl[address]
-          vl_all_addr = self.vl_all[address]
-          ts_addr = self.ts_nanos[address]
-
-          for i, sig in enumerate(state.signals):
-            vl_addr[sig.name] = state.vals[i]
-            vl_all_addr[sig.name] = state.all_vals[i]
-            ts_addr[sig.name] = state.timestamps[-1]
-
       if not bus_empty:
         self.last_nonempty_nanos = t
+      if self._collect_stats:
+        self._record_bus_stats(t, frames)
 
       self._last_update_nanos = t
 
+    self._touched = [self.message_states[address] for address in updated_addrs]
+    self._finish_update()
     return updated_addrs
 
 
+class CANParserGroup:
+  """
+  Updates several parsers with a single pass over the CAN packets. Frames are dispatched by
+  bus and address straight to the owning MessageStates, the bus bookkeeping is kept per parser.
+  """
+  def __init__(self, parsers: dict):
+    self.parsers: dict = {k: cp for k, cp in parsers.items() if cp is not None}
+    self.routes: dict[int, dict[int, list[tuple[Any, MessageState]]]] = {}
+    self._num_messages: list[int] = []
+
+  def _build_routes(self) -> None:
+    self.routes = {}
+    for key, cp in self.parsers.items():
+      by_addr = self.routes.setdefault(cp.bus, {})
+      for address, state in cp.message_states.items():
+        by_addr.setdefault(address, []).append((key, state))
+    self._num_messages = [len(cp.message_states) for cp in self.parsers.values()]
+
+  def update(self, strings) -> dict:
+    """Returns the updated addresses of each parser, like CANParser.update"""
+    if isinstance(strings, CanFrameBatch):
+      # each parser filters the batch on its own bus and addresses without touching the other frames
+      return {key: cp.update(strings) for key, cp in self.parsers.items()}
+    if strings and not isinstance(strings[0], list | tuple):
+      strings = [strings]
+
+    # parsers add messages on first access to vl
+    if self._num_messages != [len(cp.message_states) for cp in self.parsers.values()]:
+      self._build_routes()
+
+    for cp in self.parsers.values():
+      cp._start_update()
+
+    updated_addrs: dict = {key: set() for key in self.parsers}
+    routes = self.routes
+    for entry in strings:
+      t = entry[0]
+      nonempty_buses = set()
+      for address, dat, src in entry[1]:
+        by_addr = routes.get(src)
+        if by_addr is None:
+          continue
+        nonempty_buses.add(src)
+        states = by_addr.get(address)
+        if states is None or len(dat) > 64:
+          continue
+        for key, state in states:
+          if state.parse(t, dat):
+            updated_addrs[key].add(address)
+
+      for cp in self.parsers.values():
+        if cp.bus in nonempty_buses:
+          cp.last_nonempty_nanos = t
+        if cp._collect_stats:
+          cp._record_bus_stats(t, entry[1])
+        cp._last_update_nanos = t
+
+    for key, cp in self.parsers.items():
+      cp._touched = [cp.message_states[address] for address in updated_addrs[key]]
+      cp._finish_update()
+    return updated_addrs
+
+
+class ValueTable(dict):
+  """
+  Value table of a signal, raw value to name. Tables of small non-negative values are also kept as a list
+  indexed by the raw value, with None for values without a name.
+  """
+  def __init__(self, values: dict[int, str]):
+    super().__init__(values)
+    self.names: list[str | None] | None = None
+    if values and min(values) >= 0 and max(values) < DENSE_TABLE_SIZE:
+      self.names = [None] * (max(values) + 1)
+      for value, name in values.items():
+        self.names[value] = name
+
+
+@cache
+def value_tables(dbc: DBC) -> dict[int, dict[str, ValueTable]]:
+  """Value tables of a DBC by address and signal name, built once and shared by every CANDefine and parser"""
+  tables: dict[int, dict[str, ValueTable]] = defaultdict(dict)
+  for val in dbc.vals:
+    tables[val.address][val.name] = ValueTable(val.values)
+  return dict(tables)
+
+
 class CANDefine:
   def __init__(self, dbc_name: str):
     dbc = DBC(dbc_name)
 
-    dv = defaultdict(dict)
-    for val in dbc.vals:
-      sgname = val.name
-      address = val.address
+    dv: dict[int | str, dict[str, ValueTable]] = {}
+    for address, tables in value_tables(dbc).items():
       msg = dbc.addr_to_msg.get(address)
       if msg is None:
         raise KeyError(address)
-      msgname = msg.name
-      parts = val.def_val.split()
-      values = [int(v) for v in parts[::2]]
-      defs = parts[1::2]
-      dv[address][sgname] = dict(zip(values, defs, strict=True))
-      dv[msgname][sgname] = dv[address][sgname]
-
-    self.dv = dict(dv)
+      dv[address] = dv[msg.name] = dict(tables)
+
+    self.dv = dv
@@ -1,6 +1,18 @@
 #!/usr/bin/env python3
+import logging
+import copy
+import math
+import random
 import time
+import tracemalloc
+import numpy as np
 from opendbc.can import CANPacker, CANParser
+from opendbc.can.dbc import DBC, SignalType
+from opendbc.can.packer import set_value
+from opendbc.can.parser import SignalHandle, get_raw_value
+from opendbc.car import gen_empty_fingerprint
+from opendbc.car.car_helpers import interfaces
+from opendbc.car.carlog import carlog
 
 
 def _benchmark(checks, n):
@@ -39,8 +51,347 @@ def _benchmark(checks, n):
   print('[%d] %.1fms to pack, %.1fms to parse %s messages, avg: %dns' % (n, pack_dt/1e6, et/1e6, len(can_msgs), avg_nanos))
 
 
+def _benchmark_decode(dbc_name, msg_name, n=10000):
+  parser = CANParser(dbc_name, [(msg_name, 0)], 0)
+  state = parser.message_states[parser.dbc.name_to_msg[msg_name].address]
+  frames = [bytes(random.randrange(256) for _ in range(state.size)) for _ in range(n)]
+
+  t1 = time.process_time_ns()
+  for dat in frames:
+    for sig in state.signals:
+      tmp = get_raw_value(dat, sig)
+      if sig.is_signed:
+        tmp -= ((tmp >> (sig.size - 1)) & 0x1) * (1 << sig.size)
+  t2 = time.process_time_ns()
+  for dat in frames:
+    state.decode(dat)
+  t3 = time.process_time_ns()
+
+  byte_loop, compiled = (t2 - t1) / n, (t3 - t2) / n
+  print('%s %s (%d bytes, %d signals): byte loop %dns, compiled %dns per frame, %.1fx' %
+        (dbc_name, msg_name, state.size, len(state.signals), byte_loop, compiled, byte_loop / compiled))
+
+
+def _benchmark_pack(brand, dbc_name, n=200):
+  packer = CANPacker(dbc_name)
+  msgs = list(packer.dbc.msgs.values())
+  values = [{name: random.randint(0, (1 << sig.size) - 1) * sig.factor + sig.offset for name, sig in msg.sigs.items()} for msg in msgs]
+
+  t1 = time.process_time_ns()
+  for _ in range(n):
+    for msg, vals in zip(msgs, values, strict=True):
+      dat = bytearray(msg.size)
+      for name, value in vals.items():
+        sig = msg.sigs[name]
+        set_value(dat, sig, int(math.floor((value - sig.offset) / sig.factor + 0.5)))
+      sig_checksum = next((s for s in msg.sigs.values() if s.type > SignalType.COUNTER), None)
+      if sig_checksum and sig_checksum.calc_checksum:
+        set_value(dat, sig_checksum, sig_checksum.calc_checksum(msg.address, sig_checksum, dat))
+  t2 = time.process_time_ns()
+  for _ in range(n):
+    for msg, vals in zip(msgs, values, strict=True):
+      packer.pack(msg.address, vals)
+  t3 = time.process_time_ns()
+
+  byte_loop, compiled = (t2 - t1) / (n * len(msgs)), (t3 - t2) / (n * len(msgs))
+  print('%s (%s, %d messages): byte loop %dns, compiled %dns per message, %.1fx' % (brand, dbc_name, len(msgs), byte_loop, compiled, byte_loop / compiled))
+
+
+def _benchmark_pack_many(dbc_name, n_msgs=12, n=5000):
+  # one carcontroller frame sending n_msgs messages
+  packer = CANPacker(dbc_name)
+  msgs = list(packer.dbc.msgs.values())[:n_msgs]
+  frames = [[(msg.name, 0, {name: i % 2 for name in list(msg.sigs)[:4]}) for msg in msgs] for i in range(n)]
+  handles = [[(packer.message(name), bus, values) for name, bus, values in f] for f in frames]
+
+  t1 = time.process_time_ns()
+  for f in frames:
+    [packer.make_can_msg(*m) for m in f]
+  t2 = time.process_time_ns()
+  for f in frames:
+    packer.pack_many(f)
+  t3 = time.process_time_ns()
+  for f in handles:
+    packer.pack_many(f)
+  t4 = time.process_time_ns()
+  print('%s: %d messages per frame, make_can_msg %dns, pack_many %dns, pack_many with handles %dns per frame' %
+        (dbc_name, len(msgs), (t2 - t1) / n, (t3 - t2) / n, (t4 - t3) / n))
+
+
+def _benchmark_pack_cache(dbc_name, static_msgs, dynamic_msgs, n=5000):
+  # like a carcontroller: HUD messages repeat their values, commands change a signal every frame
+  dbc = CANPacker(dbc_name).dbc
+  values = {name: dict.fromkeys((s for s in dbc.name_to_msg[name].sigs if s not in ("COUNTER", "CHECKSUM")), 0) for name in static_msgs}
+  frames = [[(name, values[name]) for name in static_msgs] + [(name, {sig: i % 100}) for name, sig in dynamic_msgs] for i in range(n)]
+
+  ets = []
+  for cache_size in (0, 64):
+    packer = CANPacker(dbc_name, cache_size=cache_size)
+    t1 = time.process_time_ns()
+    for msgs in frames:
+      for name, vals in msgs:
+        packer.make_can_msg(name, 0, vals)
+    ets.append((time.process_time_ns() - t1) / (n * len(frames[0])))
+  print('%s: %d static and %d changing messages, %.0f%% cache hits, avg: %dns per message uncached, %dns cached' %
+        (dbc_name, len(static_msgs), len(dynamic_msgs), packer.cache_hit_rate * 100, ets[0], ets[1]))
+
+
+def _benchmark_pack_batch(dbc_name, seconds=3600, rate=100):
+  # every message at the same rate, with random values
+  packer = CANPacker(dbc_name)
+  msgs = list(packer.dbc.msgs.values())
+  n = seconds * rate
+  values = {msg.name: {name: np.random.randint(0, 1 << min(sig.size, 16), n) * sig.factor + sig.offset for name, sig in msg.sigs.items()
+                       if sig.type == 0 and name != "COUNTER"} for msg in msgs}
+
+  t1 = time.process_time_ns()
+  for msg in msgs:
+    packer.pack_batch(msg.name, values[msg.name], n)
+  t2 = time.process_time_ns()
+  for msg in msgs:
+    for i in range(1000):
+      packer.make_can_msg(msg.name, 0, {k: v[i] for k, v in values[msg.name].items()})
+  t3 = time.process_time_ns()
+
+  frames = n * len(msgs)
+  print('%s: %.1fs to pack %d frames (%ds of %d messages at %dHz), avg: %dns per frame, %dns with make_can_msg' %
+        (dbc_name, (t2 - t1) / 1e9, frames, seconds, len(msgs), rate, (t2 - t1) / frames, (t3 - t2) / (1000 * len(msgs))))
+
+
+def _benchmark_checksums(dbc_name, msg_name, n=100_000):
+  # one checksum per frame, through the scalar path and the NumPy path
+  msg = DBC(dbc_name).name_to_msg[msg_name]
+  sig = next(s for s in msg.sigs.values() if s.calc_checksum is not None)
+  payloads = np.random.randint(0, 256, (n, msg.size), dtype=np.uint8)
+  dats = [bytes(row) for row in payloads[:10000]]
+
+  t1 = time.process_time_ns()
+  for dat in dats:
+    sig.calc_checksum(msg.address, sig, dat)
+  t2 = time.process_time_ns()
+  sig.calc_checksum.batch(msg.address, sig, payloads)
+  t3 = time.process_time_ns()
+  print('%s %s (%d bytes): avg: %dns per frame scalar, %dns batched' % (dbc_name, msg_name, msg.size, (t2 - t1) / len(dats), (t3 - t2) / n))
+
+
+def _benchmark_batch(dbc_name, n=1_000_000):
+  parser = CANParser(dbc_name, [], 0)
+  for msg in parser.dbc.msgs.values():
+    parser._add_message(msg.address)
+  addresses = np.array(list(parser.dbc.msgs.keys()))[np.random.randint(0, len(parser.dbc.msgs), n)]
+  payloads = np.random.randint(0, 256, (n, 64), dtype=np.uint8)
+
+  t1 = time.process_time_ns()
+  parser.decode_batch(np.arange(n), addresses, np.zeros(n, dtype=np.int64), payloads)
+  t2 = time.process_time_ns()
+  print('%s: %.1fms to batch decode %d frames of %d messages, avg: %dns' % (dbc_name, (t2 - t1) / 1e6, n, len(parser.dbc.msgs), (t2 - t1) / n))
+
+
+def _benchmark_lazy(dbc_name, reads_per_msg=2, n=100):
+  dbc = CANParser(dbc_name, [], 0).dbc
+  msgs = list(dbc.msgs.values())
+  reads = [(msg.name, sig) for msg in msgs for sig in list(msg.sigs)[:reads_per_msg]]
+  strings = [[int(0.01 * i * 1e9), [(msg.address, bytes(random.randrange(256) for _ in range(msg.size)), 0) for msg in msgs]] for i in range(n)]
+
+  for lazy in (False, True):
+    parser = CANParser(dbc_name, [(msg.name, 0) for msg in msgs], 0, lazy=lazy)
+    ets = []
+    for _ in range(5):  # first pass is the lazy warm-up
+      t1 = time.process_time_ns()
+      for m in strings:
+        parser.update([m])
+        for msg_name, sig_name in reads:
+          parser.vl[msg_name][sig_name]
+      ets.append(time.process_time_ns() - t1)
+    print('%s lazy=%s: %d messages, %d signals read, avg: %dns per update' % (dbc_name, lazy, len(msgs), len(reads), sum(ets[1:]) / (4 * n)))
+
+
+def _benchmark_memory(dbc_name, n=600):
+  packer = CANPacker(dbc_name)
+  msgs = list(packer.dbc.msgs.values())
+  strings = [[int(0.01 * i * 1e9), [packer.make_can_msg(msg.address, 0, {}) for msg in msgs]] for i in range(n)]
+
+  tracemalloc.start()
+  parser = CANParser(dbc_name, [(msg.name, 0) for msg in msgs], 0)
+  for m in strings:
+    parser.update([m])
+  mem = tracemalloc.get_traced_memory()[0]
+  tracemalloc.stop()
+
+  t1 = time.process_time_ns()
+  for m in strings:
+    parser.update([m])
+  t2 = time.process_time_ns()
+  print('%s: %.1fkB per parser with %d messages, avg: %dns per frame' % (dbc_name, mem / 1e3, len(msgs), (t2 - t1) / (n * len(msgs))))
+
+
+def _benchmark_unchanged(dbc_name, n=300):
+  packer = CANPacker(dbc_name)
+  msgs = list(packer.dbc.msgs.values())
+  # messages without a counter repeat their payload
+  strings = [[int(0.01 * i * 1e9), [packer.make_can_msg(msg.address, 0, {}) for msg in msgs]] for i in range(n)]
+
+  ets = []
+  for short_circuit in (True, False):
+    parser = CANParser(dbc_name, [(msg.name, 0) for msg in msgs], 0)
+    for state in parser.message_states.values():
+      state.has_counter = state.has_counter or not short_circuit  # forces decoding
+    t1 = time.process_time_ns()
+    for m in strings:
+      parser.update([m])
+    ets.append((time.process_time_ns() - t1) / (n * len(msgs)))
+
+  parser = CANParser(dbc_name, [(msg.name, 0) for msg in msgs], 0)
+  parser.collect_stats = True
+  for m in strings:
+    parser.update([m])
+  msg_stats = parser.stats()["messages"].values()
+  unchanged = sum(st["unchanged_cnt"] for st in msg_stats) / sum(st["frame_cnt"] for st in msg_stats)
+  print('%s: %.0f%% unchanged frames, avg: %dns per frame, %dns without the short circuit' % (dbc_name, unchanged * 100, ets[0], ets[1]))
+
+
+def _benchmark_checksum_copies(dbc_name, n=300):
+  packer = CANPacker(dbc_name)
+  msgs = [msg for msg in packer.dbc.msgs.values() if any(sig.calc_checksum is not None for sig in msg.sigs.values())]
+  strings = [[int(0.01 * i * 1e9), [packer.make_can_msg(msg.address, 0, {}) for msg in msgs]] for i in range(n)]
+
+  ets = []
+  for copy_payload in (False, True):
+    parser = CANParser(dbc_name, [(msg.name, 0) for msg in msgs], 0)
+    if copy_payload:
+      # the checksum call as it was, on a bytearray copy of every payload
+      for state in parser.message_states.values():
+        state.signals = [copy.copy(sig) for sig in state.signals]
+        for sig in state.signals:
+          if sig.calc_checksum is not None:
+            sig.calc_checksum = lambda address, sig, dat, calc=sig.calc_checksum: calc(address, sig, bytearray(dat))
+    t1 = time.process_time_ns()
+    for m in strings:
+      parser.update([m])
+    ets.append((time.process_time_ns() - t1) / (n * len(msgs)))
+
+  # every frame is checked, as these messages repeat their payload only without a counter
+  parser = CANParser(dbc_name, [(msg.name, 0) for msg in msgs], 0)
+  parser.collect_stats = True
+  for m in strings:
+    parser.update([m])
+  checked = sum(st["frame_cnt"] - st["unchanged_cnt"] for st in parser.stats()["messages"].values())
+  print('%s: %d payload copies saved, avg: %dns per frame, %dns copying the payload' % (dbc_name, checked, ets[0], ets[1]))
+
+
+def _benchmark_idle(dbc_name, n=5000):
+  packer = CANPacker(dbc_name)
+  msgs = list(packer.dbc.msgs.values())
+  parser = CANParser(dbc_name, [(msg.name, 0) for msg in msgs], 0)
+  # a single message received per update, like a radar parser with mostly idle tracks
+  msg = min(msgs, key=lambda m: len(m.sigs))
+  strings = [[int(0.01 * i * 1e9), [packer.make_can_msg(msg.address, 0, {})]] for i in range(n)]
+
+  t1 = time.process_time_ns()
+  for m in strings:
+    parser.update([m])
+  t2 = time.process_time_ns()
+  print('%s: %d messages, 1 received per update, avg: %dns per update' % (dbc_name, len(msgs), (t2 - t1) / n))
+
+
+def _benchmark_carstate(platform, n=2000):
+  CarInterface = interfaces[platform]
+  fingerprint = gen_empty_fingerprint()
+  CP = CarInterface.get_params(platform, fingerprint, [], False, False, False, False)
+  CP_SP = CarInterface.get_params_sp(CP, platform, fingerprint, [], False, False, False)
+  CP_AC = CarInterface.get_params_ac(CP, platform, fingerprint, [], False, False, False)
+  CI = CarInterface(CP, CP_SP, CP_AC)
+
+  level = carlog.level
+  carlog.setLevel(logging.ERROR)
+
+  # messages are registered as the carstate reads them, send each with zeroed signals and a running counter every 10ms
+  CI.update([(0, [])])
+  frames = []
+  for cp in CI.can_parsers.values():
+    packer = CANPacker(cp.dbc_name)
+    for state in cp.message_states.values():
+      counter = next((sig for sig in state.signals if sig.type == SignalType.COUNTER), None)
+      frames.append((packer, state.address, cp.bus, counter))
+  can_msgs = []
+  for i in range(n):
+    msgs = [packer.make_can_msg(addr, bus, {counter.name: i % (1 << counter.size)} if counter else {}) for packer, addr, bus, counter in frames]
+    can_msgs.append((int(0.01 * (i + 1) * 1e9), msgs))
+
+  t1 = time.process_time_ns()
+  for can_msg in can_msgs:
+    CI.update([can_msg])
+  t2 = time.process_time_ns()
+  carlog.setLevel(level)
+
+  # the signals read through handles on every update, against the vl lookups they replace
+  handles = []
+  for attr in vars(CI.CS).values():
+    handles += [h for h in (attr if isinstance(attr, list) else [attr]) if isinstance(h, SignalHandle)]
+  cp = CI.CS.bound_cp
+  names = [(h.state.name, next(sig for sig, idx in h.state.signal_idxs.items() if idx == h.idx)) for h in handles]
+  assert all(h.value == cp.vl[msg][sig] for h, (msg, sig) in zip(handles, names, strict=True))
+
+  t3 = time.process_time_ns()
+  for _ in range(n):
+    [h.value for h in handles]
+  t4 = time.process_time_ns()
+  for _ in range(n):
+    [cp.vl[msg][sig] for msg, sig in names]
+  t5 = time.process_time_ns()
+  print('%s: avg %dns per CarInterface.update with %d frames, %d signals read in %dns through handles, %dns through vl' %
+        (platform, (t2 - t1) / n, len(frames), len(handles), (t4 - t3) / n, (t5 - t4) / n))
+
+
 if __name__ == "__main__":
   # python -m cProfile -s cumulative  benchmark.py
   _benchmark([('ACC_CONTROL', 10)], 1)
   _benchmark([('ACC_CONTROL', 10)], 5)
   _benchmark([('ACC_CONTROL', 10)], 10)
+
+  _benchmark_decode('toyota_new_mc_pt_generated', 'LKAS_HUD')
+  _benchmark_decode('hyundai_canfd_generated', 'CCNC_0x161')
+  _benchmark_decode('vw_mqb', 'ESP_33')
+
+  for brand, dbc_name in (('toyota', 'toyota_new_mc_pt_generated'), ('honda', 'honda_civic_touring_2016_can_generated'),
+                          ('hyundai', 'hyundai_canfd_generated'), ('volkswagen', 'vw_mqb'), ('gm', 'gm_global_a_powertrain_generated'),
+                          ('ford', 'ford_lincoln_base_pt'), ('subaru', 'subaru_global_2017_generated'),
+                          ('chrysler', 'chrysler_pacifica_2017_hybrid_generated'), ('nissan', 'nissan_x_trail_2017_generated'),
+                          ('mazda', 'mazda_2017'), ('tesla', 'tesla_can'), ('psa', 'psa_aee2010_r3'), ('rivian', 'rivian_primary_actuator')):
+    _benchmark_pack(brand, dbc_name)
+
+  _benchmark_pack_many('hyundai_canfd_generated')
+  _benchmark_pack_many('toyota_new_mc_pt_generated')
+
+  _benchmark_pack_cache('toyota_new_mc_pt_generated', ['LKAS_HUD', 'PCS_HUD'], [('STEERING_LKA', 'STEER_TORQUE_CMD'), ('ACC_CONTROL', 'ACCEL_CMD')])
+  _benchmark_pack_cache('honda_civic_touring_2016_can_generated', ['LKAS_HUD', 'ACC_HUD', 'RADAR_HUD'], [('STEERING_CONTROL', 'STEER_TORQUE')])
+
+  _benchmark_pack_batch('toyota_new_mc_pt_generated')
+  _benchmark_pack_batch('honda_civic_touring_2016_can_generated')
+  _benchmark_pack_batch('hyundai_canfd_generated')
+
+  _benchmark_checksums('honda_civic_touring_2016_can_generated', 'STEERING_CONTROL')
+  _benchmark_checksums('vw_mqb', 'HCA_01')
+  _benchmark_checksums('hyundai_canfd_generated', 'LKAS')
+  _benchmark_checksums('chrysler_pacifica_2017_hybrid_generated', 'LKAS_COMMAND')
+
+  _benchmark_batch('toyota_new_mc_pt_generated')
+  _benchmark_batch('hyundai_canfd_generated')
+
+  _benchmark_lazy('ford_lincoln_base_pt')
+
+  _benchmark_memory('toyota_new_mc_pt_generated')
+  _benchmark_memory('hyundai_canfd_generated')
+
+  _benchmark_unchanged('toyota_new_mc_pt_generated')
+  _benchmark_unchanged('hyundai_canfd_generated')
+  _benchmark_unchanged('honda_civic_touring_2016_can_generated')
+
+  _benchmark_checksum_copies('hyundai_canfd_generated')
+
+  _benchmark_idle('hyundai_canfd_generated')
+
+  _benchmark_carstate('TOYOTA_RAV4_TSS2')
+  _benchmark_carstate('HYUNDAI_SONATA')
+  _benchmark_carstate('HYUNDAI_IONIQ_5')
+  _benchmark_carstate('HONDA_CIVIC_BOSCH')
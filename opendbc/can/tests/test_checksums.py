@@ -1,6 +1,194 @@
 import copy
+import random
 import unittest
+
+import numpy as np
+
 from opendbc.can import CANPacker, CANParser
+from opendbc.can.dbc import DBC, Signal, SignalType
+from opendbc.can.tests import ALL_DBCS
+from opendbc.car.crc import CRC8BODY, CRC8H2F, CRC8J1850, CRC16_XMODEM, Checksum, ChecksumKind
+from opendbc.car.volkswagen.mqbcan import VOLKSWAGEN_MQB_MEB_CONSTANTS
+
+
+# reference implementations of each checksum, byte by byte, the declarative checksums must match them
+
+def honda_checksum(address: int, sig, d: bytearray) -> int:
+  s = 0
+  extended = address > 0x7FF
+  addr = address
+  while addr:
+    s += addr & 0xF
+    addr >>= 4
+  for i in range(len(d)):
+    x = d[i]
+    if i == len(d) - 1:
+      x >>= 4
+    s += (x & 0xF) + (x >> 4)
+  s = 8 - s
+  if extended:
+    s += 3
+  return s & 0xF
+
+
+def toyota_checksum(address: int, sig, d: bytearray) -> int:
+  s = len(d)
+  addr = address
+  while addr:
+    s += addr & 0xFF
+    addr >>= 8
+  for i in range(len(d) - 1):
+    s += d[i]
+  return s & 0xFF
+
+
+def subaru_checksum(address: int, sig, d: bytearray) -> int:
+  s = 0
+  addr = address
+  while addr:
+    s += addr & 0xFF
+    addr >>= 8
+  for i in range(1, len(d)):
+    s += d[i]
+  return s & 0xFF
+
+
+def chrysler_checksum(address: int, sig, d: bytearray) -> int:
+  checksum = 0xFF
+  for j in range(len(d) - 1):
+    curr = d[j]
+    shift = 0x80
+    for _ in range(8):
+      bit_sum = curr & shift
+      temp_chk = checksum & 0x80
+      if bit_sum:
+        bit_sum = 0x1C
+        if temp_chk:
+          bit_sum = 1
+        checksum = (checksum << 1) & 0xFF
+        temp_chk = checksum | 1
+        bit_sum ^= temp_chk
+      else:
+        if temp_chk:
+          bit_sum = 0x1D
+        checksum = (checksum << 1) & 0xFF
+        bit_sum ^= checksum
+      checksum = bit_sum & 0xFF
+      shift >>= 1
+  return (~checksum) & 0xFF
+
+
+def fca_giorgio_checksum(address: int, sig, d: bytearray) -> int:
+  crc = 0
+  for i in range(len(d) - 1):
+    crc ^= d[i]
+    crc = CRC8J1850[crc]
+  if address == 0xDE:
+    return crc ^ 0x10
+  elif address == 0x106:
+    return crc ^ 0xF6
+  elif address == 0x122:
+    return crc ^ 0xF1
+  else:
+    return crc ^ 0x0A
+
+
+def hkg_can_fd_checksum(address: int, sig, d: bytearray) -> int:
+  crc = 0
+  for i in range(2, len(d)):
+    crc = ((crc << 8) ^ CRC16_XMODEM[(crc >> 8) ^ d[i]]) & 0xFFFF
+  crc = ((crc << 8) ^ CRC16_XMODEM[(crc >> 8) ^ ((address >> 0) & 0xFF)]) & 0xFFFF
+  crc = ((crc << 8) ^ CRC16_XMODEM[(crc >> 8) ^ ((address >> 8) & 0xFF)]) & 0xFFFF
+  if len(d) == 8:
+    crc ^= 0x5F29
+  elif len(d) == 16:
+    crc ^= 0x041D
+  elif len(d) == 24:
+    crc ^= 0x819D
+  elif len(d) == 32:
+    crc ^= 0x9F5B
+  return crc
+
+
+def volkswagen_mqb_meb_checksum(address: int, sig, d: bytearray) -> int:
+  crc = 0xFF
+  for i in range(1, len(d)):
+    crc ^= d[i]
+    crc = CRC8H2F[crc]
+  counter = d[1] & 0x0F
+  const = VOLKSWAGEN_MQB_MEB_CONSTANTS.get(address)
+  if const:
+    crc ^= const[counter]
+    crc = CRC8H2F[crc]
+  return crc ^ 0xFF
+
+
+def xor_checksum(address: int, sig, d: bytearray, initial_value: int = 0) -> int:
+  checksum = initial_value
+  checksum_byte = sig.start_bit // 8
+  for i in range(len(d)):
+    if i != checksum_byte:
+      checksum ^= d[i]
+  return checksum
+
+
+def volkswagen_mlb_checksum(address: int, sig, d: bytearray) -> int:
+  xor_starting_value = {
+    0x109: 0x08, # ACC_01
+    0x111: 0x10, # TSK_05
+    0x30C: 0x0F, # ACC_02
+    0x324: 0x27, # ACC_04
+    0x10B: 0xA,  # LS_01
+    0x10D: 0x0C, # ACC_05
+    0x10F: 0x0E, # ACC_0x10F
+    0x311: 0x12, # ACC_0x311
+    0x397: 0x94, # LDW_02
+    0x10C: 0x0D, # TSK_02
+  }
+  if address in xor_starting_value:
+    return xor_checksum(address, sig, d, xor_starting_value[address])
+  else:
+    return volkswagen_mqb_meb_checksum(address, sig, d)
+
+
+def tesla_checksum(address: int, sig, d: bytearray) -> int:
+  checksum = (address & 0xFF) + ((address >> 8) & 0xFF)
+  checksum_byte = sig.start_bit // 8
+  for i in range(len(d)):
+    if i != checksum_byte:
+      checksum += d[i]
+  return checksum & 0xFF
+
+
+def body_checksum(address: int, sig, d: bytearray) -> int:
+  crc = 0xFF
+  for i in range(len(d) - 2, -1, -1):
+    crc = CRC8BODY[crc ^ d[i]]
+  return crc
+
+
+def psa_checksum(address: int, sig, d: bytearray) -> int:
+  chk_ini = {0x452: 0x4, 0x38D: 0x7, 0x42D: 0xC}.get(address, 0xB)
+  byte = sig.start_bit // 8
+  d[byte] &= 0x0F if sig.start_bit % 8 >= 4 else 0xF0
+  checksum = sum((b >> 4) + (b & 0xF) for b in d)
+  return (chk_ini - checksum) & 0xF
+
+
+CHECKSUM_FUNCTIONS = {
+  SignalType.HONDA_CHECKSUM: honda_checksum,
+  SignalType.TOYOTA_CHECKSUM: toyota_checksum,
+  SignalType.SUBARU_CHECKSUM: subaru_checksum,
+  SignalType.CHRYSLER_CHECKSUM: chrysler_checksum,
+  SignalType.FCA_GIORGIO_CHECKSUM: fca_giorgio_checksum,
+  SignalType.HKG_CAN_FD_CHECKSUM: hkg_can_fd_checksum,
+  SignalType.VOLKSWAGEN_MQB_MEB_CHECKSUM: volkswagen_mqb_meb_checksum,
+  SignalType.VOLKSWAGEN_MLB_CHECKSUM: volkswagen_mlb_checksum,
+  SignalType.XOR_CHECKSUM: xor_checksum,
+  SignalType.TESLA_CHECKSUM: tesla_checksum,
+  SignalType.BODY_CHECKSUM: body_checksum,
+  SignalType.PSA_CHECKSUM: psa_checksum,
+}
 
 
 class TestCanChecksums(unittest.TestCase):
@@ -28,6 +216,53 @@ class TestCanChecksums(unittest.TestCase):
       with self.subTest(counter=expected[counter_field]):
         assert tested[checksum_field] == expected[checksum_field]
 
+  def test_checksum_engine(self):
+    """The declarative checksums, scalar on any read-only buffer and batch, must match the checksum functions for every checksum signal"""
+    random.seed(0)
+    checked = set()
+    for dbc_name in ALL_DBCS:
+      for msg in DBC(dbc_name).msgs.values():
+        for sig in msg.sigs.values():
+          if not isinstance(sig.calc_checksum, Checksum):
+            continue
+          checked.add(sig.type)
+          payloads = np.array([[random.randrange(256) for _ in range(msg.size)] for _ in range(16)], dtype=np.uint8)
+          expected = [CHECKSUM_FUNCTIONS[sig.type](msg.address, sig, bytearray(row.tobytes())) for row in payloads]
+          with self.subTest(dbc=dbc_name, msg=msg.name):
+            assert [sig.calc_checksum(msg.address, sig, bytearray(row.tobytes())) for row in payloads] == expected
+            assert [sig.calc_checksum(msg.address, sig, row.tobytes()) for row in payloads] == expected
+            assert [sig.calc_checksum(msg.address, sig, memoryview(row.tobytes())) for row in payloads] == expected
+            assert sig.calc_checksum.batch(msg.address, sig, payloads).tolist() == expected
+    assert checked == set(CHECKSUM_FUNCTIONS)
+
+  def test_xor_sub_byte_checksum(self):
+    """A cleared XOR checksum leaves out the whole byte holding the checksum, not just the checksum's bits"""
+    random.seed(0)
+    checksum = Checksum(ChecksumKind.XOR, clear_checksum=True)
+    for start_bit, is_little_endian in ((0, True), (12, True), (7, False), (15, False)):
+      lsb = start_bit if is_little_endian else start_bit - 3
+      sig = Signal("CHECKSUM", start_bit, start_bit if not is_little_endian else start_bit + 3, lsb, 4, False, 1., 0., is_little_endian,
+                   SignalType.XOR_CHECKSUM)
+      payloads = np.array([[random.randrange(256) for _ in range(8)] for _ in range(16)], dtype=np.uint8)
+      expected = [xor_checksum(0x100, sig, bytearray(row.tobytes())) for row in payloads]
+      with self.subTest(start_bit=start_bit, is_little_endian=is_little_endian):
+        assert [checksum(0x100, sig, row.tobytes()) for row in payloads] == expected
+        assert checksum.batch(0x100, sig, payloads).tolist() == expected
+
+  def test_extended_init(self):
+    """The scalar and batch paths both start extended addresses from extended_init"""
+    random.seed(0)
+    sig = Signal("CHECKSUM", 56, 63, 56, 8, False, 1., 0., True, SignalType.XOR_CHECKSUM)
+    payloads = np.array([[random.randrange(256) for _ in range(8)] for _ in range(16)], dtype=np.uint8)
+    for kind in (ChecksumKind.XOR, ChecksumKind.SUM):
+      checksum = Checksum(kind, init=0x12, extended_init=0xA5, clear_checksum=True)
+      for address, init in ((0x100, 0x12), (0x18DAF1E8, 0xA5)):
+        with self.subTest(kind=kind, address=address):
+          scalar = [checksum(address, sig, row.tobytes()) for row in payloads]
+          assert scalar == checksum.batch(address, sig, payloads).tolist()
+          if kind == ChecksumKind.XOR:
+            assert scalar == [xor_checksum(address, sig, bytearray(row.tobytes()), init) for row in payloads]
+
   def verify_fca_giorgio_crc(self, msg_name: str, msg_addr: int, test_messages: list[bytes]):
     """Test modified SAE J1850 CRCs, with special final XOR cases for EPS messages"""
     assert len(test_messages) == 3
@@ -1,5 +1,6 @@
 import unittest
 from opendbc.can import CANParser
+from opendbc.can.dbc import DBC
 from opendbc.can.tests import ALL_DBCS
 
 
@@ -20,3 +21,16 @@ class TestDBCParser(unittest.TestCase):
     for dbc in ALL_DBCS:
       with self.subTest(dbc=dbc):
         CANParser(dbc, [], 0)
+
+  def test_multiplexed_signals(self):
+    dbc = DBC("vw_mqb")
+    sigs = dbc.name_to_msg["VIN_01"].sigs
+    assert sigs["VIN_01_MUX"].is_multiplexor
+    assert sigs["VIN_01_MUX"].multiplex_value is None
+    assert sigs["VIN_1"].multiplex_value == 0
+    assert sigs["VIN_4"].multiplex_value == 1
+    assert sigs["VIN_17"].multiplex_value == 2
+    assert not any(sig.is_multiplexor for sig in sigs.values() if sig.name != "VIN_01_MUX")
+
+    # plain signals are left alone
+    assert all(not sig.is_multiplexor and sig.multiplex_value is None for sig in dbc.name_to_msg["ESP_21"].sigs.values())
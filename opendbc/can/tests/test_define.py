@@ -1,6 +1,8 @@
 import unittest
 
 from opendbc.can import CANDefine
+from opendbc.can.dbc import DBC
+from opendbc.can.parser import value_tables
 from opendbc.can.tests import ALL_DBCS
 
 
@@ -22,6 +24,23 @@ class TestCANDefine(unittest.TestCase):
                              0: 'NORMAL'}
                             }
 
+  def test_value_tables(self):
+    """Tables are built from the VAL_ definitions, small ones can be indexed by raw value"""
+    for dbc in ALL_DBCS:
+      with self.subTest(dbc=dbc):
+        dbc_obj = DBC(dbc)
+        for val in dbc_obj.vals:
+          parts = val.def_val.split()
+          table = value_tables(dbc_obj)[val.address][val.name]
+          assert table == dict(zip([int(v) for v in parts[::2]], parts[1::2], strict=True))
+          if table.names is not None:
+            assert {v: n for v, n in enumerate(table.names) if n is not None} == table
+
+    defs = CANDefine("honda_civic_touring_2016_can_generated")
+    assert defs.dv["STEER_STATUS"]["STEER_STATUS"].names == ['NORMAL', 'DRIVER_STEERING', 'NO_TORQUE_ALERT_1', 'LOW_SPEED_LOCKOUT',
+                                                            'NO_TORQUE_ALERT_2', 'FAULT_1', 'TMP_FAULT', 'PERMANENT_FAULT']
+    assert defs.dv["STEER_STATUS"]["STEER_STATUS"].get(3.0) == 'LOW_SPEED_LOCKOUT'
+
   def test_all_dbcs(self):
     # Asserts no exceptions on all DBCs
     for dbc in ALL_DBCS:
@@ -0,0 +1,110 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+
+from opendbc.can import CANPacker, CANParser
+from opendbc.can.export import export_segment, main, segment_name
+from opendbc.car.logreader import capnp_log
+
+DBC_FILE = "honda_civic_touring_2016_can_generated"
+
+
+def write_log(fn: str, n: int = 100, bad_checksums: tuple[int, ...] = ()) -> list:
+  packer, bus1_packer = CANPacker(DBC_FILE), CANPacker(DBC_FILE)
+  events = []
+  for i in range(n):
+    frames = [
+      packer.make_can_msg("VSA_STATUS", 0, {"USER_BRAKE": i}),
+      packer.make_can_msg("STEERING_CONTROL", 0, {"STEER_TORQUE": -i}),
+      bus1_packer.make_can_msg("VSA_STATUS", 1, {"USER_BRAKE": 2 * i}),
+    ]
+    if i % 2:
+      frames.append(packer.make_can_msg("POWERTRAIN_DATA", 0, {"BRAKE_SWITCH": 1}))
+    if i in bad_checksums:
+      address, dat, src = frames[0]
+      frames[0] = (address, dat[:-1] + bytes([dat[-1] ^ 0x1]), src)
+    events.append((1_000_000 * i, frames))
+
+  with open(fn, "wb") as f:
+    for t, frames in events:
+      f.write(capnp_log.Event.new_message(logMonoTime=t, can=[{"address": a, "dat": d, "src": s} for a, d, s in frames]).to_bytes())
+  return events
+
+
+class TestExport(unittest.TestCase):
+  def test_segment_name(self):
+    assert segment_name("/data/a2a0ccea32023010|2023-07-27--13-01-19--5/rlog.zst") == "a2a0ccea32023010|2023-07-27--13-01-19--5"
+    assert segment_name("/data/route--3--qlog.bz2") == "route--3--qlog"
+
+  def test_export_segment(self):
+    """Exported columns must match what CANParser decodes frame by frame"""
+    with tempfile.TemporaryDirectory() as tmp:
+      fn = os.path.join(tmp, "segment")
+      events = write_log(fn)
+      out_dir = export_segment(fn, DBC_FILE, 0, os.path.join(tmp, "out"))
+      assert sorted(os.listdir(out_dir)) == ["POWERTRAIN_DATA", "STEERING_CONTROL", "VSA_STATUS"]
+
+      parser = CANParser(DBC_FILE, [("VSA_STATUS", 0), ("STEERING_CONTROL", 0), ("POWERTRAIN_DATA", 0)], 0)
+      expected: dict = {name: {} for name in os.listdir(out_dir)}
+      timestamps: dict = {name: [] for name in expected}
+      for t, frames in events:
+        parser.update([t, frames])
+        for name in expected:
+          timestamps[name] += parser.vl_all[name].timestamps.tolist()
+          for sig in parser.vl[name]:
+            expected[name].setdefault(sig, []).extend(parser.vl_all[name][sig].tolist())
+
+      for name, cols in expected.items():
+        np.testing.assert_array_equal(np.load(os.path.join(out_dir, name, "t.npy")), timestamps[name])
+        for sig, vals in cols.items():
+          arr = np.load(os.path.join(out_dir, name, "signals", f"{sig}.npy"), mmap_mode="r")
+          assert isinstance(arr, np.memmap)
+          np.testing.assert_array_equal(arr, vals)
+      assert len(timestamps["POWERTRAIN_DATA"]) == 50
+      assert np.load(os.path.join(out_dir, "VSA_STATUS", "checksum_ok.npy")).tolist() == [True] * 100
+
+  def test_export_checksum_ok(self):
+    """Frames failing their checksum are exported, flagged in the checksum_ok column"""
+    with tempfile.TemporaryDirectory() as tmp:
+      fn = os.path.join(tmp, "segment")
+      write_log(fn, bad_checksums=(3, 7))
+      out_dir = export_segment(fn, DBC_FILE, 0, os.path.join(tmp, "out"))
+      checksum_ok = np.load(os.path.join(out_dir, "VSA_STATUS", "checksum_ok.npy"))
+      assert np.flatnonzero(~checksum_ok).tolist() == [3, 7]
+      assert np.load(os.path.join(out_dir, "STEERING_CONTROL", "checksum_ok.npy")).all()
+      assert len(np.load(os.path.join(out_dir, "VSA_STATUS", "signals", "USER_BRAKE.npy"))) == 100
+
+  def test_export_signal_names(self):
+    """Signals named like the per-frame columns don't overwrite them"""
+    with tempfile.TemporaryDirectory() as tmp:
+      dbc_file = os.path.join(tmp, "columns.dbc")
+      with open(dbc_file, "w") as f:
+        f.write('BO_ 256 COLUMNS: 2 XXX\n SG_ t : 0|8@1+ (1,0) [0|255] "" XXX\n SG_ checksum_ok : 8|8@1+ (1,0) [0|255] "" XXX\n')
+      fn = os.path.join(tmp, "segment")
+      with open(fn, "wb") as f:
+        for i in range(10):
+          f.write(capnp_log.Event.new_message(logMonoTime=1000 * i, can=[{"address": 256, "dat": bytes([i + 1, i + 2]), "src": 0}]).to_bytes())
+
+      msg_dir = os.path.join(export_segment(fn, dbc_file, 0, os.path.join(tmp, "out")), "COLUMNS")
+      assert sorted(os.listdir(msg_dir)) == ["signals", "t.npy"]
+      np.testing.assert_array_equal(np.load(os.path.join(msg_dir, "t.npy")), np.arange(10) * 1000)
+      np.testing.assert_array_equal(np.load(os.path.join(msg_dir, "signals", "t.npy")), np.arange(10) + 1)
+      np.testing.assert_array_equal(np.load(os.path.join(msg_dir, "signals", "checksum_ok.npy")), np.arange(10) + 2)
+
+  def test_main(self):
+    with tempfile.TemporaryDirectory() as tmp:
+      logs = [os.path.join(tmp, f"segment{i}") for i in range(3)]
+      for fn in logs:
+        write_log(fn, 10)
+      out = os.path.join(tmp, "out")
+      with mock.patch.object(sys, "argv", ["export", DBC_FILE, *logs, "--output", out, "-j", "2"]):
+        main()
+      assert sorted(os.listdir(out)) == ["segment0", "segment1", "segment2"]
+      np.testing.assert_array_equal(np.load(os.path.join(out, "segment2", "VSA_STATUS", "signals", "USER_BRAKE.npy")), np.arange(10))
+
+
+if __name__ == "__main__":
+  unittest.main()
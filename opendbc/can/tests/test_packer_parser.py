@@ -1,8 +1,18 @@
+import copy
+import math
+import pickle
 import unittest
 import random
+from collections import deque
+import numpy as np
 
-from opendbc.can import CANPacker, CANParser
-from opendbc.can.tests import TEST_DBC
+from opendbc.can import CANPacker, CANParser, CANParserGroup
+from opendbc.can.dbc import SignalType
+from opendbc.can.packer import set_value
+from opendbc.can.parser import DEFAULT_HISTORY_DEPTH, LAZY_WARMUP_UPDATES, get_raw_value
+from opendbc.can.tests import ALL_DBCS, TEST_DBC
+from opendbc.car.can_definitions import CanData, CanFrameBatch
+from opendbc.car.carlog import carlog
 
 MAX_BAD_COUNTER = 5
 
@@ -47,6 +57,103 @@ class TestCanParserPacker(unittest.TestCase):
       parser.update([0, [msg]])
       assert parser.vl["CAN_FD_MESSAGE"]["COUNTER"] == ((cnt + i) % 256)
 
+  def test_packer_cache(self):
+    """A cached packer must give the same payloads, rolling counters and checksums as an uncached one"""
+    dbc_file = "honda_civic_touring_2016_can_generated"
+    packer, cached_packer = CANPacker(dbc_file), CANPacker(dbc_file, cache_size=3)
+    calls = [("VSA_STATUS", {"USER_BRAKE": 1.5}), ("VSA_STATUS", {"USER_BRAKE": 1.5, "COUNTER": 2}),
+             ("STEERING_CONTROL", {"STEER_TORQUE": 10}), ("STEERING_CONTROL", {"UNKNOWN": 1})]
+    for i in range(200):
+      name, values = calls[i % len(calls)] if i % 3 else calls[0]
+      assert cached_packer.make_can_msg(name, 0, values) == packer.make_can_msg(name, 0, values), (i, name, values)
+      assert cached_packer.counters == packer.counters
+
+    # calls with unknown signals are not cached
+    assert len(cached_packer.cache) == 3
+    assert cached_packer.cache_hits + cached_packer.cache_misses == 200
+    assert 0.5 < cached_packer.cache_hit_rate < 1
+    assert packer.cache_hit_rate == 0 and len(packer.cache) == 0
+
+    # the least recently used entry is evicted
+    for i in range(10):
+      cached_packer.make_can_msg("STEERING_CONTROL", 0, {"STEER_TORQUE": i})
+    assert list(cached_packer.cache) == [(0xe4, (("STEER_TORQUE", i),)) for i in (7, 8, 9)]
+
+  def test_pack_many(self):
+    dbc_file = "honda_civic_touring_2016_can_generated"
+    packer, many_packer = CANPacker(dbc_file), CANPacker(dbc_file)
+    steer = many_packer.message("STEERING_CONTROL")
+    assert many_packer.message(steer.address) is steer
+    with self.assertRaises(KeyError):
+      many_packer.message("UNKNOWN")
+
+    for i in range(50):
+      msgs = [("STEERING_CONTROL", 0, {"STEER_TORQUE": i}), (0x1a4, 1, {"USER_BRAKE": i % 10}), ("LKAS_HUD", 2, {"BEEP": 1, "COUNTER": i})]
+      expected = [packer.make_can_msg(*m) for m in msgs]
+      assert many_packer.pack_many([(steer, 0, {"STEER_TORQUE": i}), *msgs[1:], ("UNKNOWN", 0, {})]) == expected
+      assert many_packer.counters == packer.counters
+
+  def test_compiled_encoders(self):
+    """Compiled encoders must be byte-identical with packing each signal through set_value"""
+    def reference_pack(msg, values, counters):
+      dat = bytearray(msg.size)
+      counter_set = False
+      for name, value in values.items():
+        sig = msg.sigs[name]
+        ival = int(math.floor((value - sig.offset) / sig.factor + 0.5))
+        set_value(dat, sig, (1 << sig.size) + ival if ival < 0 else ival)
+        if sig.type == SignalType.COUNTER or sig.name == "COUNTER":
+          counters[msg.address] = int(value)
+          counter_set = True
+      sig_counter = next((s for s in msg.sigs.values() if s.type == SignalType.COUNTER or s.name == "COUNTER"), None)
+      if sig_counter and not counter_set:
+        set_value(dat, sig_counter, counters.setdefault(msg.address, 0))
+        counters[msg.address] = (counters[msg.address] + 1) % (1 << sig_counter.size)
+      sig_checksum = next((s for s in msg.sigs.values() if s.type > SignalType.COUNTER), None)
+      if sig_checksum and sig_checksum.calc_checksum:
+        set_value(dat, sig_checksum, sig_checksum.calc_checksum(msg.address, sig_checksum, dat))
+      return dat
+
+    for dbc in ALL_DBCS:
+      with self.subTest(dbc=dbc):
+        packer = CANPacker(dbc)
+        counters: dict[int, int] = {}
+        for msg in packer.dbc.msgs.values():
+          for _ in range(3):
+            # random subsets in random order, with values in and out of range
+            sigs = random.sample(list(msg.sigs.values()), random.randint(0, len(msg.sigs)))
+            values = {sig.name: random.randint(-(1 << sig.size), 1 << sig.size) * sig.factor + sig.offset for sig in sigs}
+            assert packer.pack(msg.address, values) == reference_pack(msg, values, counters), (msg.name, values)
+
+  def test_pack_batch(self):
+    """Every row of a batch must match packing the same values one at a time, including counters and checksums"""
+    for dbc in ALL_DBCS:
+      with self.subTest(dbc=dbc):
+        packer, batch_packer = CANPacker(dbc), CANPacker(dbc)
+        for msg in packer.dbc.msgs.values():
+          sigs = [sig for sig in msg.sigs.values() if random.random() < 0.5]
+          n = 5
+          values = {sig.name: np.array([random.randint(-(1 << min(sig.size, 52)), 1 << min(sig.size, 52)) * sig.factor + sig.offset for _ in range(n)])
+                    for sig in sigs}
+          payloads = batch_packer.pack_batch(msg.name, values, n)
+          assert payloads.shape == (n, msg.size)
+          for i in range(n):
+            assert payloads[i].tobytes() == packer.pack(msg.address, {k: v[i] for k, v in values.items()}), (msg.name, i)
+        assert batch_packer.counters == packer.counters
+
+    # scalars are broadcast
+    packer = CANPacker("toyota_new_mc_pt_generated")
+    payloads = packer.pack_batch("ACC_CONTROL", {"ACCEL_CMD": np.linspace(-3, 2, 10), "ALLOW_LONG_PRESS": 1})
+    parser = CANParser("toyota_new_mc_pt_generated", [("ACC_CONTROL", 0)], 0)
+    ret = parser.decode_batch(np.arange(10), np.full(10, parser.dbc.name_to_msg["ACC_CONTROL"].address), np.zeros(10), payloads)
+    assert ret["ACC_CONTROL"].vals["ALLOW_LONG_PRESS"].tolist() == [1] * 10
+
+    # addresses straight out of numpy arrays are looked up like ints
+    address = np.uint32(parser.dbc.name_to_msg["ACC_CONTROL"].address)
+    np_packer, int_packer = CANPacker("toyota_new_mc_pt_generated"), CANPacker("toyota_new_mc_pt_generated")
+    np.testing.assert_array_equal(np_packer.pack_batch(address, {"ALLOW_LONG_PRESS": 1}, 3), int_packer.pack_batch(int(address), {"ALLOW_LONG_PRESS": 1}, 3))
+    assert np_packer.make_can_msg(address, 0, {"ACCEL_CMD": 1}) == int_packer.make_can_msg(int(address), 0, {"ACCEL_CMD": 1})
+
   def test_parser_can_valid(self):
     msgs = [("CAN_FD_MESSAGE", 10), ]
     packer = CANPacker(TEST_DBC)
@@ -126,17 +233,40 @@ class TestCanParserPacker(unittest.TestCase):
 
     rx_steering_msg({"STEER_TORQUE": 100}, bad_checksum=False)
     assert parser.vl["STEERING_CONTROL"]["STEER_TORQUE"] == 100
-    assert parser.vl_all["STEERING_CONTROL"]["STEER_TORQUE"] == [100]
+    assert parser.vl_all["STEERING_CONTROL"]["STEER_TORQUE"].tolist() == [100]
 
     for _ in range(5):
       rx_steering_msg({"STEER_TORQUE": 200}, bad_checksum=True)
       assert parser.vl["STEERING_CONTROL"]["STEER_TORQUE"] == 100
-      assert parser.vl_all["STEERING_CONTROL"]["STEER_TORQUE"] == []
+      assert parser.vl_all["STEERING_CONTROL"]["STEER_TORQUE"].tolist() == []
 
     # Even if CANParser doesn't update instantaneous vl, make sure it didn't add invalid values to vl_all
     rx_steering_msg({"STEER_TORQUE": 300}, bad_checksum=False)
     assert parser.vl["STEERING_CONTROL"]["STEER_TORQUE"] == 300
-    assert parser.vl_all["STEERING_CONTROL"]["STEER_TORQUE"] == [300]
+    assert parser.vl_all["STEERING_CONTROL"]["STEER_TORQUE"].tolist() == [300]
+
+  def test_parser_checksum_zero_copy(self):
+    """The checksum is computed once per frame, on the received payload itself"""
+    dbc_file = "hyundai_canfd_generated"
+    packer = CANPacker(dbc_file)
+    parser = CANParser(dbc_file, [("LKAS", 0)], 0)
+    state = parser.message_states[parser.dbc.name_to_msg["LKAS"].address]
+    i = next(i for i, sig in enumerate(state.signals) if sig.calc_checksum is not None)
+    calc_checksum = state.signals[i].calc_checksum
+    received = []
+
+    def record(address, sig, dat):
+      received.append(dat)
+      return calc_checksum(address, sig, dat)
+
+    state.signals[i] = copy.copy(state.signals[i])
+    state.signals[i].calc_checksum = record
+    msgs = [packer.make_can_msg("LKAS", 0, {"StrTqReqVal": j}) for j in range(10)]
+    for t, msg in enumerate(msgs):
+      parser.update([t, [msg]])
+    assert len(received) == len(msgs)
+    assert all(dat is msg[1] for dat, msg in zip(received, msgs, strict=True))
+    assert parser.vl["LKAS"]["StrTqReqVal"] == 9
 
   def test_packer_parser(self):
     msgs = [
@@ -175,6 +305,174 @@ class TestCanParserPacker(unittest.TestCase):
         for sig in ("STEER_TORQUE", "STEER_TORQUE_REQUEST", "COUNTER", "CHECKSUM"):
           assert parser.vl["STEERING_CONTROL"][sig] == parser.vl[228][sig]
 
+  def test_compiled_decoders(self):
+    """Compiled decoders must be bit-exact with get_raw_value, including short and long payloads"""
+    for dbc in ALL_DBCS:
+      with self.subTest(dbc=dbc):
+        parser = CANParser(dbc, [], 0)
+        for msg in parser.dbc.msgs.values():
+          parser._add_message(msg.address)
+          state = parser.message_states[msg.address]
+          for size in (msg.size, msg.size, msg.size - 1, msg.size + 1):
+            dat = bytes(random.randrange(256) for _ in range(max(size, 0)))
+            expected = []
+            for sig in state.signals:
+              tmp = get_raw_value(dat, sig)
+              if sig.is_signed:
+                tmp -= ((tmp >> (sig.size - 1)) & 0x1) * (1 << sig.size)
+              expected.append(tmp)
+            assert state.decode(dat) == expected, (msg.name, dat.hex())
+
+  def test_decode_batch(self):
+    """Batch decoding must match the per-frame decoder, for the parser's bus only"""
+    for dbc in ("honda_civic_touring_2016_can_generated", "toyota_new_mc_pt_generated", "hyundai_canfd_generated", TEST_DBC):
+      with self.subTest(dbc=dbc):
+        parser = CANParser(dbc, [], 1)
+        for msg in parser.dbc.msgs.values():
+          parser._add_message(msg.address)
+        msgs = list(parser.dbc.msgs.values())
+
+        n = 2000
+        timestamps = np.arange(n, dtype=np.uint64) * 1000
+        addresses = np.array([random.choice(msgs).address for _ in range(n)])
+        buses = np.random.randint(0, 3, n)
+        payloads = np.zeros((n, 64), dtype=np.uint8)
+        for i, addr in enumerate(addresses):
+          payloads[i, :parser.dbc.msgs[addr].size] = np.random.randint(0, 256, parser.dbc.msgs[addr].size)
+
+        ret = parser.decode_batch(timestamps, addresses, buses, payloads)
+        for msg in msgs:
+          state = parser.message_states[msg.address]
+          rows = [i for i in range(n) if addresses[i] == msg.address and buses[i] == 1]
+          cols = ret[msg.name]
+          assert cols is ret[msg.address]
+          assert cols.timestamps.tolist() == timestamps[rows].tolist()
+          for i, sig in enumerate(state.signals):
+            expected = [v[i] * sig.factor + sig.offset for v in (state.decode(bytes(payloads[r, :msg.size])) for r in rows)]
+            assert cols.vals[sig.name].tolist() == expected, (msg.name, sig.name)
+            if sig.calc_checksum is not None:
+              expected = [sig.calc_checksum(msg.address, sig, bytes(payloads[r, :msg.size])) == cols.vals[sig.name][j] for j, r in enumerate(rows)]
+              assert cols.checksum_ok.tolist() == expected, msg.name
+
+  def test_decode_batch_short_frame(self):
+    """Frames shorter than the message are invalid in batch decoding, instead of decoding their zero padding"""
+    dbc_file = "hyundai_canfd_generated"
+    packer = CANPacker(dbc_file)
+    parser = CANParser(dbc_file, [("LKAS", 0)], 0)
+    msg = parser.dbc.name_to_msg["LKAS"]
+    payloads = np.zeros((3, 64), dtype=np.uint8)
+    for i in range(3):
+      dat = packer.make_can_msg("LKAS", 0, {"COUNTER": i})[1]
+      payloads[i, :msg.size] = np.frombuffer(dat, dtype=np.uint8)
+    lengths = np.array([msg.size, msg.size // 2, msg.size])
+    payloads[1, msg.size // 2:] = 0
+
+    cols = parser.decode_batch(np.arange(3), np.full(3, msg.address), np.zeros(3), payloads, lengths)["LKAS"]
+    assert cols.checksum_ok.tolist() == [True, False, True]
+    assert cols.vals["COUNTER"][[0, 2]].tolist() == [0, 2]
+    assert all(np.isnan(vals[1]) for vals in cols.vals.values())
+
+  def test_lazy_decoding(self):
+    """Lazy parsers only decode read signals after warm-up, but must always return the same values"""
+    dbc_file = "honda_civic_touring_2016_can_generated"
+    msgs = [("STEERING_CONTROL", 0), ("VSA_STATUS", 0)]
+    packer = CANPacker(dbc_file)
+    parser = CANParser(dbc_file, msgs, 0, lazy=True)
+    full_parser = CANParser(dbc_file, msgs, 0)
+    state = parser.message_states[parser.dbc.name_to_msg["STEERING_CONTROL"].address]
+
+    for i in range(LAZY_WARMUP_UPDATES + 10):
+      can_msgs = [packer.make_can_msg("STEERING_CONTROL", 0, {"STEER_TORQUE": i + j, "STEER_TORQUE_REQUEST": j % 2}) for j in range(3)]
+      can_msgs.append(packer.make_can_msg("VSA_STATUS", 0, {"USER_BRAKE": i}))
+      parser.update([0, can_msgs])
+      full_parser.update([0, can_msgs])
+      assert parser.vl["STEERING_CONTROL"]["STEER_TORQUE"] == full_parser.vl["STEERING_CONTROL"]["STEER_TORQUE"]
+
+    # only the read signal plus counter and checksum are decoded after warm-up
+    sig_idxs = {state.signals[idx].name for idx in state.active}
+    assert sig_idxs == {"STEER_TORQUE", "COUNTER", "CHECKSUM"}
+
+    # new reads are decoded on demand, including the current update's history
+    np.testing.assert_array_equal(parser.vl_all["STEERING_CONTROL"]["STEER_TORQUE_REQUEST"], full_parser.vl_all["STEERING_CONTROL"]["STEER_TORQUE_REQUEST"])
+    assert parser.ts_nanos["VSA_STATUS"]["USER_BRAKE"] == full_parser.ts_nanos["VSA_STATUS"]["USER_BRAKE"]
+    assert parser.vl["VSA_STATUS"]["USER_BRAKE"] == full_parser.vl["VSA_STATUS"]["USER_BRAKE"]
+    assert "STEER_TORQUE_REQUEST" in {state.signals[idx].name for idx in state.active}
+
+    # copying a whole message publishes every signal
+    for msg, _ in msgs:
+      assert copy.copy(parser.vl[msg]) == full_parser.vl[msg]
+      assert dict(parser.ts_nanos[msg]) == full_parser.ts_nanos[msg]
+    assert len(state.active) == len(state.signals)
+
+  def test_parser_group(self):
+    """A parser group must leave each parser in the same state as updating it directly"""
+    dbc_file = "honda_civic_touring_2016_can_generated"
+    msgs = [("STEERING_CONTROL", 50), ("VSA_STATUS", 50)]
+    packer = CANPacker(dbc_file)
+
+    def make_parsers():
+      return {"pt": CANParser(dbc_file, msgs, 0), "cam": CANParser(dbc_file, msgs[:1], 2), "empty": CANParser(dbc_file, [], 1)}
+
+    parsers, group_parsers = make_parsers(), make_parsers()
+    group = CANParserGroup(group_parsers)
+
+    for i in range(200):
+      t = int(0.02 * i * 1e9)
+      buses = [b for b in (0, 1, 2) if random.random() < 0.8]
+      can_msgs = [packer.make_can_msg(random.choice(msgs)[0], b, {"STEER_TORQUE": i, "USER_BRAKE": i % 50}) for b in buses]
+      updated = group.update([t, can_msgs])
+      for key, cp in parsers.items():
+        gcp = group_parsers[key]
+        assert cp.update([t, can_msgs]) == updated[key]
+        assert (cp.can_valid, cp.bus_timeout, cp.last_nonempty_nanos) == (gcp.can_valid, gcp.bus_timeout, gcp.last_nonempty_nanos)
+        for msg in cp.vl:
+          assert (cp.vl[msg], cp.ts_nanos[msg]) == (gcp.vl[msg], gcp.ts_nanos[msg])
+          assert {k: v.tolist() for k, v in cp.vl_all[msg].items()} == {k: v.tolist() for k, v in gcp.vl_all[msg].items()}
+
+    # messages added on first access are routed too
+    group_parsers["empty"].vl["VSA_STATUS"]
+    group.update([0, [packer.make_can_msg("VSA_STATUS", 1, {"USER_BRAKE": 10})]])
+    assert group_parsers["empty"].vl["VSA_STATUS"]["USER_BRAKE"] == 10
+
+  def test_frame_batch(self):
+    """Updating with a CanFrameBatch must match updating with the same frames in the list format"""
+    dbc_file = "honda_civic_touring_2016_can_generated"
+    msgs = [("STEERING_CONTROL", 50), ("VSA_STATUS", 50)]
+    packer = CANPacker(dbc_file)
+
+    def make_parsers():
+      return {"pt": CANParser(dbc_file, msgs, 0), "cam": CANParser(dbc_file, msgs[:1], 2)}
+
+    parsers, batch_parsers = make_parsers(), make_parsers()
+    for cp in (*parsers.values(), *batch_parsers.values()):
+      cp.collect_stats = True
+    group = CANParserGroup(batch_parsers)
+
+    for i in range(100):
+      packets = []
+      for j in range(3):
+        t = int((0.02 * i + 0.005 * j) * 1e9)
+        can_msgs = [packer.make_can_msg(random.choice(msgs)[0], b, {"STEER_TORQUE": i, "USER_BRAKE": (i + j) % 50})
+                    for b in (0, 1, 2) if random.random() < 0.8]
+        packets.append((t, can_msgs))
+
+      batch = CanFrameBatch.from_packets(packets)
+      assert batch.packets() == [(t, [CanData(*m) for m in can_msgs]) for t, can_msgs in packets if can_msgs]
+      updated = group.update(batch)
+      for key, cp in parsers.items():
+        bcp = batch_parsers[key]
+        assert cp.update(packets) == updated[key]
+        assert (cp.can_valid, cp.bus_timeout, cp.last_nonempty_nanos) == (bcp.can_valid, bcp.bus_timeout, bcp.last_nonempty_nanos)
+        for msg in cp.vl:
+          assert (cp.vl[msg], cp.ts_nanos[msg]) == (bcp.vl[msg], bcp.ts_nanos[msg])
+          assert {k: v.tolist() for k, v in cp.vl_all[msg].items()} == {k: v.tolist() for k, v in bcp.vl_all[msg].items()}
+
+    for key, cp in parsers.items():
+      stats, batch_stats = cp.stats(), batch_parsers[key].stats()
+      for msg_stats in (*stats["messages"].values(), *batch_stats["messages"].values()):
+        msg_stats.pop("decode_nanos")
+      assert stats == batch_stats
+
   def test_scale_offset(self):
     """Test that both scale and offset are correctly preserved"""
     dbc_file = "honda_civic_touring_2016_can_generated"
@@ -255,6 +553,379 @@ class TestCanParserPacker(unittest.TestCase):
     send_msg()
     assert not parser.bus_timeout
 
+  def test_timeout_logs(self):
+    """Every timed out message is logged, not only the first one"""
+    dbc_file = "honda_civic_touring_2016_can_generated"
+    msgs = [("STEERING_CONTROL", 100), ("VSA_STATUS", 50), ("POWERTRAIN_DATA", 100)]
+    packer = CANPacker(dbc_file)
+    parser = CANParser(dbc_file, msgs, 0)
+    for i in range(10):
+      parser.update([i * 10_000_000, [packer.make_can_msg(m, 0, {}) for m, _ in msgs]])
+    assert parser.can_valid
+
+    # only POWERTRAIN_DATA keeps being received
+    with self.assertLogs(carlog, "WARNING") as logs:
+      parser.update([2_000_000_000, [packer.make_can_msg("POWERTRAIN_DATA", 0, {})]])
+      parser.can_valid
+    assert sorted(line.split("CANParser: ")[1].split()[1] for line in logs.output) == ["STEERING_CONTROL", "VSA_STATUS"]
+
+  def test_incremental_validity(self):
+    """Incrementally tracked can_valid and bus_timeout must match checking every message"""
+    dbc_file = "honda_civic_touring_2016_can_generated"
+    msgs = [("STEERING_CONTROL", 0), ("VSA_STATUS", 50), ("POWERTRAIN_DATA", 100), ("GEARBOX_AUTO", float("nan"))]
+    packer = CANPacker(dbc_file)
+    parser = CANParser(dbc_file, msgs, 0)
+    can_invalid_cnt = parser.can_invalid_cnt
+
+    t = 0
+    for i in range(3000):
+      t += int(random.choice((0.005, 0.01, 0.01, 0.2)) * 1e9)
+      can_msgs = []
+      for msg, _ in msgs:
+        if random.random() < (0.99 if i < 1500 else 0.6):
+          counter = None if random.random() < 0.95 else random.randrange(4)
+          can_msgs.append(packer.make_can_msg(msg, 0, {} if counter is None else {"COUNTER": counter}))
+      parser.update([t, can_msgs])
+
+      states = parser.message_states.values()
+      threshold = min([500 * 1_000_000] + [st.timeout_threshold for st in states if st.timeout_threshold > 0])
+      bus_timeout = (t - parser.last_nonempty_nanos) > threshold and not all(st.ignore_alive for st in states)
+      valid = all(st.valid(t, bus_timeout) for st in states)
+      counters_valid = all(st.counter_fail < MAX_BAD_COUNTER for st in states)
+      can_invalid_cnt = 0 if valid else min(can_invalid_cnt + 1, 5)
+
+      assert parser.bus_timeout == bus_timeout
+      assert parser.can_valid == (can_invalid_cnt < 5 and counters_valid)
+    assert any(st.frequency > 0 for st in states)
+
+  def test_frequency_estimation(self):
+    """The running frequency estimate must learn what a window of the last 500 timestamps would"""
+    dbc_file = "honda_civic_touring_2016_can_generated"
+    packer = CANPacker(dbc_file)
+    for period, burst in ((0.01, 1), (0.05, 1), (0.5, 1), (1.5, 1), (0.01, 700)):
+      with self.subTest(period=period, burst=burst):
+        parser = CANParser(dbc_file, [("VSA_STATUS", 0)], 0)
+        state = parser.message_states[parser.dbc.name_to_msg["VSA_STATUS"].address]
+        timestamps: deque = deque(maxlen=500)
+        frequency, t = 0.0, 0
+        for i in range(1000):
+          # bursts of frames with identical timestamps
+          if i % burst == 0:
+            t += int(period * random.uniform(0.9, 1.1) * 1e9)
+          parser.update([t, [packer.make_can_msg("VSA_STATUS", 0, {})]])
+          timestamps.append(t)
+          if frequency < 1e-5 and len(timestamps) >= 3:
+            dt = (timestamps[-1] - timestamps[0]) * 1e-9
+            if (dt > 1.0 or len(timestamps) >= 500) and dt != 0:
+              frequency = min(len(timestamps) / dt, 100.0)
+          assert state.frequency == frequency
+        assert frequency > 0
+        assert state.timeout_threshold == (1_000_000_000 / frequency) * 10
+
+  def test_stats(self):
+    dbc_file = "honda_civic_touring_2016_can_generated"
+    packer = CANPacker(dbc_file)
+    parser = CANParser(dbc_file, [("VSA_STATUS", 50)], 0)
+    group_parser = CANParser(dbc_file, [("VSA_STATUS", 50)], 0)
+    group = CANParserGroup({"pt": group_parser})
+
+    def frames(i):
+      addr, dat, bus = packer.make_can_msg("VSA_STATUS", 0, {"COUNTER": i % 4})
+      if i == 10:
+        dat = bytes([dat[0] ^ 1]) + dat[1:]  # bad checksum
+      if i == 20:
+        addr, dat, bus = packer.make_can_msg("VSA_STATUS", 0, {"COUNTER": (i + 2) % 4})  # skipped counter
+      return [(addr, dat, bus), (0x123, b"\x00" * 8, 0), (0x124, b"\x00" * 8, 1)]
+
+    for i in range(50):
+      if i == 40:
+        parser.collect_stats = group_parser.collect_stats = False
+      if i == 5:
+        parser.collect_stats = group_parser.collect_stats = True
+      t = i * 20_000_000 + (100_000_000 if i == 30 else 0)
+      parser.update([t, frames(i)])
+      group.update([t, frames(i)])
+
+    for cp in (parser, group_parser):
+      stats = cp.stats()
+      msg_stats = stats["messages"]["VSA_STATUS"]
+      assert msg_stats["frame_cnt"] == 35
+      assert msg_stats["checksum_fail_cnt"] == 1
+      assert msg_stats["counter_fail_cnt"] == 2  # the skipped counter and the one after it
+      assert msg_stats["frequency"] == 50
+      assert msg_stats["max_gap_nanos"] == 120_000_000
+      assert msg_stats["decode_nanos"] > 0
+      # two 8 byte frames on the bus per update
+      self.assertAlmostEqual(stats["bus_frame_rate"], 35 * 2 / (34 * 0.02))
+      self.assertAlmostEqual(stats["bus_load"], 35 * 2 * (47 + 64) / (34 * 0.02) / 500_000)
+
+      cp.reset_stats()
+      assert cp.stats()["messages"]["VSA_STATUS"]["frame_cnt"] == 0
+      assert cp.stats()["bus_frame_rate"] == 0
+
+  def test_unchanged_payload(self):
+    dbc_file = "toyota_new_mc_pt_generated"
+    packer = CANPacker(dbc_file)
+    parser = CANParser(dbc_file, [("PCM_CRUISE_2", 0)], 0)
+    full_parser = CANParser(dbc_file, [("PCM_CRUISE_2", 0)], 0)
+    full_parser.message_states[parser.dbc.name_to_msg["PCM_CRUISE_2"].address].has_counter = True  # always decode
+    parser.collect_stats = True
+    parser.subscribe("PCM_CRUISE_2", "SET_SPEED")
+
+    for i in range(40):
+      address, dat, bus = packer.make_can_msg("PCM_CRUISE_2", 0, {"SET_SPEED": i // 10})
+      if i % 10 == 5:
+        dat = dat[:-1] + bytes([dat[-1] ^ 0xFF])  # bad checksum
+      frames = [(address, dat, bus)] * 2
+      for cp in (parser, full_parser):
+        cp.update([i * 10_000_000, frames])
+      assert parser.vl["PCM_CRUISE_2"] == full_parser.vl["PCM_CRUISE_2"]
+      assert parser.ts_nanos["PCM_CRUISE_2"] == full_parser.ts_nanos["PCM_CRUISE_2"]
+      np.testing.assert_array_equal(parser.vl_all["PCM_CRUISE_2"]["SET_SPEED"], full_parser.vl_all["PCM_CRUISE_2"]["SET_SPEED"])
+      assert parser.changed == ([("PCM_CRUISE_2", "SET_SPEED")] if i % 10 == 0 else [])
+
+    stats = parser.stats()["messages"]["PCM_CRUISE_2"]
+    assert stats["frame_cnt"] == 80
+    assert stats["checksum_fail_cnt"] == 8
+    # only the first frame of each set speed and the bad frames are decoded
+    assert stats["unchanged_cnt"] == 80 - 4 - 8
+
+  def test_snapshot_restore(self):
+    """A parser restored from a snapshot must behave like the one that replayed the log up to that point"""
+    dbc_file = "honda_civic_touring_2016_can_generated"
+    msgs = [("VSA_STATUS", 0), ("STEERING_CONTROL", 0), ("POWERTRAIN_DATA", 100)]
+    packer = CANPacker(dbc_file)
+
+    def frames(i):
+      ret = [packer.make_can_msg("VSA_STATUS", 0, {"USER_BRAKE": i % 100})]
+      # static counter, invalid after a few frames
+      ret.append(packer.make_can_msg("STEERING_CONTROL", 0, {"STEER_TORQUE": i, "COUNTER": 0}))
+      if i < 250:
+        ret.append(packer.make_can_msg("POWERTRAIN_DATA", 0, {"BRAKE_SWITCH": i % 2}))
+      return ret
+
+    for lazy in (False, True):
+      with self.subTest(lazy=lazy):
+        parser = CANParser(dbc_file, msgs, 0, lazy=lazy)
+        for i in range(200):
+          parser.update([i * 10_000_000, frames(i)])
+          parser.vl_all["POWERTRAIN_DATA"]["BRAKE_SWITCH"]
+        parser.vl["VSA_STATUS"]["USER_BRAKE"]
+
+        restored = CANParser(dbc_file, msgs[:2], 0, lazy=lazy)
+        restored.restore(pickle.loads(pickle.dumps(parser.snapshot())))
+        assert restored.vl["VSA_STATUS"]["USER_BRAKE"] == parser.vl["VSA_STATUS"]["USER_BRAKE"]
+        assert restored.vl["VSA_STATUS"] == parser.vl["VSA_STATUS"]
+        assert restored.ts_nanos["VSA_STATUS"] == parser.ts_nanos["VSA_STATUS"]
+        assert restored.vl_all["POWERTRAIN_DATA"].recent("BRAKE_SWITCH", 2).tolist() == [0, 1]
+
+        for i in range(200, 400):
+          can_strings = [i * 10_000_000, frames(i)]
+          assert restored.update(can_strings) == parser.update(can_strings)
+          assert restored.can_valid == parser.can_valid
+          assert restored.bus_timeout == parser.bus_timeout
+          for name, _ in msgs:
+            assert restored.vl[name] == parser.vl[name]
+            assert restored.ts_nanos[name] == parser.ts_nanos[name]
+            assert restored.message_states[parser.dbc.name_to_msg[name].address].frequency == parser.message_states[parser.dbc.name_to_msg[name].address].frequency
+
+    with self.assertRaises(RuntimeError):
+      CANParser(dbc_file, msgs, 1).restore(parser.snapshot())
+
+  def test_snapshot_restore_events(self):
+    """After a seek, subscriptions, groups and stats start from the snapshot, not from the state before the seek"""
+    dbc_file = "honda_civic_touring_2016_can_generated"
+    packer = CANPacker(dbc_file)
+    parser = CANParser(dbc_file, [("SCM_BUTTONS", 0), ("VSA_STATUS", 0)], 0)
+    parser.subscribe("SCM_BUTTONS", "CRUISE_BUTTONS")
+    parser.add_group("scan", ["SCM_BUTTONS"], "VSA_STATUS")
+    vsa_status = parser.dbc.name_to_msg["VSA_STATUS"].address
+
+    parser.update([0, [packer.make_can_msg("SCM_BUTTONS", 0, {"CRUISE_BUTTONS": 3})]])
+    assert parser.changed == [("SCM_BUTTONS", "CRUISE_BUTTONS")]
+    snapshot = parser.snapshot()
+
+    parser.collect_stats = True
+    parser.update([10_000_000, [packer.make_can_msg("SCM_BUTTONS", 0, {"CRUISE_BUTTONS": 4})]])
+    assert parser.changed == [("SCM_BUTTONS", "CRUISE_BUTTONS")]
+
+    parser.restore(snapshot)
+    assert parser.changed == []
+    assert parser.stats()["messages"]["SCM_BUTTONS"]["frame_cnt"] == 0
+    parser.update([10_000_000, [packer.make_can_msg("VSA_STATUS", 0, {})]])
+    assert parser.completed == {"scan": [vsa_status]}
+    parser.update([20_000_000, [packer.make_can_msg("SCM_BUTTONS", 0, {"CRUISE_BUTTONS": 3})]])
+    assert parser.changed == []
+    parser.update([30_000_000, [packer.make_can_msg("SCM_BUTTONS", 0, {"CRUISE_BUTTONS": 4})]])
+    assert parser.changed == [("SCM_BUTTONS", "CRUISE_BUTTONS")]
+    assert parser.stats()["messages"]["SCM_BUTTONS"]["frame_cnt"] == 2
+
+  def test_multiplexed_signals(self):
+    """Only the branch selected by the multiplexor is decoded, other branches keep their values"""
+    packer = CANPacker("vw_mqb")
+    vin = "WVWZZZAUZJW123456"
+    for lazy in (False, True):
+      with self.subTest(lazy=lazy):
+        parser = CANParser("vw_mqb", [("VIN_01", 1)], 0, lazy=lazy)
+        address = parser.dbc.name_to_msg["VIN_01"].address
+        parser.subscribe("VIN_01", "VIN_4")
+
+        frames = []
+        for mux, chars in enumerate((vin[:3], vin[3:10], vin[10:])):
+          first = (1, 4, 11)[mux]
+          frames.append(packer.make_can_msg("VIN_01", 0, {"VIN_01_MUX": mux, **{f"VIN_{first + i}": ord(c) for i, c in enumerate(chars)}}))
+
+        for i, frame in enumerate(frames):
+          parser.update([(i + 1) * 1000, [frame]])
+          assert parser.changed == ([("VIN_01", "VIN_4")] if i == 1 else [])
+        assert "".join(chr(int(parser.vl["VIN_01"][f"VIN_{i}"])) for i in range(1, 18)) == vin
+        assert parser.ts_nanos["VIN_01"]["VIN_1"] == 1000
+        assert parser.ts_nanos["VIN_01"]["VIN_4"] == 2000
+        assert parser.ts_nanos["VIN_01"]["VIN_17"] == 3000
+        assert parser.vl_all["VIN_01"]["VIN_17"].tolist() == [ord(vin[-1])]
+        # history rows carry the values of the other branches
+        assert parser.vl_all["VIN_01"].recent("VIN_1", 3).tolist() == [ord(vin[0])] * 3
+        assert parser.vl_all["VIN_01"].recent("VIN_4", 3).tolist() == [0, ord(vin[3]), ord(vin[3])]
+
+        cols = parser.decode_batch(np.array([1, 2, 3]), np.array([address] * 3), np.array([0] * 3),
+                                   np.array([list(frame[1]) for frame in frames], dtype=np.uint8))
+        np.testing.assert_array_equal(cols["VIN_01"].vals["VIN_01_MUX"], [0, 1, 2])
+        np.testing.assert_array_equal(cols["VIN_01"].vals["VIN_4"], [np.nan, ord(vin[3]), np.nan])
+
+  def test_signal_handle(self):
+    dbc_file = "honda_civic_touring_2016_can_generated"
+    packer = CANPacker(dbc_file)
+    for lazy in (False, True):
+      with self.subTest(lazy=lazy):
+        parser = CANParser(dbc_file, [("VSA_STATUS", 0)], 0, lazy=lazy)
+        user_brake = parser.signal("VSA_STATUS", "USER_BRAKE")
+        steer_torque = parser.signal("STEERING_CONTROL", "STEER_TORQUE")
+        assert user_brake.value == 0 and user_brake.nanos == 0 and not user_brake.updated
+
+        for i in range(LAZY_WARMUP_UPDATES + 10):
+          frames = [packer.make_can_msg("VSA_STATUS", 0, {"USER_BRAKE": i % 100})]
+          if i % 2:
+            frames.append(packer.make_can_msg("STEERING_CONTROL", 0, {"STEER_TORQUE": -i}))
+          parser.update([i * 1000, frames])
+
+          assert user_brake.value == parser.vl["VSA_STATUS"]["USER_BRAKE"] == i % 100
+          assert user_brake.nanos == parser.ts_nanos["VSA_STATUS"]["USER_BRAKE"] == i * 1000
+          assert user_brake.updated
+          assert steer_torque.value == parser.vl["STEERING_CONTROL"]["STEER_TORQUE"]
+          assert steer_torque.nanos == parser.ts_nanos["STEERING_CONTROL"]["STEER_TORQUE"]
+          assert steer_torque.updated == bool(i % 2)
+
+        parser.update([0, []])
+        assert not user_brake.updated
+
+  def test_enums(self):
+    dbc_file = "honda_civic_touring_2016_can_generated"
+    packer = CANPacker(dbc_file)
+    frames = [packer.make_can_msg("STEER_STATUS", 0, {"STEER_STATUS": 3, "STEER_TORQUE_SENSOR": -12}),
+              packer.make_can_msg("GEARBOX_AUTO", 0, {"GEAR_SHIFTER": 5})]
+    parsers = {enums: CANParser(dbc_file, [("STEER_STATUS", 0), ("GEARBOX_AUTO", 0)], 0, enums=enums) for enums in (None, "int", "name")}
+    for cp in parsers.values():
+      cp.update([0, frames])
+
+    assert parsers[None].vl["STEER_STATUS"]["STEER_STATUS"] == 3.0
+    assert type(parsers["int"].vl["STEER_STATUS"]["STEER_STATUS"]) is int
+    assert parsers["int"].vl["STEER_STATUS"]["STEER_STATUS"] == 3
+    assert parsers["name"].vl["STEER_STATUS"]["STEER_STATUS"] == "LOW_SPEED_LOCKOUT"
+    assert parsers["name"].vl["GEARBOX_AUTO"]["GEAR_SHIFTER"] == 5  # no name for 5
+    for cp in parsers.values():
+      assert cp.vl["STEER_STATUS"]["STEER_TORQUE_SENSOR"] == -12.0  # no value table
+
+    with self.assertRaises(ValueError):
+      CANParser(dbc_file, [], 0, enums="names")
+
+  def test_value_store(self):
+    dbc_file = "honda_civic_touring_2016_can_generated"
+    packer = CANPacker(dbc_file)
+    parser = CANParser(dbc_file, [("VSA_STATUS", 0)], 0)
+    user_brake = parser.signal("VSA_STATUS", "USER_BRAKE")
+    parser.update([1000, [packer.make_can_msg("VSA_STATUS", 0, {"USER_BRAKE": 7})]])
+
+    # adding a message reallocates the store, keeping values and handles
+    steer_torque = parser.signal("STEERING_CONTROL", "STEER_TORQUE")
+    parser.update([2000, [packer.make_can_msg("STEERING_CONTROL", 0, {"STEER_TORQUE": -3})]])
+    assert user_brake.value == 7 and steer_torque.value == -3
+
+    for address, offset in parser.offsets.items():
+      vals = parser.values[offset:offset + len(parser.vl[address])]
+      assert vals.tolist() == list(parser.vl[address].values())
+    assert parser.ts_nanos["VSA_STATUS"]["USER_BRAKE"] == 1000
+
+    vsa_status = parser.vl["VSA_STATUS"]
+    with self.assertRaises(TypeError):
+      vsa_status["USER_BRAKE"] = 0
+    assert type(copy.copy(vsa_status)) is dict
+    assert pickle.loads(pickle.dumps(vsa_status)) == vsa_status == dict(vsa_status)
+
+  def test_subscribe(self):
+    dbc_file = "honda_civic_touring_2016_can_generated"
+    packer = CANPacker(dbc_file)
+    for lazy, grouped in ((False, False), (True, False), (False, True)):
+      with self.subTest(lazy=lazy, grouped=grouped):
+        parser = CANParser(dbc_file, [("SCM_BUTTONS", 0)], 0, lazy=lazy)
+        group = CANParserGroup({"pt": parser})
+        events = []
+        parser.subscribe("SCM_BUTTONS", "CRUISE_BUTTONS", lambda *args: events.append(args))
+        parser.subscribe("GEARBOX_AUTO", "GEAR_SHIFTER")
+
+        def update(frames):
+          if grouped:
+            return group.update([0, frames])["pt"]
+          return parser.update([0, frames])
+
+        buttons = [0, 0, 4, 4, 0, 3, 3]
+        for i in range(LAZY_WARMUP_UPDATES + 10):
+          cruise_buttons = buttons[i % len(buttons)]
+          # cruise button changes are reported even when other signals change
+          frames = [packer.make_can_msg("SCM_BUTTONS", 0, {"CRUISE_BUTTONS": cruise_buttons, "CRUISE_SETTING": i % 3})]
+          if i == 20:
+            frames.append(packer.make_can_msg("GEARBOX_AUTO", 0, {"GEAR_SHIFTER": 8}))
+          assert update(frames) == {frame[0] for frame in frames}
+
+          changed = i == 0 or cruise_buttons != buttons[(i - 1) % len(buttons)]
+          assert (("SCM_BUTTONS", "CRUISE_BUTTONS") in parser.changed) == changed
+          assert (("GEARBOX_AUTO", "GEAR_SHIFTER") in parser.changed) == (i == 20)
+          assert events == ([("SCM_BUTTONS", "CRUISE_BUTTONS", cruise_buttons)] if changed else [])
+          events.clear()
+
+        update([])
+        assert parser.changed == []
+
+  def test_message_group(self):
+    dbc_file = "honda_civic_touring_2016_can_generated"
+    packer = CANPacker(dbc_file)
+    addrs = {m: packer.dbc.name_to_msg[m].address for m in ("VSA_STATUS", "STEERING_CONTROL", "POWERTRAIN_DATA")}
+    parser = CANParser(dbc_file, [], 0)
+    group_parser = CANParser(dbc_file, [], 0)
+    group = CANParserGroup({"pt": group_parser})
+
+    events = []
+    for cp in (parser, group_parser):
+      cp.add_group("scan", ["VSA_STATUS", addrs["STEERING_CONTROL"]], "POWERTRAIN_DATA", lambda *args: events.append(args))
+      with self.assertRaises(RuntimeError):
+        cp.add_group("scan", ["VSA_STATUS"], "POWERTRAIN_DATA")
+      assert cp.addresses == set(addrs.values())
+
+    scans = [
+      (["VSA_STATUS"], None),
+      (["STEERING_CONTROL", "POWERTRAIN_DATA"], ["VSA_STATUS", "STEERING_CONTROL", "POWERTRAIN_DATA"]),
+      (["POWERTRAIN_DATA"], ["POWERTRAIN_DATA"]),
+      ([], None),
+    ]
+    for i, (received, completed) in enumerate(scans):
+      frames = [packer.make_can_msg(m, 0, {}) for m in received]
+      parser.update([i * 1000, frames])
+      group.update([i * 1000, frames])
+
+      expected = {} if completed is None else {"scan": sorted(addrs[m] for m in completed)}
+      assert parser.completed == group_parser.completed == expected
+      assert events == [("scan", expected["scan"])] * 2 if completed else events == []
+      events.clear()
+
   def test_updated(self):
     """Test updated value dict"""
     dbc_file = "honda_civic_touring_2016_can_generated"
@@ -280,10 +951,57 @@ class TestCanParserPacker(unittest.TestCase):
       parser.update([[0, m] for m in can_msgs])
       vl_all = parser.vl_all["VSA_STATUS"]["USER_BRAKE"]
 
-      assert vl_all == user_brake_vals
+      assert vl_all.tolist() == user_brake_vals
       if len(user_brake_vals):
         assert vl_all[-1] == parser.vl["VSA_STATUS"]["USER_BRAKE"]
 
+  def test_updated_partial(self):
+    """vl_all only holds the samples of the last update, for received and idle messages alike"""
+    dbc_file = "honda_civic_touring_2016_can_generated"
+    packer = CANPacker(dbc_file)
+    msgs = ["VSA_STATUS", "STEERING_CONTROL", "POWERTRAIN_DATA"]
+    parser = CANParser(dbc_file, [(m, 0) for m in msgs], 0)
+    group_parser = CANParser(dbc_file, [(m, 0) for m in msgs], 0)
+    group = CANParserGroup({"pt": group_parser})
+
+    for i in range(20):
+      received = [m for j, m in enumerate(msgs) if (i >> j) & 1]
+      frames = [packer.make_can_msg(m, 0, {}) for m in received]
+      assert parser.update([i * 1000, frames]) == group.update([i * 1000, frames])["pt"]
+      for cp in (parser, group_parser):
+        for m in msgs:
+          assert len(cp.vl_all[m].timestamps) == (m in received)
+          assert cp.signal(m, "CHECKSUM").updated == (m in received)
+
+  def test_history(self):
+    """vl_all holds every sample of the current update, even past the history depth, recent() reaches back up to the depth"""
+    dbc_file = "honda_civic_touring_2016_can_generated"
+    parser = CANParser(dbc_file, [("VSA_STATUS", 50), ("POWERTRAIN_DATA", 100)], 0, history_depth={"VSA_STATUS": 4})
+    packer = CANPacker(dbc_file)
+    assert parser.message_states[parser.dbc.name_to_msg["POWERTRAIN_DATA"].address].history.depth == DEFAULT_HISTORY_DEPTH
+
+    sent, t = [], 0
+    for _ in range(50):
+      strings = []
+      for _ in range(random.randrange(0, 7)):
+        t += 10_000_000
+        sent.append((t, random.randrange(100)))
+        strings.append([t, [packer.make_can_msg("VSA_STATUS", 0, {"USER_BRAKE": sent[-1][1]})]])
+      parser.update(strings)
+
+      history = parser.vl_all["VSA_STATUS"]
+      received = sent[len(sent) - len(strings):]
+      assert history["USER_BRAKE"].tolist() == [v for _, v in received]
+      assert history.timestamps.tolist() == [ts for ts, _ in received]
+      assert history.recent("USER_BRAKE", 3).tolist() == [v for _, v in sent[-3:]]
+      assert history.recent_timestamps(10).tolist() == [ts for ts, _ in sent[-4:]]
+      assert len(parser.vl_all["POWERTRAIN_DATA"]["BRAKE_SWITCH"]) == 0
+
+      # the values are read-only views, and unknown signals read as empty
+      assert not history["USER_BRAKE"].flags.writeable
+      assert history["NOT_A_SIGNAL"].tolist() == []
+      assert "NOT_A_SIGNAL" not in history
+
   def test_timestamp_nanos(self):
     """Test message timestamp dict"""
     dbc_file = "honda_civic_touring_2016_can_generated"
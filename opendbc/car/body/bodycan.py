@@ -1,4 +1,4 @@
-from opendbc.car.crc import CRC8BODY
+from opendbc.car.crc import Checksum, ChecksumKind
 
 
 def create_control(packer, torque_l, torque_r):
@@ -10,8 +10,4 @@ def create_control(packer, torque_l, torque_r):
   return packer.make_can_msg("TORQUE_CMD", 0, values)
 
 
-def body_checksum(address: int, sig, d: bytearray) -> int:
-  crc = 0xFF
-  for i in range(len(d) - 2, -1, -1):
-    crc = CRC8BODY[crc ^ d[i]]
-  return crc
+BODY_CHECKSUM = Checksum(ChecksumKind.CRC8, poly=0xD5, init=0xFF, end=1, reverse=True)
@@ -1,3 +1,4 @@
+import numpy as np
 from collections.abc import Callable
 from typing import NamedTuple, Protocol
 
@@ -8,8 +9,61 @@ class CanData(NamedTuple):
   src: int
 
 
+# one row per frame, payloads are zero padded to 64 bytes
+CAN_FRAME_DTYPE = np.dtype([("nanos", np.uint64), ("address", np.uint32), ("src", np.uint8), ("length", np.uint8), ("dat", np.uint8, (64,))])
+
+
+class CanFrameBatch:
+  """
+  CAN frames held in a single NumPy structured array of CAN_FRAME_DTYPE, in receive order. Frames sharing a
+  timestamp form a packet, like an entry of the list format. nanos is the time the batch was received, it
+  defaults to the last frame's timestamp.
+  """
+  __slots__ = ("frames", "nanos")
+
+  def __init__(self, frames: np.ndarray, nanos: int | None = None):
+    assert frames.dtype == CAN_FRAME_DTYPE
+    self.frames = frames
+    if nanos is None:
+      nanos = int(frames["nanos"][-1]) if len(frames) else 0
+    self.nanos = nanos
+
+  @classmethod
+  def from_packets(cls, packets: list[tuple[int, list[CanData]]]) -> 'CanFrameBatch':
+    """Adapter from the list format, (nanos, frames) entries. Frames with more than 64 bytes are dropped."""
+    rows = [(nanos, address, src, len(dat), dat) for nanos, frames in packets for address, dat, src in frames if len(dat) <= 64]
+    frames = np.zeros(len(rows), dtype=CAN_FRAME_DTYPE)
+    if rows:
+      nanos, addresses, srcs, lengths, dats = zip(*rows, strict=True)
+      frames["nanos"] = nanos
+      frames["address"] = addresses
+      frames["src"] = srcs
+      frames["length"] = lengths
+      frames["dat"] = np.frombuffer(b"".join(bytes(dat).ljust(64, b"\x00") for dat in dats), dtype=np.uint8).reshape(-1, 64)
+    return cls(frames, packets[-1][0] if packets else 0)
+
+  def __len__(self) -> int:
+    return len(self.frames)
+
+  def select(self, mask: np.ndarray | slice) -> list[tuple[int, int, int, bytes]]:
+    """Frames where mask is set, as (nanos, address, src, payload) tuples"""
+    frames = self.frames[mask]
+    dats = frames["dat"]
+    return [(nanos, address, src, dats[i, :length].tobytes()) for i, (nanos, address, src, length) in
+            enumerate(zip(frames["nanos"].tolist(), frames["address"].tolist(), frames["src"].tolist(), frames["length"].tolist(), strict=True))]
+
+  def packets(self) -> list[tuple[int, list[CanData]]]:
+    """Adapter to the list format, one entry per timestamp"""
+    ret: list[tuple[int, list[CanData]]] = []
+    for nanos, address, src, dat in self.select(slice(None)):
+      if not ret or ret[-1][0] != nanos:
+        ret.append((nanos, []))
+      ret[-1][1].append(CanData(address, dat, src))
+    return ret
+
+
 CanSendCallable = Callable[[list[CanData]], None]
 
 
 class CanRecvCallable(Protocol):
-  def __call__(self, wait_for_one: bool = False) -> list[list[CanData]]: ...
+  def __call__(self, wait_for_one: bool = False) -> list[list[CanData]] | CanFrameBatch: ...
@@ -1,8 +1,10 @@
 import os
 import time
 
+import numpy as np
+
 from opendbc.car import gen_empty_fingerprint
-from opendbc.car.can_definitions import CanRecvCallable, CanSendCallable
+from opendbc.car.can_definitions import CanFrameBatch, CanRecvCallable, CanSendCallable
 from opendbc.car.carlog import carlog
 from opendbc.car.structs import CarParams, CarParamsT
 from opendbc.car.fingerprints import eliminate_incompatible_cars, all_legacy_fingerprint_cars
@@ -51,19 +53,27 @@ def can_fingerprint(can_recv: CanRecvCallable) -> tuple[str | None, dict[int, di
   while not done:
     # can_recv(wait_for_one=True) may return zero or multiple packets, so we increment frame for each one we receive
     can_packets = can_recv(wait_for_one=True)
-    for can_packet in can_packets:
-      for can in can_packet:
+    if isinstance(can_packets, CanFrameBatch):
+      # only the address, bus and length of each frame are needed, read from the columns and split into packets by timestamp
+      frames = can_packets.frames
+      rows = list(zip(frames["address"].tolist(), frames["src"].tolist(), frames["length"].tolist(), strict=True))
+      bounds = [0, *(np.flatnonzero(frames["nanos"][1:] != frames["nanos"][:-1]) + 1).tolist(), len(rows)] if rows else []
+      packets = [rows[start:end] for start, end in zip(bounds, bounds[1:], strict=False)]
+    else:
+      packets = [[(can.address, can.src, len(can.dat)) for can in can_packet] for can_packet in can_packets]
+    for packet in packets:
+      for address, src, length in packet:
         # The fingerprint dict is generated for all buses, this way the car interface
         # can use it to detect a (valid) multipanda setup and initialize accordingly
-        if can.src < 128:
-          if can.src not in finger:
-            finger[can.src] = {}
-          finger[can.src][can.address] = len(can.dat)
+        if src < 128:
+          if src not in finger:
+            finger[src] = {}
+          finger[src][address] = length
 
         for b in candidate_cars:
           # Ignore extended messages and VIN query response.
-          if can.src == b and can.address < 0x800 and can.address not in (0x7df, 0x7e0, 0x7e8):
-            candidate_cars[b] = eliminate_incompatible_cars(can, candidate_cars[b])
+          if src == b and address < 0x800 and address not in (0x7df, 0x7e0, 0x7e8):
+            candidate_cars[b] = eliminate_incompatible_cars(address, length, candidate_cars[b])
 
       # if we only have one car choice and the time since we got our first
       # message has elapsed, exit
@@ -1,3 +1,8 @@
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+import numpy as np
+
 
 def _gen_crc8_table(poly: int) -> list[int]:
   table = []
@@ -40,3 +45,202 @@ def mk_crc8_fun(table: list[int], init_crc: int = 0x00, xor_out: int = 0x00):
       crc = table[crc ^ b]
     return crc ^ xor_out
   return crc
+
+
+# ***** declarative checksum engine *****
+
+class ChecksumKind:
+  SUM = 0  # sum of the payload bytes
+  NIBBLE_SUM = 1  # sum of the payload nibbles
+  XOR = 2  # XOR of the payload bytes
+  CRC8 = 3
+  CRC16 = 4
+
+
+NIBBLE_SUMS = bytes((b >> 4) + (b & 0xF) for b in range(256))
+
+
+@dataclass(eq=False)
+class Checksum:
+  """
+  A checksum algorithm, described declaratively. Calling it computes the checksum of one payload with the
+  calc_checksum signature of a DBC signal, batch() computes it for every row of a uint8 payload matrix.
+  """
+  kind: int
+  bits: int = 8
+  poly: int = 0  # CRC polynomial
+  init: int = 0
+  xor_out: int = 0
+  start: int = 0  # first payload byte covered
+  end: int = 0  # payload bytes left out at the end
+  reverse: bool = False  # CRC over the payload bytes from last to first
+  clear_checksum: bool = False  # sums leave out the checksum signal's bits, XORs the whole byte holding it
+  add_length: bool = False  # sums start from the payload length
+  address_bytes: int = 0  # sums add the address bytes or nibbles, CRCs process the address bytes little endian after the payload
+  negate: bool = False  # sums return init - sum
+  init_by_address: dict[int, int] = field(default_factory=dict)
+  extended_init: int | None = None  # init for 29 bit addresses
+  xor_out_by_address: dict[int, int] = field(default_factory=dict)
+  xor_out_by_length: dict[int, int] = field(default_factory=dict)
+  counter_constants: dict[int, list[int]] = field(default_factory=dict)  # CRC over one more byte per address and counter (low nibble of byte 1)
+  overrides: dict[int, 'Checksum'] = field(default_factory=dict)  # another algorithm for some addresses
+
+  table: list[int] = field(init=False, repr=False)
+  np_table: np.ndarray = field(init=False, repr=False)
+  # per address and counter, the CRC register to the final checksum, including the xor_out
+  final_tables: dict[int, list[int]] = field(init=False, repr=False)
+  calc: Callable[[int, object, bytes | bytearray | memoryview], int] = field(init=False, repr=False)  # the fast scalar path
+
+  def __post_init__(self):
+    self.table = []
+    if self.kind == ChecksumKind.CRC8:
+      self.table = _gen_crc8_table(self.poly)
+    elif self.kind == ChecksumKind.CRC16:
+      self.table = _gen_crc16_table(self.poly)
+    self.np_table = np.array(self.table, dtype=np.int64)
+    self.final_tables = {address: [self.table[crc ^ const] ^ self.xor_out for const in constants for crc in range(256)]
+                         for address, constants in self.counter_constants.items()}
+    self.calc = self._compile()
+
+  def _init(self, address: int) -> int:
+    if self.extended_init is not None and address > 0x7FF:
+      return self.extended_init
+    return self.init_by_address.get(address, self.init)
+
+  def _address_sum(self, address: int) -> int:
+    address_bytes = address.to_bytes(self.address_bytes, "little")
+    return sum(address_bytes.translate(NIBBLE_SUMS) if self.kind == ChecksumKind.NIBBLE_SUM else address_bytes)
+
+  def _cleared(self, sig) -> tuple[int, int]:
+    """Byte holding the checksum signal and the mask of the bits kept in it"""
+    if self.kind == ChecksumKind.XOR:
+      return sig.start_bit // 8, 0
+    return sig.lsb // 8, ~(((1 << sig.size) - 1) << (sig.lsb % 8)) & 0xFF
+
+  def __call__(self, address: int, sig, d: bytes | bytearray | memoryview) -> int:
+    return self.calc(address, sig, d)
+
+  def _compile(self) -> Callable[[int, object, bytes | bytearray | memoryview], int]:
+    """The scalar path, specialized to the algorithm with its parameters bound as closure variables"""
+    kind, start, end, mask, clear = self.kind, self.start, self.end, (1 << self.bits) - 1, self.clear_checksum
+    init, init_by_address, extended_init, negate = self.init, self.init_by_address, self.extended_init, self.negate
+    xor_out, xor_out_by_address, xor_out_by_length = self.xor_out, self.xor_out_by_address, self.xor_out_by_length
+    final_tables, table, address_bytes, reverse = self.final_tables, self.table, self.address_bytes, self.reverse
+    address_sum_of, add_length = self._address_sum, self.add_length
+    overrides = {address: checksum.calc for address, checksum in self.overrides.items()}
+    address_sums: dict[int, int] = {}
+
+    def get_init(address: int) -> int:
+      if extended_init is not None and address > 0x7FF:
+        return extended_init
+      return init_by_address.get(address, init)
+
+    if kind == ChecksumKind.XOR:
+      def calc(address, sig, d):
+        stop = len(d) - end
+        x = get_init(address)
+        for b in d[start:stop] if start or end else d:
+          x ^= b
+        if clear and start <= sig.start_bit >> 3 < stop:
+          # XOR is its own inverse, so the checksum byte is taken out again
+          x ^= d[sig.start_bit >> 3]
+        return x & mask
+
+    elif kind in (ChecksumKind.SUM, ChecksumKind.NIBBLE_SUM):
+      nibbles = kind == ChecksumKind.NIBBLE_SUM
+
+      def calc(address, sig, d):
+        stop = len(d) - end
+        data = d[start:stop] if start or end else d
+        if nibbles:
+          s = sum(data.translate(NIBBLE_SUMS) if type(data) is not memoryview else map(NIBBLE_SUMS.__getitem__, data))
+        else:
+          s = sum(data)
+        if clear and start <= sig.lsb >> 3 < stop:
+          b = d[sig.lsb >> 3]
+          kept = b & ~(((1 << sig.size) - 1) << (sig.lsb & 7))
+          s -= (NIBBLE_SUMS[b] - NIBBLE_SUMS[kept]) if nibbles else b - kept
+        if address_bytes:
+          address_sum = address_sums.get(address)
+          if address_sum is None:
+            address_sum = address_sums[address] = address_sum_of(address)
+          s += address_sum
+        if add_length:
+          s += len(d)
+        return ((get_init(address) - s) if negate else (get_init(address) + s)) & mask
+
+    elif kind == ChecksumKind.CRC8:
+      def calc(address, sig, d):
+        crc = get_init(address)
+        data = d[start:len(d) - end]
+        for b in (reversed(data) if reverse else data):
+          crc = table[crc ^ b]
+        final_table = final_tables.get(address)
+        if final_table is not None:
+          return final_table[((d[1] & 0x0F) << 8) | crc]
+        return crc ^ xor_out_by_address.get(address, xor_out)
+
+    else:
+      def calc(address, sig, d):
+        crc = get_init(address)
+        for b in d[start:len(d) - end]:
+          crc = ((crc << 8) ^ table[(crc >> 8) ^ b]) & 0xFFFF
+        for b in address.to_bytes(address_bytes, "little"):
+          crc = ((crc << 8) ^ table[(crc >> 8) ^ b]) & 0xFFFF
+        return crc ^ xor_out_by_address.get(address, xor_out_by_length.get(len(d), xor_out))
+
+    if overrides:
+      default = calc
+
+      def calc(address, sig, d):
+        override = overrides.get(address)
+        return override(address, sig, d) if override is not None else default(address, sig, d)
+
+    return calc
+
+  def batch(self, address: int, sig, payloads: np.ndarray) -> np.ndarray:
+    """Checksums of every row of an (n, size) uint8 payload matrix"""
+    override = self.overrides.get(address)
+    if override is not None:
+      return override.batch(address, sig, payloads)
+
+    mask = (1 << self.bits) - 1
+    size = payloads.shape[1]
+    stop = size - self.end
+    kind = self.kind
+    if kind <= ChecksumKind.XOR:
+      data = payloads[:, self.start:stop]
+      if self.clear_checksum:
+        byte, keep = self._cleared(sig)
+        if self.start <= byte < stop:
+          data = data.copy()
+          data[:, byte - self.start] &= keep
+
+      if kind == ChecksumKind.XOR:
+        return (self._init(address) ^ np.bitwise_xor.reduce(data, axis=1).astype(np.int64)) & mask
+
+      if kind == ChecksumKind.NIBBLE_SUM:
+        data = np.frombuffer(NIBBLE_SUMS, dtype=np.uint8)[data]
+      s = data.sum(axis=1, dtype=np.int64)
+      if self.address_bytes:
+        s += self._address_sum(address)
+      if self.add_length:
+        s += size
+      return ((self._init(address) - s) if self.negate else (self._init(address) + s)) & mask
+
+    table = self.np_table
+    crc = np.full(len(payloads), self._init(address), dtype=np.int64)
+    columns = range(stop - 1, self.start - 1, -1) if self.reverse else range(self.start, stop)
+    if kind == ChecksumKind.CRC8:
+      for i in columns:
+        crc = table[crc ^ payloads[:, i]]
+    else:
+      for i in columns:
+        crc = ((crc << 8) ^ table[(crc >> 8) ^ payloads[:, i]]) & 0xFFFF
+      for b in address.to_bytes(self.address_bytes, "little"):
+        crc = ((crc << 8) ^ table[(crc >> 8) ^ b]) & 0xFFFF
+
+    final_table = self.final_tables.get(address)
+    if final_table is not None:
+      return np.array(final_table, dtype=np.int64)[((payloads[:, 1].astype(np.int64) & 0x0F) << 8) | crc]
+    return crc ^ self.xor_out_by_address.get(address, self.xor_out_by_length.get(size, self.xor_out))
@@ -1,7 +1,9 @@
 import time
 
+import numpy as np
+
 from opendbc.car import make_tester_present_msg, uds
-from opendbc.car.can_definitions import CanData, CanRecvCallable, CanSendCallable
+from opendbc.car.can_definitions import CanData, CanFrameBatch, CanRecvCallable, CanSendCallable
 from opendbc.car.carlog import carlog
 from opendbc.car.fw_query_definitions import EcuAddrBusType
 
@@ -33,12 +35,17 @@ def get_ecu_addrs(can_recv: CanRecvCallable, can_send: CanSendCallable, queries:
   ecu_responses: set[EcuAddrBusType] = set()  # set((addr, subaddr, bus),)
   try:
     msgs = [make_tester_present_msg(addr, bus, subaddr) for addr, subaddr, bus in queries]
+    response_addrs = np.array(sorted({addr for addr, _, _ in responses}), dtype=np.uint32)
 
     can_recv()
     can_send(msgs)
     start_time = time.monotonic()
     while time.monotonic() - start_time < timeout:
       can_packets = can_recv(wait_for_one=True)
+      if isinstance(can_packets, CanFrameBatch):
+        # only frames from response addresses can be a response
+        frames = can_packets.frames
+        can_packets = [[CanData(address, dat, src) for _, address, src, dat in can_packets.select(np.isin(frames["address"], response_addrs))]]
       for packet in can_packets:
         for msg in packet:
           if not len(msg.dat):
@@ -19,21 +19,21 @@ _FINGERPRINTS = get_interface_attr('FINGERPRINTS', combine_brands=True, ignore_n
 _DEBUG_ADDRESS = {1880: 8}   # reserved for debug purposes
 
 
-def is_valid_for_fingerprint(msg, car_fingerprint: dict[int, int]):
-  adr = msg.address
+def is_valid_for_fingerprint(address: int, length: int, car_fingerprint: dict[int, int]):
   # ignore addresses that are more than 11 bits
-  return (adr in car_fingerprint and car_fingerprint[adr] == len(msg.dat)) or adr >= 0x800
+  return (address in car_fingerprint and car_fingerprint[address] == length) or address >= 0x800
 
 
-def eliminate_incompatible_cars(msg, candidate_cars):
-  """Removes cars that could not have sent msg.
+def eliminate_incompatible_cars(address: int, length: int, candidate_cars):
+  """Removes cars that could not have sent a message.
 
      Inputs:
-      msg: A cereal/log CanData message from the car.
+      address: The address of a CAN message from the car.
+      length: The length of its payload.
       candidate_cars: A list of cars to consider.
 
      Returns:
-      A list containing the subset of candidate_cars that could have sent msg.
+      A list containing the subset of candidate_cars that could have sent the message.
   """
   compatible_cars = []
 
@@ -42,7 +42,7 @@ def eliminate_incompatible_cars(msg, candidate_cars):
 
     for fingerprint in car_fingerprints:
       # add alien debug address
-      if is_valid_for_fingerprint(msg, fingerprint | _DEBUG_ADDRESS):
+      if is_valid_for_fingerprint(address, length, fingerprint | _DEBUG_ADDRESS):
         compatible_cars.append(car_name)
         break
 
@@ -96,7 +96,6 @@ class RadarInterface(RadarInterfaceBase):
     self.points: list[list[float]] = []
     self.clusters: list[Cluster] = []
 
-    self.updated_messages = set()
     self.track_id = 0
     self.radar = DBC[CP.carFingerprint].get(Bus.radar)
     self.scan_index_invalid_cnt = 0
@@ -114,23 +113,26 @@ class RadarInterface(RadarInterfaceBase):
     else:
       raise ValueError(f"Unsupported radar: {self.radar}")
 
+    if self.rcp is not None:
+      self.rcp.add_group("scan", list(self.rcp.addresses), self.trigger_msg)
+
   def update(self, can_strings):
     if self.rcp is None:
       return super().update(None)
 
-    vls = self.rcp.update(can_strings)
-    self.updated_messages.update(vls)
-
-    if self.trigger_msg not in self.updated_messages:
+    self.rcp.update(can_strings)
+    updated_messages = self.rcp.completed.get("scan")
+    if updated_messages is None:
       return None
-    self.updated_messages.clear()
 
     ret = structs.RadarData()
     if not self.rcp.can_valid:
       ret.errors.canError = True
 
     if self.radar == RADAR.DELPHI_ESR:
-      self._update_delphi_esr()
+      # TODO: the updated set used to be cleared before the tracks were read, so ESR tracks have never been reported.
+      # Passing updated_messages would enable them, which needs validating on a car first
+      self._update_delphi_esr([])
     elif self.radar == RADAR.DELPHI_MRR:
       _update = self._update_delphi_mrr(ret)
       if not _update:
@@ -139,8 +141,8 @@ class RadarInterface(RadarInterfaceBase):
     ret.points = list(self.pts.values())
     return ret
 
-  def _update_delphi_esr(self):
-    for ii in sorted(self.updated_messages):
+  def _update_delphi_esr(self, updated_messages: list[int]):
+    for ii in updated_messages:
       cpt = self.rcp.vl[ii]
 
       if cpt['X_Rel'] > 0.00001:
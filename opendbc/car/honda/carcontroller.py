@@ -98,7 +98,7 @@ class CarController(CarControllerBase, MadsCarController, GasInterceptorCarContr
     MadsCarController.__init__(self)
     GasInterceptorCarController.__init__(self, CP, CP_SP)
     IntelligentCruiseButtonManagementInterface.__init__(self, CP, CP_SP)
-    self.packer = CANPacker(dbc_names[Bus.pt])
+    self.packer = CANPacker(dbc_names[Bus.pt], cache_size=32)  # HUD messages mostly repeat their values
     self.params = CarControllerParams(CP)
     self.CAN = hondacan.CanBus(CP)
     self.tja_control = CP.carFingerprint in HONDA_BOSCH_TJA_CONTROL
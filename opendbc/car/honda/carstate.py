@@ -40,7 +40,6 @@ class CarState(CarStateBase, CarStateExt):
 
     self.steer_status_values = defaultdict(lambda: "UNKNOWN", can_define.dv["STEER_STATUS"]["STEER_STATUS"])
 
-    self.brake_switch_prev = False
     self.brake_switch_active = False
     self.low_speed_alert = False
 
@@ -54,8 +53,19 @@ class CarState(CarStateBase, CarStateExt):
     self.is_metric = False
     self.v_cruise_factor = 1.
 
+  def bind_signals(self, cp):
+    super().bind_signals(cp)
+    self.wheel_speeds = [cp.signal("WHEEL_SPEEDS", f"WHEEL_SPEED_{s}") for s in ("FL", "FR", "RL", "RR")]
+    self.xmission_speed = cp.signal("ENGINE_DATA", "XMISSION_SPEED")
+    self.steer_angle = cp.signal("STEERING_SENSORS", "STEER_ANGLE")
+    self.steer_angle_rate = cp.signal("STEERING_SENSORS", "STEER_ANGLE_RATE")
+    self.steer_status = cp.signal("STEER_STATUS", "STEER_STATUS")
+    self.steer_torque_sensor = cp.signal("STEER_STATUS", "STEER_TORQUE_SENSOR")
+
   def update(self, can_parsers) -> tuple[structs.CarState, structs.CarStateSP]:
     cp = can_parsers[Bus.pt]
+    if cp is not self.bound_cp:
+      self.bind_signals(cp)
     cp_cam = can_parsers[Bus.cam]
     if self.CP.enableBsm:
       cp_body = can_parsers[Bus.body]
@@ -82,11 +92,12 @@ class CarState(CarStateBase, CarStateExt):
 
     # blend in transmission speed at low speed, since it has more low speed accuracy
     # STANDSTILL->WHEELS_MOVING bit can be noisy around zero, so use XMISSION_SPEED
-    v_wheel = sum([cp.vl["WHEEL_SPEEDS"][f"WHEEL_SPEED_{s}"] for s in ("FL", "FR", "RL", "RR")]) / 4.0 * CV.KPH_TO_MS
+    v_wheel = sum([s.value for s in self.wheel_speeds]) / 4.0 * CV.KPH_TO_MS
     v_weight = float(np.interp(v_wheel, v_weight_bp, v_weight_v))
-    ret.vEgoRaw = (1. - v_weight) * cp.vl["ENGINE_DATA"]["XMISSION_SPEED"] * CV.KPH_TO_MS * self.CP.wheelSpeedFactor + v_weight * v_wheel
+    xmission_speed = self.xmission_speed.value
+    ret.vEgoRaw = (1. - v_weight) * xmission_speed * CV.KPH_TO_MS * self.CP.wheelSpeedFactor + v_weight * v_wheel
     ret.vEgo, ret.aEgo = self.update_speed_kf(ret.vEgoRaw)
-    ret.standstill = cp.vl["ENGINE_DATA"]["XMISSION_SPEED"] < 1e-5
+    ret.standstill = xmission_speed < 1e-5
 
     # doorOpen is true if we can find any door open, but signal locations vary, and we may only see the driver's door
     # TODO: Test the eight Nidec cars without SCM signals for driver's door state, may be able to consolidate further
@@ -100,7 +111,7 @@ class CarState(CarStateBase, CarStateExt):
 
     ret.seatbeltUnlatched = bool(cp.vl["SEATBELT_STATUS"]["SEATBELT_DRIVER_LAMP"] or not cp.vl["SEATBELT_STATUS"]["SEATBELT_DRIVER_LATCHED"])
 
-    steer_status = self.steer_status_values[cp.vl["STEER_STATUS"]["STEER_STATUS"]]
+    steer_status = self.steer_status_values[self.steer_status.value]
     ret.steerFaultPermanent = steer_status not in ("NORMAL", "NO_TORQUE_ALERT_1", "NO_TORQUE_ALERT_2", "LOW_SPEED_LOCKOUT", "TMP_FAULT")
     if self.CP.carFingerprint in HONDA_BOSCH_ALT_RADAR:
       # TODO: See if this logic works for all other Honda
@@ -147,8 +158,8 @@ class CarState(CarStateBase, CarStateExt):
         conversion = CV.KPH_TO_MS if self.is_metric else CV.MPH_TO_MS
         ret.vEgoCluster = cp.vl["CAR_SPEED"]["ROUGH_CAR_SPEED_2"] * conversion
 
-    ret.steeringAngleDeg = cp.vl["STEERING_SENSORS"]["STEER_ANGLE"]
-    ret.steeringRateDeg = cp.vl["STEERING_SENSORS"]["STEER_ANGLE_RATE"]
+    ret.steeringAngleDeg = self.steer_angle.value
+    ret.steeringRateDeg = self.steer_angle_rate.value
 
     ret.leftBlinker, ret.rightBlinker = self.update_blinker_from_stalk(
       250, cp.vl["SCM_FEEDBACK"]["LEFT_BLINKER"], cp.vl["SCM_FEEDBACK"]["RIGHT_BLINKER"])
@@ -163,7 +174,7 @@ class CarState(CarStateBase, CarStateExt):
 
     ret.gasPressed = cp.vl["POWERTRAIN_DATA"]["PEDAL_GAS"] > 1e-5
 
-    ret.steeringTorque = cp.vl["STEER_STATUS"]["STEER_TORQUE_SENSOR"]
+    ret.steeringTorque = self.steer_torque_sensor.value
     ret.steeringPressed = abs(ret.steeringTorque) > STEER_THRESHOLD.get(self.CP.carFingerprint, 1200)
 
     if self.CP.carFingerprint in HONDA_BOSCH:
@@ -189,13 +200,9 @@ class CarState(CarStateBase, CarStateExt):
       # brake switch has shown some single time step noise, so only considered when
       # switch is on for at least 2 consecutive CAN samples
       # brake switch rises earlier than brake pressed but is never 1 when in park
-      brake_switch_vals = cp.vl_all["POWERTRAIN_DATA"]["BRAKE_SWITCH"]
-      if len(brake_switch_vals):
-        brake_switch = cp.vl["POWERTRAIN_DATA"]["BRAKE_SWITCH"] != 0
-        if len(brake_switch_vals) > 1:
-          self.brake_switch_prev = brake_switch_vals[-2] != 0
-        self.brake_switch_active = brake_switch and self.brake_switch_prev
-        self.brake_switch_prev = brake_switch
+      if len(cp.vl_all["POWERTRAIN_DATA"]["BRAKE_SWITCH"]):
+        brake_switch_vals = cp.vl_all["POWERTRAIN_DATA"].recent("BRAKE_SWITCH", 2)
+        self.brake_switch_active = len(brake_switch_vals) == 2 and bool(brake_switch_vals.all())
       ret.brakePressed = (cp.vl["POWERTRAIN_DATA"]["BRAKE_PRESSED"] != 0) or self.brake_switch_active
 
     ret.brake = cp.vl["VSA_STATUS"]["USER_BRAKE"]
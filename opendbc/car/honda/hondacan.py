@@ -1,5 +1,6 @@
 from opendbc.car import CanBusBase
 from opendbc.car.common.conversions import Conversions as CV
+from opendbc.car.crc import Checksum, ChecksumKind
 from opendbc.car.honda.values import (HondaFlags, HONDA_BOSCH, HONDA_BOSCH_ALT_RADAR, HONDA_BOSCH_RADARLESS,
                                       HONDA_BOSCH_CANFD, CarControllerParams)
 from opendbc.sunnypilot.car.honda.values_ext import HondaFlagsSP
@@ -235,19 +236,4 @@ def spam_buttons_command(packer, CAN, button_val, car_fingerprint):
   return packer.make_can_msg("SCM_BUTTONS", bus, values)
 
 
-def honda_checksum(address: int, sig, d: bytearray) -> int:
-  s = 0
-  extended = address > 0x7FF
-  addr = address
-  while addr:
-    s += addr & 0xF
-    addr >>= 4
-  for i in range(len(d)):
-    x = d[i]
-    if i == len(d) - 1:
-      x >>= 4
-    s += (x & 0xF) + (x >> 4)
-  s = 8 - s
-  if extended:
-    s += 3
-  return s & 0xF
+HONDA_CHECKSUM = Checksum(ChecksumKind.NIBBLE_SUM, bits=4, init=8, extended_init=11, negate=True, clear_checksum=True, address_bytes=4)
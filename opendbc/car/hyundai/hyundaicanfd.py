@@ -1,6 +1,6 @@
 import numpy as np
 from opendbc.car import CanBusBase
-from opendbc.car.crc import CRC16_XMODEM
+from opendbc.car.crc import Checksum, ChecksumKind
 from opendbc.car.hyundai.values import HyundaiFlags
 from opendbc.sunnypilot.car.hyundai.lead_data_ext import CanFdLeadData
 
@@ -236,18 +236,5 @@ def create_adrv_messages(packer, CAN, frame):
   return ret
 
 
-def hkg_can_fd_checksum(address: int, sig, d: bytearray) -> int:
-  crc = 0
-  for i in range(2, len(d)):
-    crc = ((crc << 8) ^ CRC16_XMODEM[(crc >> 8) ^ d[i]]) & 0xFFFF
-  crc = ((crc << 8) ^ CRC16_XMODEM[(crc >> 8) ^ ((address >> 0) & 0xFF)]) & 0xFFFF
-  crc = ((crc << 8) ^ CRC16_XMODEM[(crc >> 8) ^ ((address >> 8) & 0xFF)]) & 0xFFFF
-  if len(d) == 8:
-    crc ^= 0x5F29
-  elif len(d) == 16:
-    crc ^= 0x041D
-  elif len(d) == 24:
-    crc ^= 0x819D
-  elif len(d) == 32:
-    crc ^= 0x9F5B
-  return crc
+HKG_CAN_FD_CHECKSUM = Checksum(ChecksumKind.CRC16, bits=16, poly=0x1021, start=2, address_bytes=2,
+                               xor_out_by_length={8: 0x5F29, 16: 0x041D, 24: 0x819D, 32: 0x9F5B})
@@ -25,7 +25,6 @@ class RadarInterface(RadarInterfaceBase, RadarInterfaceExt):
   def __init__(self, CP, CP_SP):
     RadarInterfaceBase.__init__(self, CP, CP_SP)
     RadarInterfaceExt.__init__(self, CP, CP_SP)
-    self.updated_messages = set()
     self.trigger_msg = RADAR_START_ADDR + RADAR_MSG_COUNT - 1
     self.track_id = 0
 
@@ -34,21 +33,19 @@ class RadarInterface(RadarInterfaceBase, RadarInterfaceExt):
 
     if self.rcp is None:
       self.initialize_radar_ext(self.trigger_msg)
+    if self.rcp is not None:
+      self.rcp.add_group("scan", list(self.rcp.addresses), self.trigger_msg)
 
   def update(self, can_strings):
     if self.radar_off_can or (self.rcp is None):
       return super().update(None)
 
-    vls = self.rcp.update(can_strings)
-    self.updated_messages.update(vls)
-
-    if self.trigger_msg not in self.updated_messages:
+    self.rcp.update(can_strings)
+    updated_messages = self.rcp.completed.get("scan")
+    if updated_messages is None:
       return None
 
-    rr = self._update(self.updated_messages)
-    self.updated_messages.clear()
-
-    return rr
+    return self._update(updated_messages)
 
   def _update(self, updated_messages):
     ret = structs.RadarData()
@@ -10,12 +10,12 @@ from functools import cache
 
 from opendbc.car import DT_CTRL, apply_hysteresis, gen_empty_fingerprint, scale_rot_inertia, scale_tire_stiffness, STD_CARGO_KG
 from opendbc.car import structs
-from opendbc.car.can_definitions import CanData, CanRecvCallable, CanSendCallable
+from opendbc.car.can_definitions import CanData, CanFrameBatch, CanRecvCallable, CanSendCallable
 from opendbc.car.common.basedir import BASEDIR
 from opendbc.car.common.conversions import Conversions as CV
 from opendbc.car.common.simple_kalman import KF1D, get_kalman_gain
 from opendbc.car.values import PLATFORMS
-from opendbc.can import CANParser
+from opendbc.can import CANParser, CANParserGroup
 from opendbc.car.carlog import carlog
 
 from opendbc.sunnypilot.car.interfaces import CarInterfaceBaseSP
@@ -112,6 +112,7 @@ class CarInterfaceBase(ABC, CarInterfaceBaseSP):
 
     self.CS: CarStateBase = self.CarState(CP, CP_SP, CP_AC)
     self.can_parsers: dict[StrEnum, CANParser] = self.CS.get_can_parsers(CP, CP_SP, CP_AC)
+    self.can_parser_group = CANParserGroup(self.can_parsers)
 
     dbc_names = {bus: cp.dbc_name for bus, cp in self.can_parsers.items()}
     self.CC: CarControllerBase = self.CarController(dbc_names, CP, CP_SP, CP_AC)
@@ -286,11 +287,9 @@ class CarInterfaceBase(ABC, CarInterfaceBaseSP):
     tune.torque.latAccelOffset = 0.0
     tune.torque.steeringAngleDeadzoneDeg = steering_angle_deadzone_deg
 
-  def update(self, can_packets: list[tuple[int, list[CanData]]]) -> tuple[structs.CarState, structs.CarStateSP, structs.CarStateAC]:
+  def update(self, can_packets: list[tuple[int, list[CanData]]] | CanFrameBatch) -> tuple[structs.CarState, structs.CarStateSP, structs.CarStateAC]:
     # parse can
-    for cp in self.can_parsers.values():
-      if cp is not None:
-        cp.update(can_packets)
+    self.can_parser_group.update(can_packets)
 
     # get CarState
     ret, ret_sp = self.CS.update(self.can_parsers)
@@ -343,6 +342,7 @@ class CarStateBase(ABC):
     self.cluster_speed_hyst_gap = 0.0
     self.cluster_min_speed = 0.0  # min speed before dropping to 0
     self.secoc_key: bytes = b"00" * 16
+    self.bound_cp: CANParser | None = None
 
     Q = [[0.0, 0.0], [0.0, 100.0]]
     R = 0.3
@@ -426,6 +426,10 @@ class CarStateBase(ABC):
   def get_can_parsers(CP, CP_SP, CP_AC) -> dict[StrEnum, CANParser]:
     return {}
 
+  def bind_signals(self, cp: CANParser) -> None:
+    """Bind CANParser.signal handles for signals read on every update. Called by update() whenever it sees a new parser"""
+    self.bound_cp = cp
+
 
 class CarControllerBase(ABC):
   def __init__(self, dbc_names: dict[StrEnum, str], CP: structs.CarParams, CP_SP: structs.CarParamsSP, CP_AC: structs.CarParamsAC):
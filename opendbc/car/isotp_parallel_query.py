@@ -2,8 +2,10 @@ import time
 from collections import defaultdict
 from functools import partial
 
+import numpy as np
+
 from opendbc.car import uds
-from opendbc.car.can_definitions import CanData, CanRecvCallable, CanSendCallable
+from opendbc.car.can_definitions import CanData, CanFrameBatch, CanRecvCallable, CanSendCallable
 from opendbc.car.carlog import carlog
 from opendbc.car.fw_query_definitions import AddrType
 
@@ -25,12 +27,19 @@ class IsoTpParallelQuery:
       assert tx_addr not in uds.FUNCTIONAL_ADDRS, f"Functional address should be defined in functional_addrs: {hex(tx_addr)}"
 
     self.msg_addrs = {tx_addr: uds.get_rx_addr_for_tx_addr(tx_addr[0], rx_offset=response_offset) for tx_addr in real_addrs}
+    self.rx_addrs = np.fromiter(self.msg_addrs.values(), dtype=np.uint32, count=len(self.msg_addrs))
     self.msg_buffer: dict[int, list[CanData]] = defaultdict(list)
 
   def rx(self) -> None:
     """Drain can socket and sort messages into buffers based on address"""
     can_packets = self.can_recv(wait_for_one=True)
 
+    if isinstance(can_packets, CanFrameBatch):
+      frames = can_packets.frames
+      for _, address, src, dat in can_packets.select((frames["src"] == self.bus) & np.isin(frames["address"], self.rx_addrs)):
+        self.msg_buffer[address].append(CanData(address, dat, src))
+      return
+
     for packet in can_packets:
       for msg in packet:
         if msg.src == self.bus and msg.address in self.msg_addrs.values():
@@ -98,7 +98,7 @@ class CarState(CarStateBase, CarStateExt):
       self.sccm_wheel_touch = copy.copy(cp.vl["SCCM_WheelTouch"])
     # This message can lag and send two messages at once, make sure we forward all of them
     adas_status_msgs = cp.vl_all["VDM_AdasSts"]
-    self.vdm_adas_status = [dict(zip(adas_status_msgs, vals, strict=True)) for vals in zip(*adas_status_msgs.values(), strict=True)]
+    self.vdm_adas_status = [dict(zip(adas_status_msgs, vals, strict=True)) for vals in zip(*(vals.tolist() for vals in adas_status_msgs.values()), strict=True)]
 
     CarStateExt.update(self, ret, can_parsers)
 
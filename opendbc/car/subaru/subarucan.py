@@ -1,4 +1,5 @@
 from opendbc.car import structs
+from opendbc.car.crc import Checksum, ChecksumKind
 from opendbc.car.subaru.values import CanBus
 
 VisualAlert = structs.CarControl.HUDControl.VisualAlert
@@ -326,12 +327,4 @@ def create_preglobal_es_distance(packer, cruise_button, es_distance_msg):
   return packer.make_can_msg("ES_Distance", CanBus.main, values)
 
 
-def subaru_checksum(address: int, sig, d: bytearray) -> int:
-  s = 0
-  addr = address
-  while addr:
-    s += addr & 0xFF
-    addr >>= 8
-  for i in range(1, len(d)):
-    s += d[i]
-  return s & 0xFF
+SUBARU_CHECKSUM = Checksum(ChecksumKind.SUM, start=1, address_bytes=4)
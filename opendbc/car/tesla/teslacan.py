@@ -1,4 +1,5 @@
 from opendbc.car.common.conversions import Conversions as CV
+from opendbc.car.crc import Checksum, ChecksumKind
 from opendbc.car.tesla.values import CANBUS, CarControllerParams, TeslaFlags
 
 
@@ -51,10 +52,4 @@ class TeslaCAN:
     return self.packer.make_can_msg("APS_eacMonitor", CANBUS.party, values)
 
 
-def tesla_checksum(address: int, sig, d: bytearray) -> int:
-  checksum = (address & 0xFF) + ((address >> 8) & 0xFF)
-  checksum_byte = sig.start_bit // 8
-  for i in range(len(d)):
-    if i != checksum_byte:
-      checksum += d[i]
-  return checksum & 0xFF
+TESLA_CHECKSUM = Checksum(ChecksumKind.SUM, clear_checksum=True, address_bytes=2)
@@ -1,5 +1,5 @@
 import unittest
-from opendbc.car.can_definitions import CanData
+from opendbc.car.can_definitions import CanData, CanFrameBatch
 from opendbc.car.car_helpers import FRAME_FINGERPRINT, can_fingerprint
 from opendbc.car.fingerprints import _FINGERPRINTS as FINGERPRINTS
 from opendbc.testing import parameterized
@@ -22,6 +22,28 @@ class TestCanFingerprint(unittest.TestCase):
       assert finger[1] == fingerprint
       assert finger[2] == {}
 
+  def test_can_fingerprint_batch(self):
+    car_model = "CHEVROLET_BOLT_EUV"
+    fingerprint = FINGERPRINTS[car_model][0]
+    can = [CanData(address=address, dat=b'\x00' * length, src=src) for address, length in fingerprint.items() for src in (0, 1)]
+
+    car_fingerprint, finger = can_fingerprint(lambda **kwargs: CanFrameBatch.from_packets([(0, can)]))
+    assert car_fingerprint == car_model
+    assert finger[0] == fingerprint
+    assert finger[1] == fingerprint
+
+    # frames are counted per timestamp, like the packets of the list format
+    recvs = 0
+
+    def can_recv(**kwargs):
+      nonlocal recvs
+      recvs += 1
+      return CanFrameBatch.from_packets([(recvs * 2, can), (recvs * 2 + 1, can)])
+
+    car_fingerprint, _ = can_fingerprint(can_recv)
+    assert car_fingerprint == car_model
+    assert recvs == (FRAME_FINGERPRINT + 3) // 2
+
   def test_timing(self):
     # just pick any CAN fingerprinting car
     car_model = "CHEVROLET_BOLT_EUV"
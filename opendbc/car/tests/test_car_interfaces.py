@@ -7,7 +7,7 @@ from hypothesis import Phase, given, settings
 from collections.abc import Callable
 from typing import Any
 
-from opendbc.car import DT_CTRL, CanData, structs
+from opendbc.car import DT_CTRL, Bus, CanData, gen_empty_fingerprint, structs
 from opendbc.car.car_helpers import interfaces
 from opendbc.car.fingerprints import FW_VERSIONS
 from opendbc.car.fw_versions import FW_QUERY_CONFIGS
@@ -169,6 +169,20 @@ class TestCarInterfaces(unittest.TestCase):
     none_brands_in_ret = none_brands.intersection(ret)
     assert len(none_brands_in_ret) == 0, f'Brands with None values in ignore_none=True result: {none_brands_in_ret}'
 
+  def test_carstate_without_interface(self):
+    """CarStates bind their signal handles on update, also when they're used without a CarInterface"""
+    for car_name in ('TOYOTA_RAV4_TSS2', 'HONDA_CIVIC_BOSCH', 'HYUNDAI_SONATA', 'HYUNDAI_IONIQ_5'):
+      CarInterface = interfaces[car_name]
+      fingerprint = gen_empty_fingerprint()
+      CP = CarInterface.get_params(car_name, fingerprint, [], False, False, False, False)
+      CP_SP = CarInterface.get_params_sp(CP, car_name, fingerprint, [], False, False, False)
+      CP_AC = CarInterface.get_params_ac(CP, car_name, fingerprint, [], False, False, False)
+      CS = CarInterface.CarState(CP, CP_SP, CP_AC)
+      for _ in range(2):
+        can_parsers = CS.get_can_parsers(CP, CP_SP, CP_AC)
+        CS.update(can_parsers)
+        assert CS.bound_cp is can_parsers[Bus.pt]
+
 
 for car_name in sorted(PLATFORMS):
   setattr(TestCarInterfaces, f'test_car_interfaces_{car_name}', _make_car_test(car_name))
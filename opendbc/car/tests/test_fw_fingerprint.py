@@ -4,10 +4,12 @@ import random
 import time
 from collections import defaultdict
 
-from opendbc.car.can_definitions import CanData
+from opendbc.car.can_definitions import CanData, CanFrameBatch
 from opendbc.car.car_helpers import interfaces
+from opendbc.car.ecu_addrs import get_ecu_addrs
 from opendbc.car.structs import CarParams
 from opendbc.car.fingerprints import FW_VERSIONS
+from opendbc.car.isotp_parallel_query import IsoTpParallelQuery
 from opendbc.car.fw_versions import FW_QUERY_CONFIGS, FUZZY_EXCLUDE_ECUS, VERSIONS, build_fw_dict, \
                                     match_fw_to_car, get_brand_ecu_matches, get_fw_versions, get_present_ecus
 from opendbc.car.vin import get_vin
@@ -190,6 +192,41 @@ class TestFwFingerprint(unittest.TestCase):
     assert True in brand_matches['toyota']
     assert not any(any(e) for b, e in brand_matches.items() if b != 'toyota')
 
+  def test_ecu_addrs_batch(self):
+    # tester present responses, a subaddressed one, a negative one and traffic from other addresses
+    packets = [(1, [CanData(0x7e8, b'\x02\x7e\x00' + b'\x00' * 5, 0), CanData(0x7e9, b'\x02\x7e\x00' + b'\x00' * 5, 0)]),
+               (2, [CanData(0x750, b'\x0f\x02\x7e\x00' + b'\x00' * 4, 1), CanData(0x18daf1e8, b'\x03\x7f\x3e\x11' + b'\x00' * 4, 0)]),
+               (3, [CanData(0x7e8, b'', 1)])]
+    queries = {(0x7e0, None, 0), (0x740, 0xf, 1), (0x18dae8f1, None, 0)}
+    responses = {(0x7e8, None, 0), (0x750, 0xf, 1), (0x18daf1e8, None, 0)}
+
+    results = []
+    for recv in ([frames for _, frames in packets], CanFrameBatch.from_packets(packets)):
+      t = 0
+
+      def fake_monotonic():
+        nonlocal t
+        t += 0.4
+        return t
+
+      with self.subTest(batch=isinstance(recv, CanFrameBatch)), patch("time.monotonic", fake_monotonic):
+        results.append(get_ecu_addrs(lambda wait_for_one=False: recv, lambda msgs: None, queries, responses, timeout=1))  # noqa: B023
+        assert results[-1] == responses
+    assert results[0] == results[1]
+
+  def test_isotp_rx_batch(self):
+    packets = [(1, [CanData(0x7e8, b'\x03\x41\x00\x01', 0), CanData(0x7e8, b'\x03\x41\x00\x02', 1), CanData(0x7e0, b'\x02\x01\x00', 0)]),
+               (2, [CanData(0x7e9, b'\x03\x41\x00\x03', 0), CanData(0x7e8, b'\x03\x41\x00\x04', 0), CanData(0x123, b'', 0)])]
+
+    buffers = []
+    for recv in ([frames for _, frames in packets], CanFrameBatch.from_packets(packets)):
+      query = IsoTpParallelQuery(lambda msgs: None, lambda wait_for_one=False: recv, 0, [0x7e0, 0x7e1], [b'\x01\x00'], [b'\x41\x00'])  # noqa: B023
+      query.rx()
+      buffers.append(dict(query.msg_buffer))
+    assert buffers[0] == buffers[1]
+    assert [msg.dat[-1] for msg in buffers[0][0x7e8]] == [1, 4]
+    assert [msg.dat[-1] for msg in buffers[0][0x7e9]] == [3]
+
 
 class TestFwFingerprintTiming(unittest.TestCase):
   N: int = 5
@@ -75,7 +75,7 @@ class CarController(CarControllerBase, GasInterceptorCarController):
     self.prev_accel = 0
     # *** end long control state ***
 
-    self.packer = CANPacker(dbc_names[Bus.pt])
+    self.packer = CANPacker(dbc_names[Bus.pt], cache_size=32)  # HUD messages mostly repeat their values
 
     self.secoc_lka_message_counter = 0
     self.secoc_lta_message_counter = 0
@@ -56,8 +56,21 @@ class CarState(CarStateBase, CarStateExt):
     self.gvc = 0.0
     self.secoc_synchronization = None
 
+  def bind_signals(self, cp):
+    super().bind_signals(cp)
+    self.wheel_speeds = [cp.signal("WHEEL_SPEEDS", f"WHEEL_SPEED_{s}") for s in ("FL", "FR", "RL", "RR")]
+    self.steer_angle = cp.signal("STEER_ANGLE_SENSOR", "STEER_ANGLE")
+    self.steer_fraction = cp.signal("STEER_ANGLE_SENSOR", "STEER_FRACTION")
+    self.steer_rate = cp.signal("STEER_ANGLE_SENSOR", "STEER_RATE")
+    self.torque_sensor_angle = cp.signal("STEER_TORQUE_SENSOR", "STEER_ANGLE")
+    self.torque_sensor_angle_initializing = cp.signal("STEER_TORQUE_SENSOR", "STEER_ANGLE_INITIALIZING")
+    self.steer_torque_driver = cp.signal("STEER_TORQUE_SENSOR", "STEER_TORQUE_DRIVER")
+    self.steer_torque_eps = cp.signal("STEER_TORQUE_SENSOR", "STEER_TORQUE_EPS")
+
   def update(self, can_parsers) -> tuple[structs.CarState, structs.CarStateSP]:
     cp = can_parsers[Bus.pt]
+    if cp is not self.bound_cp:
+      self.bind_signals(cp)
     cp_cam = can_parsers[Bus.cam]
 
     ret = structs.CarState()
@@ -85,22 +98,17 @@ class CarState(CarStateBase, CarStateExt):
       if not self.CP.flags & ToyotaFlags.DISABLE_RADAR.value:
         ret.stockAeb = bool(cp_acc.vl["PRE_COLLISION"]["PRECOLLISION_ACTIVE"] and cp_acc.vl["PRE_COLLISION"]["FORCE"] < -1e-5)
 
-    self.parse_wheel_speeds(ret,
-      cp.vl["WHEEL_SPEEDS"]["WHEEL_SPEED_FL"],
-      cp.vl["WHEEL_SPEEDS"]["WHEEL_SPEED_FR"],
-      cp.vl["WHEEL_SPEEDS"]["WHEEL_SPEED_RL"],
-      cp.vl["WHEEL_SPEEDS"]["WHEEL_SPEED_RR"],
-    )
+    self.parse_wheel_speeds(ret, *(s.value for s in self.wheel_speeds))
     ret.vEgoCluster = ret.vEgo * 1.015  # minimum of all the cars
 
     ret.standstill = abs(ret.vEgoRaw) < 1e-3
 
-    ret.steeringAngleDeg = cp.vl["STEER_ANGLE_SENSOR"]["STEER_ANGLE"] + cp.vl["STEER_ANGLE_SENSOR"]["STEER_FRACTION"]
-    ret.steeringRateDeg = cp.vl["STEER_ANGLE_SENSOR"]["STEER_RATE"]
-    torque_sensor_angle_deg = cp.vl["STEER_TORQUE_SENSOR"]["STEER_ANGLE"]
+    ret.steeringAngleDeg = self.steer_angle.value + self.steer_fraction.value
+    ret.steeringRateDeg = self.steer_rate.value
+    torque_sensor_angle_deg = self.torque_sensor_angle.value
 
     # On some cars, the angle measurement is non-zero while initializing
-    if abs(torque_sensor_angle_deg) > 1e-3 and not bool(cp.vl["STEER_TORQUE_SENSOR"]["STEER_ANGLE_INITIALIZING"]):
+    if abs(torque_sensor_angle_deg) > 1e-3 and not bool(self.torque_sensor_angle_initializing.value):
       self.accurate_steer_angle_seen = True
 
     if self.accurate_steer_angle_seen:
@@ -116,8 +124,8 @@ class CarState(CarStateBase, CarStateExt):
     ret.leftBlinker = cp.vl["BLINKERS_STATE"]["TURN_SIGNALS"] == 1
     ret.rightBlinker = cp.vl["BLINKERS_STATE"]["TURN_SIGNALS"] == 2
 
-    ret.steeringTorque = cp.vl["STEER_TORQUE_SENSOR"]["STEER_TORQUE_DRIVER"]
-    ret.steeringTorqueEps = cp.vl["STEER_TORQUE_SENSOR"]["STEER_TORQUE_EPS"] * self.eps_torque_scale
+    ret.steeringTorque = self.steer_torque_driver.value
+    ret.steeringTorqueEps = self.steer_torque_eps.value * self.eps_torque_scale
     # we could use the override bit from dbc, but it's triggered at too high torque values
     ret.steeringPressed = abs(ret.steeringTorque) > STEER_THRESHOLD
 
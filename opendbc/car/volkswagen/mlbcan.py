@@ -1,4 +1,7 @@
-from opendbc.car.volkswagen.mqbcan import volkswagen_mqb_meb_checksum, xor_checksum
+from dataclasses import replace
+
+from opendbc.car.volkswagen.mqbcan import VOLKSWAGEN_MQB_MEB_CHECKSUM
+from opendbc.car.crc import Checksum, ChecksumKind
 
 # TODO: Parameterize the hca control type (5 vs 7) and consolidate with MQB (and PQ?)
 def create_steering_control(packer, bus, apply_steer, lkas_enabled):
@@ -68,8 +71,10 @@ def create_acc_hud_control(packer, bus, acc_hud_status, set_speed, lead_distance
   values = {}
   return packer.make_can_msg("ACC_02", bus, values)
 
-def volkswagen_mlb_checksum(address: int, sig, d: bytearray) -> int:
-  xor_starting_value = {
+
+# XOR checksums with a starting value per message, the other messages use the MQB CRC
+VOLKSWAGEN_MLB_CHECKSUM = replace(VOLKSWAGEN_MQB_MEB_CHECKSUM, overrides={
+  address: Checksum(ChecksumKind.XOR, init=init, clear_checksum=True) for address, init in {
     0x109: 0x08, # ACC_01
     0x111: 0x10, # TSK_05
     0x30C: 0x0F, # ACC_02
@@ -80,8 +85,4 @@ def volkswagen_mlb_checksum(address: int, sig, d: bytearray) -> int:
     0x311: 0x12, # ACC_0x311
     0x397: 0x94, # LDW_02
     0x10C: 0x0D, # TSK_02
-  }
-  if address in xor_starting_value:
-    return xor_checksum(address, sig, d, xor_starting_value[address])
-  else:
-    return volkswagen_mqb_meb_checksum(address, sig, d)
+  }.items()})
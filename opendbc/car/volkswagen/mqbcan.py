@@ -1,6 +1,6 @@
 from numpy import clip, interp
 
-from opendbc.car.crc import CRC8H2F
+from opendbc.car.crc import Checksum, ChecksumKind
 
 # acspilot: MQB carcontroller forwards stock messages with modified fields rather than packing them
 # from scratch. The create_* hooks below take/return a `values` dict (the decoded stock message), so
@@ -258,28 +258,6 @@ def create_aeb_hud(packer, aeb_supported, fcw_active):
   return packer.make_can_msg("ACC_15", 0, values)
 
 
-def volkswagen_mqb_meb_checksum(address: int, sig, d: bytearray) -> int:
-  crc = 0xFF
-  for i in range(1, len(d)):
-    crc ^= d[i]
-    crc = CRC8H2F[crc]
-  counter = d[1] & 0x0F
-  const = VOLKSWAGEN_MQB_MEB_CONSTANTS.get(address)
-  if const:
-    crc ^= const[counter]
-    crc = CRC8H2F[crc]
-  return crc ^ 0xFF
-
-
-def xor_checksum(address: int, sig, d: bytearray, initial_value: int = 0) -> int:
-  checksum = initial_value
-  checksum_byte = sig.start_bit // 8
-  for i in range(len(d)):
-    if i != checksum_byte:
-      checksum ^= d[i]
-  return checksum
-
-
 VOLKSWAGEN_MQB_MEB_CONSTANTS: dict[int, list[int]] = {
     0x40:  [0x40] * 16,  # Airbag_01
     0x86:  [0x86] * 16,  # LWI_01
@@ -342,3 +320,7 @@ VOLKSWAGEN_MQB_MEB_CONSTANTS: dict[int, list[int]] = {
     0x65D: [0xAC, 0xB3, 0xAB, 0xEB, 0x7A, 0xE1, 0x3B, 0xF7,
             0x73, 0xBA, 0x7C, 0x9E, 0x06, 0x5F, 0x02, 0xD9],  # ESP_20
 }
+
+VOLKSWAGEN_MQB_MEB_CHECKSUM = Checksum(ChecksumKind.CRC8, poly=0x2F, init=0xFF, xor_out=0xFF, start=1,
+                                       counter_constants=VOLKSWAGEN_MQB_MEB_CONSTANTS)
+XOR_CHECKSUM = Checksum(ChecksumKind.XOR, clear_checksum=True)
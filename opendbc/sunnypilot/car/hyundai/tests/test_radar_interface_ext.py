@@ -110,10 +110,7 @@ class TestRadarInterfaceExt(unittest.TestCase):
     # For standard radar, test the _update method directly if available
     if not CP.radarUnavailable and RD.rcp is not None and \
           hasattr(RD, '_update') and hasattr(RD, 'trigger_msg'):
-      # Setup for _update test if needed
-      if hasattr(RD, 'updated_messages'):
-        RD.updated_messages = {RD.trigger_msg}
-      RD._update(RD.updated_messages)
+      RD._update([RD.trigger_msg])
 
     # Test radar fault
     if not CP.radarUnavailable and RD.rcp is not None: